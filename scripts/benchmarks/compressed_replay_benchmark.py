@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""压缩经验回放基准: 原始数组与按块压缩的相机观测列的内存和采样延迟
+
+相机帧由FakeCarla的RGB相机模型沿道路行驶生成, 再像ObservationProcessor一样缩放为
+3xNxN uint8, 默认按dedup_frames存储。sample ms为不预取时每批的取出时间; prefetch ms为预取时
+学习器调用sample阻塞的时间, 两次采样之间用 --learner-ms 模拟学习器的计算(sleep, 在GPU上
+训练时CPU同样空闲)。压缩列取出的观测与原始数组不一致时返回非零。
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+from carla.sensors import CameraModel  # noqa: E402
+from src.training.utils.replay_buffer import ArrayReplayBuffer  # noqa: E402
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="压缩经验回放基准")
+    parser.add_argument("--capacity", type=int, default=10_000, help="缓冲区容量")
+    parser.add_argument("--batch-size", type=int, default=256, help="采样批大小")
+    parser.add_argument("--image-size", type=int, default=84, help="相机观测边长")
+    parser.add_argument("--codecs", type=str, nargs="*",
+                        default=['zlib:1:1', 'zlib:1:16', 'png:1:1', 'zstd:3:1', 'lz4:0:1'],
+                        help="codec:level:chunk_size")
+    parser.add_argument("--workers", type=int, default=2, help="解压线程数")
+    parser.add_argument("--learner-ms", type=float, default=50.0, help="两次采样之间学习器的耗时(毫秒)")
+    parser.add_argument("--samples", type=int, default=20, help="采样次数")
+    parser.add_argument("--no-dedup", action="store_true", help="分别存储state和next_state")
+    return parser.parse_args()
+
+
+def make_frames(args, count: int = 256) -> np.ndarray:
+    """沿道路行驶的相机帧(count, 3, N, N)"""
+    camera = CameraModel('sensor.camera.rgb', {'image_size_x': '320', 'image_size_y': '240'},
+                         mount_height=1.4, mount_pitch=0.0, rng=np.random.default_rng(0))
+    frames = []
+    for i in range(count):
+        bgra = camera.measure(i * 0.5)
+        image = cv2.resize(cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGB),
+                           (args.image_size, args.image_size))
+        frames.append(np.transpose(image, (2, 0, 1)))
+    return np.stack(frames)
+
+
+def fill(buffer: ArrayReplayBuffer, args, frames: np.ndarray) -> float:
+    """逐条写满缓冲区, 返回每秒写入条数"""
+    action = np.zeros(3, dtype=np.float32)
+    state = np.zeros(10, dtype=np.float32)
+    start = time.perf_counter()
+    for i in range(args.capacity):
+        buffer.push({'camera': frames[i % len(frames)], 'state': state}, action, 0.0,
+                    {'camera': frames[(i + 1) % len(frames)], 'state': state}, i % 500 == 499)
+    return args.capacity / (time.perf_counter() - start)
+
+
+def gather_ms(buffer: ArrayReplayBuffer, args) -> float:
+    """不预取时取出一批的平均时间(毫秒)"""
+    start = time.perf_counter()
+    for _ in range(args.samples):
+        buffer.gather(buffer.sample_indices(args.batch_size), as_tensors=True)
+    return (time.perf_counter() - start) / args.samples * 1e3
+
+
+def sample_ms(buffer: ArrayReplayBuffer, args) -> float:
+    """sample平均阻塞时间(毫秒), 每次采样后模拟学习器计算"""
+    buffer.sample(args.batch_size, as_tensors=True)
+    blocked = 0.0
+    for _ in range(args.samples):
+        time.sleep(args.learner_ms / 1e3)
+        start = time.perf_counter()
+        buffer.sample(args.batch_size, as_tensors=True)
+        blocked += time.perf_counter() - start
+    return blocked / args.samples * 1e3
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    frames = make_frames(args)
+    print(f"capacity {args.capacity}, camera 3x{args.image_size}x{args.image_size}, "
+          f"batch {args.batch_size}, {args.workers} decode workers, learner {args.learner_ms} ms")
+    print(f"{'storage':<16}{'obs MB':>8}{'B/trans':>9}{'GB @1M':>8}{'push/s':>9}{'sample ms':>11}"
+          f"{'prefetch ms':>13}{'check':>7}")
+
+    dedup = not args.no_dedup
+    raw = ArrayReplayBuffer(args.capacity, args.batch_size, seed=0, dedup_frames=dedup)
+    push = fill(raw, args, frames)
+    per_transition = raw.obs_nbytes / len(raw)
+    print(f"{'raw':<16}{raw.obs_nbytes / 2**20:>8.0f}{per_transition:>9.0f}"
+          f"{per_transition * 1e6 / 2**30:>8.1f}{push:>9.0f}{gather_ms(raw, args):>11.2f}"
+          f"{'-':>13}{'-':>7}")
+
+    failed = False
+    for spec in args.codecs:
+        codec, level, chunk_size = spec.split(':')
+        compression = {'codec': codec, 'level': int(level), 'chunk_size': int(chunk_size),
+                       'workers': args.workers}
+        label = f"{codec}:{level} x{chunk_size}"
+        try:
+            buffer = ArrayReplayBuffer(args.capacity, args.batch_size, seed=0, dedup_frames=dedup,
+                                       compression=compression)
+        except ValueError as e:
+            print(f"{label:<16}跳过: {e}")
+            continue
+        push = fill(buffer, args, frames)
+
+        indices = buffer.sample_indices(args.batch_size)
+        expected, batch = raw.gather(indices), buffer.gather(indices)
+        ok = all(np.array_equal(batch[part][key], expected[part][key])
+                 for part in ('states', 'next_states') for key in raw.obs)
+        failed |= not ok
+        per_transition = buffer.obs_nbytes / len(buffer)
+        print(f"{label:<16}{buffer.obs_nbytes / 2**20:>8.0f}{per_transition:>9.0f}"
+              f"{per_transition * 1e6 / 2**30:>8.1f}{push:>9.0f}{gather_ms(buffer, args):>11.2f}"
+              f"{sample_ms(buffer, args):>13.2f}{'ok' if ok else 'FAIL':>7}")
+        buffer.close()
+        del buffer
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""深度解码基准: 旧的单通道缩放与24位解码的精度和耗时
+
+深度图由FakeCarla的相机模型按CARLA的24位编码生成。旧实现只取一个通道乘以1000
+并逐帧标准化; 新实现由回调打包的uint32编码一次乘法解码为米, 再按固定常数归一化。
+reduced为先按输出尺寸采样再解码。24位解码误差超过 --max-error 米时返回非零。
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+from carla.sensors import CameraModel  # noqa: E402
+from src.environments.sensors.processor import (DEPTH_MODES, SensorProcessor,  # noqa: E402
+                                                pack_depth)
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="深度解码基准")
+    parser.add_argument("--width", type=int, default=800, help="原始图像宽度")
+    parser.add_argument("--height", type=int, default=600, help="原始图像高度")
+    parser.add_argument("--img-size", type=int, nargs=2, default=[224, 224], help="输出宽高")
+    parser.add_argument("--depth-max", type=float, default=100.0, help="归一化的最大深度(米)")
+    parser.add_argument("--max-error", type=float, default=1e-3, help="允许的解码误差(米)")
+    parser.add_argument("--repeat", type=int, default=50, help="重复次数")
+    return parser.parse_args()
+
+
+def legacy_depth(depth_image: np.ndarray, img_size) -> np.ndarray:
+    """旧实现: 单通道乘以1000, 裁剪后逐帧标准化"""
+    depth = cv2.resize(depth_image, img_size)
+    depth = depth.astype(np.float32)
+    depth = 1000 * depth
+    depth = np.clip(depth, 0, 100.0)
+    return (depth - depth.mean()) / (depth.std() + 1e-7)
+
+
+def timeit(func, repeat: int) -> float:
+    """平均耗时(毫秒)"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    attributes = {'image_size_x': str(args.width), 'image_size_y': str(args.height)}
+    camera = CameraModel('sensor.camera.depth', attributes, mount_height=1.4, mount_pitch=0.0,
+                         rng=np.random.default_rng(0))
+    bgra = camera.measure(0.0)
+    img_size = tuple(args.img_size)
+
+    # 真值: 按64位精度解码的深度(米), 与解码器一样先缩放再裁剪
+    truth = (pack_depth(bgra) * (1000.0 / (256 ** 3 - 1))).astype(np.float32)
+    truth_small = np.clip(cv2.resize(truth, img_size), 0.0, args.depth_max)
+    truth_nearest = np.clip(cv2.resize(truth, img_size, interpolation=cv2.INTER_NEAREST),
+                            0.0, args.depth_max)
+
+    # 旧实现: 回调保留的是BGRA通道0, 即24位编码的最高字节
+    channel = np.ascontiguousarray(bgra[..., 0])
+    legacy_meters = np.clip(1000.0 * cv2.resize(channel, img_size).astype(np.float32), 0, 100.0)
+    legacy_error = np.abs(legacy_meters - np.minimum(truth_small, 100.0)).mean()
+
+    packed = pack_depth(bgra)
+    print(f"{args.width}x{args.height} -> {img_size[0]}x{img_size[1]}, depth range "
+          f"{truth.min():.2f}-{truth.max():.2f} m, normalized up to {args.depth_max} m")
+    print(f"{'decoder':<18}{'ms':>8}{'mean |error| m':>16}")
+    print(f"{'legacy':<18}{timeit(lambda: legacy_depth(channel, img_size), args.repeat):>8.3f}"
+          f"{legacy_error:>16.3f}")
+    print(f"{'pack_depth':<18}{timeit(lambda: pack_depth(bgra, out=packed), args.repeat):>8.3f}"
+          f"{'-':>16}")
+
+    failed = False
+    for reduced in (False, True):
+        for mode in DEPTH_MODES:
+            processor = SensorProcessor({'device': 'cpu', 'img_size': img_size, 'depth_mode': mode,
+                                         'depth_max': args.depth_max, 'depth_reduced': reduced})
+            label = f"{mode}{' reduced' if reduced else ''}"
+            ms = timeit(lambda: processor.process_depth(packed), args.repeat)
+            error = '-'
+            if mode == 'linear':
+                meters = processor.process_depth(packed)[0].numpy() * args.depth_max
+                reference = truth_nearest if reduced else truth_small
+                error = np.abs(meters - reference).mean()
+                failed |= error > args.max_error
+                error = f"{error:.2e}"
+            print(f"{label:<18}{ms:>8.3f}{error:>16}")
+
+    if failed:
+        print(f"24位解码误差超过 {args.max_error} 米")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
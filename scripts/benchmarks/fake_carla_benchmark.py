@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""FakeCarla离线基准: 无服务器测量CarlaEnv/RLEnv的steps/s"""
+import sys
+import argparse
+import hashlib
+import time
+from pathlib import Path
+
+import numpy as np
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+import carla  # noqa: E402
+from src.environments.carla_env import CarlaEnv  # noqa: E402
+from src.environments.rl_env import RLEnv  # noqa: E402
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="FakeCarla离线steps/s基准")
+    parser.add_argument("--steps", type=int, default=300, help="每个配置的步数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--tick-latency", type=float, default=0.0, help="模拟服务器每次tick的耗时(秒)")
+    parser.add_argument("--async-sensors", action="store_true", help="在后台线程回调传感器")
+    parser.add_argument("--device", type=str, default="cpu", help="传感器处理设备")
+    parser.add_argument("--disable", type=str, nargs="*", default=[],
+                        help="关闭的传感器, 如 depth_front semantic_front lidar")
+    parser.add_argument("--reward-config", type=str,
+                        default="configs/env_configs/rewards/reward_config.yaml", help="奖励配置文件")
+    return parser.parse_args()
+
+
+def make_config(args, port: int) -> dict:
+    """每个配置使用独立端口, 即独立的模拟服务器"""
+    sensors = {f'use_{name}': False for name in args.disable}
+    sensors['device'] = args.device
+    return {'port': port, 'sync_mode': True, 'sensors': sensors, 'reward': args.reward_config,
+            'frame_skip': 1, 'time_limit': 10 ** 9}
+
+
+def bench_world(args, port: int) -> float:
+    """只推进世界(含传感器合成与回调)"""
+    env = CarlaEnv(make_config(args, port))
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        env.world.tick()
+    elapsed = time.perf_counter() - start
+    env._cleanup()
+    return args.steps / elapsed
+
+
+def bench_env(args, port: int, wrapper: bool):
+    """返回(steps/s, 最终观测的校验和)"""
+    np.random.seed(args.seed)
+    config = make_config(args, port)
+    env = RLEnv(config) if wrapper else CarlaEnv(config)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        action = np.array([rng.uniform(-0.2, 0.2), rng.uniform(0.3, 1.0), 0.0], dtype=np.float32)
+        obs, _, _, _ = env.step(action)
+    elapsed = time.perf_counter() - start
+
+    digest = hashlib.md5()
+    for key in sorted(obs):
+        value = obs[key]
+        if hasattr(value, 'cpu'):
+            value = value.cpu().numpy()
+        if isinstance(value, np.ndarray):
+            digest.update(np.ascontiguousarray(value).tobytes())
+    (env.env if wrapper else env)._cleanup()
+    return args.steps / elapsed, digest.hexdigest()[:12]
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    carla.configure(seed=args.seed, tick_latency=args.tick_latency,
+                    async_sensors=args.async_sensors)
+
+    print(f"{'mode':<16}{'step/s':>10}{'ms/step':>10}{'checksum':>16}")
+    rate = bench_world(args, 2000)
+    print(f"{'world.tick':<16}{rate:>10.1f}{1000 / rate:>10.2f}{'-':>16}")
+
+    # 相同种子在不同服务器上重复运行, 校验和一致说明结果可复现
+    for mode, port, wrapper in (('CarlaEnv', 2002, False), ('CarlaEnv rerun', 2004, False),
+                                ('RLEnv', 2006, True)):
+        rate, checksum = bench_env(args, port, wrapper)
+        print(f"{mode:<16}{rate:>10.1f}{1000 / rate:>10.2f}{checksum:>16}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
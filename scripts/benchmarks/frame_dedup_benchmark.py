@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""帧去重经验回放基准: 分别存state/next_state与每帧只存一次的内存和采样吞吐
+
+按随机长度的回合逐条写入相机(3通道uint8)和状态观测。dedup_frames模式下next_state按下标
+取下一槽, frame_stack从同一帧环取最近k帧。观测里记录帧编号, 检查采样到的next_state
+和堆叠帧与真实编号一致, 不一致时返回非零。
+"""
+import sys
+import argparse
+import time
+
+import numpy as np
+
+from src.training.utils.replay_buffer import ArrayReplayBuffer
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="帧去重经验回放基准")
+    parser.add_argument("--capacity", type=int, default=20_000, help="缓冲区容量(槽数)")
+    parser.add_argument("--batch-size", type=int, default=256, help="采样批大小")
+    parser.add_argument("--image-size", type=int, default=84, help="相机观测边长")
+    parser.add_argument("--episode-length", type=int, default=200, help="平均回合长度")
+    parser.add_argument("--frame-stack", type=int, default=4, help="堆叠帧数")
+    parser.add_argument("--samples", type=int, default=200, help="采样次数")
+    return parser.parse_args()
+
+
+def fill(buffer: ArrayReplayBuffer, args, frames: np.ndarray, rng) -> float:
+    """按回合写入约1.5倍容量的经验(覆盖最旧的数据), 返回每秒写入条数
+
+    state记录(帧编号, 回合第一帧编号), 相机帧循环使用frames。
+    """
+    action = np.zeros(3, dtype=np.float32)
+    frame_id = 0
+    pushed = 0
+    start = time.perf_counter()
+    while pushed < args.capacity * 3 // 2:
+        length = int(rng.integers(1, 2 * args.episode_length))
+        first = frame_id
+        for step in range(length):
+            state = {'camera': frames[frame_id % len(frames)],
+                     'state': np.array([frame_id, first], np.float32)}
+            next_id = frame_id + 1
+            next_state = {'camera': frames[next_id % len(frames)],
+                          'state': np.array([next_id, first], np.float32)}
+            buffer.push(state, action, 0.0, next_state, step == length - 1)
+            frame_id = next_id
+        frame_id += 1  # 新回合的第一帧
+        pushed += length
+    return pushed / (time.perf_counter() - start)
+
+
+def check(buffer: ArrayReplayBuffer, args) -> bool:
+    """next_state为下一帧; 堆叠帧连续、最新一帧为当前帧且不早于回合开头"""
+    batch = buffer.sample(args.batch_size)
+    ids = batch['states']['state'][..., 0]
+    next_ids = batch['next_states']['state'][..., 0]
+    first = batch['states']['state'][..., 1]
+    if buffer.frame_stack > 1:
+        steps = np.diff(ids, axis=1)
+        return bool(np.all(next_ids[:, -1] == ids[:, -1] + 1)
+                    and np.all((steps == 0) | (steps == 1))
+                    and np.all(ids >= first) and np.all(next_ids[:, :-1] == ids[:, 1:]))
+    return bool(np.all(next_ids == ids + 1))
+
+
+def sample_rate(buffer: ArrayReplayBuffer, args) -> float:
+    """每秒采样的经验条数"""
+    buffer.sample(args.batch_size)
+    start = time.perf_counter()
+    for _ in range(args.samples):
+        buffer.sample(args.batch_size)
+    return args.samples * args.batch_size / (time.perf_counter() - start)
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    frames = rng.integers(0, 256, (64, 3, args.image_size, args.image_size), dtype=np.uint8)
+    print(f"capacity {args.capacity}, camera 3x{args.image_size}x{args.image_size}, "
+          f"mean episode {args.episode_length}, batch {args.batch_size}")
+    print(f"{'storage':<22}{'obs MB':>9}{'B/trans':>10}{'push/s':>10}{'sampled/s':>12}{'check':>7}")
+
+    failed = False
+    modes = [('state + next_state', {}), ('dedup_frames', {'dedup_frames': True}),
+             (f'dedup + stack {args.frame_stack}',
+              {'dedup_frames': True, 'frame_stack': args.frame_stack})]
+    for label, kwargs in modes:
+        buffer = ArrayReplayBuffer(args.capacity, args.batch_size, seed=0, **kwargs)
+        push = fill(buffer, args, frames, rng)
+        memory = sum(column.nbytes for column in (*buffer.obs.values(), *buffer.next_obs.values()))
+        ok = check(buffer, args)
+        failed |= not ok
+        print(f"{label:<22}{memory / 2**20:>9.0f}{memory / len(buffer):>10.0f}{push:>10.0f}"
+              f"{sample_rate(buffer, args):>12.0f}{'ok' if ok else 'FAIL':>7}")
+        del buffer
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
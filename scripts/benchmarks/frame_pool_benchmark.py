@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""相机帧缓冲池基准: 用tracemalloc统计相机回调每帧的内存分配和解码耗时
+
+对比旧的解码方式(BGRA视图切片, 下游cv2处理时再复制为连续数组)与帧缓冲池
+(一次cvtColor/extractChannel/pack_depth写入预分配槽位)。帧缓冲池每帧分配超过
+--max-bytes 时返回非零。
+"""
+import sys
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+from src.environments.sensors.manager import SensorManager  # noqa: E402
+
+CAMERAS = ['rgb_front', 'depth_front', 'semantic_front']
+
+
+class _Image:
+    """最小的相机数据, 与carla.Image的字段一致"""
+    __slots__ = ('raw_data', 'width', 'height', 'frame', 'timestamp')
+
+    def __init__(self, raw_data, width: int, height: int):
+        self.raw_data = raw_data
+        self.width = width
+        self.height = height
+        self.frame = 0
+        self.timestamp = 0.0
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="相机帧缓冲池分配基准")
+    parser.add_argument("--frames", type=int, default=200, help="每个相机的帧数 (20Hz下10秒)")
+    parser.add_argument("--width", type=int, default=800, help="图像宽度")
+    parser.add_argument("--height", type=int, default=600, help="图像高度")
+    parser.add_argument("--max-bytes", type=int, default=4096, help="帧缓冲池每帧允许的分配字节数")
+    return parser.parse_args()
+
+
+def legacy_decode(name: str, image) -> np.ndarray:
+    """旧的解码方式, 加上下游处理非连续视图时的复制"""
+    array = np.frombuffer(image.raw_data, dtype=np.uint8)
+    array = array.reshape((image.height, image.width, 4))
+    array = array[:, :, :3]
+    if 'depth' in name:
+        array = array[:, :, 0]
+    elif 'semantic' in name:
+        array = array[:, :, 2]
+    return np.ascontiguousarray(array)
+
+
+def run(decode, images, frames: int):
+    """返回(每帧峰值分配字节, 每帧耗时us)"""
+    # 预热: 帧缓冲池在第一帧分配
+    for name, image in images.items():
+        decode(name, image)
+
+    tracemalloc.start()
+    peak = 0
+    start = time.perf_counter()
+    for frame in range(1, frames + 1):
+        for name, image in images.items():
+            image.frame = frame
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            decode(name, image)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    return peak, elapsed / (frames * len(images)) * 1e6
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    payload = rng.integers(0, 256, args.width * args.height * 4, dtype=np.uint8).tobytes()
+    images = {name: _Image(memoryview(payload), args.width, args.height) for name in CAMERAS}
+
+    manager = SensorManager({'device': 'cpu'})
+    for name, kind in zip(CAMERAS, ('rgb', 'depth', 'semantic')):
+        manager.camera_kinds[name] = kind
+        manager._register_sensor(name, None)
+
+    legacy_peak, legacy_us = run(legacy_decode, images, args.frames)
+    pool_peak, pool_us = run(manager._on_camera_data, images, args.frames)
+
+    print(f"{len(CAMERAS)} cameras x {args.frames} frames, {args.width}x{args.height}")
+    print(f"{'mode':<12}{'peak B/frame':>14}{'us/frame':>10}")
+    print(f"{'legacy':<12}{legacy_peak:>14}{legacy_us:>10.1f}")
+    print(f"{'frame pool':<12}{pool_peak:>14}{pool_us:>10.1f}")
+
+    # 解码结果与旧方式一致, 深度图改为保留完整的24位编码
+    for name, image in images.items():
+        if 'depth' in name:
+            bgra = np.frombuffer(image.raw_data, dtype=np.uint8)
+            bgra = bgra.reshape((image.height, image.width, 4)).astype(np.uint32)
+            expected = (bgra[..., 0] << 16) | (bgra[..., 1] << 8) | bgra[..., 2]
+        else:
+            expected = legacy_decode(name, image)
+        if not np.array_equal(manager.data_buffers[name], expected):
+            print(f"{name}: 解码结果与旧方式不一致")
+            return 1
+
+    if pool_peak > args.max_bytes:
+        print(f"帧缓冲池每帧分配 {pool_peak} B, 超过 {args.max_bytes} B")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
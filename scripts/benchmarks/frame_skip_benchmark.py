@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""跳帧预处理开销基准"""
+import sys
+import argparse
+import time
+
+import numpy as np
+
+from src.environments.rl_env import RLEnv
+
+
+class FakeCarlaEnv:
+    """模拟CarlaEnv: 返回真实尺寸的原始相机和激光雷达数据"""
+    def __init__(self, image_shape=(600, 800, 3), num_points=5600):
+        self.image_shape = image_shape
+        self.num_points = num_points
+        self._rng = np.random.default_rng(0)
+        self.frame = 0
+
+    def reset(self):
+        self.frame = 0
+        return self.get_obs()
+
+    def step(self, action, compute_obs=True, process_obs=True):
+        self.frame += 1
+        obs = self.get_obs() if compute_obs else None
+        info = {'speed': 30.0, 'collision': False, 'lane_invasion': False}
+        return obs, 0.0, False, info
+
+    def get_obs(self, process_obs=True):
+        return {
+            'camera_rgb': self._rng.integers(0, 256, self.image_shape, dtype=np.uint8),
+            'lidar': self._rng.uniform(-60, 60, (self.num_points, 4)).astype(np.float32),
+            'vehicle_state': {
+                'position': [0.0, 0.0, 0.0],
+                'rotation': [0.0, 0.0, 0.0],
+                'velocity': [8.0, 0.0, 0.0]
+            }
+        }
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="RLEnv跳帧基准")
+    parser.add_argument("--frame-skip", type=int, default=4, help="跳帧数")
+    parser.add_argument("--steps", type=int, default=200, help="智能体步数")
+    parser.add_argument("--reward-config", type=str,
+                        default="configs/env_configs/rewards/reward_config.yaml", help="奖励配置文件")
+    return parser.parse_args()
+
+
+def bench(env: RLEnv, steps: int, calls_per_step: int) -> float:
+    """返回每个智能体步的平均耗时(毫秒)"""
+    env.reset()
+    action = np.zeros(3, dtype=np.float32)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        for _ in range(calls_per_step):
+            env.step(action)
+    return (time.perf_counter() - start) * 1000 / steps
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    base_config = {'reward': args.reward_config, 'time_limit': 10 ** 9}
+
+    # 旧行为: 每个内部帧都完整处理观测, 等价于frame_skip=1连续调用frame_skip次
+    legacy = RLEnv(dict(base_config, frame_skip=1), env=FakeCarlaEnv())
+    legacy_ms = bench(legacy, args.steps, args.frame_skip)
+
+    skip = RLEnv(dict(base_config, frame_skip=args.frame_skip), env=FakeCarlaEnv())
+    skip_ms = bench(skip, args.steps, 1)
+
+    pooled = RLEnv(dict(base_config, frame_skip=args.frame_skip, max_pool=True), env=FakeCarlaEnv())
+    pooled_ms = bench(pooled, args.steps, 1)
+
+    print(f"{'mode':<24}{'ms/agent step':>14}{'speedup':>10}")
+    print(f"{'per-frame processing':<24}{legacy_ms:>14.2f}{1.0:>10.2f}")
+    print(f"{'final frame only':<24}{skip_ms:>14.2f}{legacy_ms / skip_ms:>10.2f}")
+    print(f"{'final two + max-pool':<24}{pooled_ms:>14.2f}{legacy_ms / pooled_ms:>10.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""融合张量基准: 各模态分别处理后torch.cat/stack与FusionLayout直接写入预分配张量
+
+每个环境一路RGB、深度(24位编码)、语义和激光雷达, 比较N个环境每步得到(N, C, H, W)的耗时。
+两种方式结果不一致时返回非零。
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+from src.environments.sensors.fusion import FusionLayout  # noqa: E402
+from src.environments.sensors.processor import pack_depth  # noqa: E402
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="融合张量布局基准")
+    parser.add_argument("--envs", type=int, nargs="*", default=[1, 2, 4, 8, 16, 32, 64], help="环境数")
+    parser.add_argument("--raw-size", type=int, nargs=2, default=[84, 84], help="原始图像宽高")
+    parser.add_argument("--img-size", type=int, nargs=2, default=[84, 84], help="融合张量宽高")
+    parser.add_argument("--points", type=int, default=5600, help="每帧激光雷达点数")
+    parser.add_argument("--device", type=str, default="cpu", help="处理设备")
+    parser.add_argument("--repeat", type=int, default=10, help="重复次数")
+    return parser.parse_args()
+
+
+def make_sensor_data(args, count: int) -> list:
+    """count组不同的传感器数据, 环境之间循环使用"""
+    rng = np.random.default_rng(0)
+    width, height = args.raw_size
+    frames = []
+    for _ in range(count):
+        frames.append({
+            'rgb': rng.integers(0, 256, (height, width, 3), dtype=np.uint8),
+            'depth': pack_depth(rng.integers(0, 256, (height, width, 4), dtype=np.uint8)),
+            'semantic': rng.integers(0, 23, (height, width), dtype=np.uint8),
+            'lidar': rng.normal(0.0, 20.0, (args.points, 4)).astype(np.float32)
+        })
+    return frames
+
+
+def concat_fusion(layout: FusionLayout, batch: list) -> torch.Tensor:
+    """旧方式: 各模态分别处理得到新张量, 激光雷达BEV插值到相机网格, 再cat和stack"""
+    processor = layout.processor
+    fused = []
+    for data in batch:
+        bev = processor.process_lidar(data['lidar'])
+        bev = bev.reshape((-1,) + bev.shape[-2:])
+        bev = F.interpolate(bev[None], size=layout.shape[1:], mode='nearest')[0]
+        fused.append(torch.cat([processor.process_camera(data['rgb']),
+                                processor.process_depth(data['depth']),
+                                processor.semantic_masks(data['semantic']), bev], dim=0))
+    return torch.stack(fused)
+
+
+def timeit(func, repeat: int, device: str) -> float:
+    """平均耗时(毫秒), 包含设备同步"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+        if device.startswith('cuda'):
+            torch.cuda.synchronize()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    layout = FusionLayout.from_config({'device': args.device, 'img_size': tuple(args.img_size),
+                                       'lidar_bev_channels': ['max_height', 'density']})
+    frames = make_sensor_data(args, 8)
+    channels = {name: (s.start, s.stop) for name, s in layout.slices.items()}
+    print(f"layout {layout.shape} {channels}, "
+          f"raw {args.raw_size[0]}x{args.raw_size[1]}, device {args.device}")
+    print(f"{'envs':>5}{'cat ms':>10}{'layout ms':>11}{'speedup':>9}{'us/env':>9}"
+          f"{'max |diff|':>12}")
+
+    failed = False
+    for envs in args.envs:
+        batch = [frames[i % len(frames)] for i in range(envs)]
+        out = layout.allocate(envs)
+        diff = (concat_fusion(layout, batch) - layout.fuse_batch(batch, out)).abs().max().item()
+        failed |= diff > 1e-5
+
+        cat_ms = timeit(lambda: concat_fusion(layout, batch), args.repeat, args.device)
+        layout_ms = timeit(lambda: layout.fuse_batch(batch, out), args.repeat, args.device)
+        print(f"{envs:>5}{cat_ms:>10.2f}{layout_ms:>11.2f}{cat_ms / layout_ms:>8.2f}x"
+              f"{layout_ms / envs * 1e3:>9.0f}{diff:>12.2e}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""导入耗时基准: 用 python -X importtime 测量各入口模块的导入耗时和引入的重依赖
+
+每个目标在独立子进程中导入, 输出总耗时、耗时最多的模块以及被加载的重依赖。
+超出 --budget-ms 或轻量目标引入了重依赖时返回非零, 可用于防止导入耗时回退。
+"""
+import sys
+import argparse
+import os
+import subprocess
+from pathlib import Path
+
+# 不应在导入轻量目标时被加载的重依赖
+HEAVY_MODULES = ['carla', 'torch', 'tensorboard', 'wandb', 'streamlit', 'plotly', 'pygame', 'cv2',
+                 'ray', 'matplotlib']
+
+# 只需要注册表、奖励等轻量接口的入口
+LIGHT_TARGETS = ['src', 'src.environments', 'src.algorithms', 'src.training', 'src.evaluation',
+                 'src.visualization', 'src.utils.timing']
+
+ROOT = Path(__file__).resolve().parents[2]
+MARKER = '-- import start --'
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="导入耗时基准")
+    parser.add_argument("--targets", type=str, nargs="*", default=LIGHT_TARGETS, help="要导入的模块")
+    parser.add_argument("--repeat", type=int, default=3, help="每个目标重复次数, 取最小值")
+    parser.add_argument("--top", type=int, default=5, help="列出耗时最多的模块数")
+    parser.add_argument("--budget-ms", type=float, default=None, help="单个目标的导入耗时上限(毫秒)")
+    return parser.parse_args()
+
+
+def measure(target: str):
+    """返回(总耗时ms, [(累计耗时ms, 模块名)], 加载的重依赖), 导入失败时返回错误信息"""
+    # 标记之前是解释器启动自身的导入, 不计入
+    code = (f"import sys; sys.stderr.write('{MARKER}\\n'); import {target}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return result.stderr.strip().splitlines()[-1]
+
+    # 格式: "import time: self [us] | cumulative | imported package"
+    entries = []
+    lines = result.stderr.splitlines()
+    for line in lines[lines.index(MARKER) + 1:]:
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative) / 1000, name[1:].rstrip()))  # 去掉分隔符后的空格, 保留嵌套缩进
+
+    # 顶层条目(无缩进)的累计耗时之和即本次导入的总耗时
+    total = sum(ms for ms, name in entries if not name.startswith(' '))
+    top = sorted(((ms, name.strip()) for ms, name in entries), reverse=True)
+    heavy = [m for m in result.stdout.strip().split(',') if m]
+    return total, top, heavy
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    failed = False
+
+    print(f"{'target':<28}{'ms':>10}  heavy modules")
+    for target in args.targets:
+        runs = [measure(target) for _ in range(args.repeat)]
+        if isinstance(runs[0], str):
+            print(f"{target:<28}{'error':>10}  {runs[0]}")
+            failed = True
+            continue
+        total, top, heavy = min(runs, key=lambda run: run[0])
+        print(f"{target:<28}{total:>10.1f}  {', '.join(heavy) or '-'}")
+        for ms, name in top[:args.top]:
+            print(f"{'':<4}{name:<40}{ms:>10.1f}")
+
+        if args.budget_ms is not None and total > args.budget_ms:
+            print(f"    超出预算 {args.budget_ms:.1f} ms")
+            failed = True
+        if heavy and target in LIGHT_TARGETS:
+            print(f"    轻量目标加载了重依赖: {', '.join(heavy)}")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
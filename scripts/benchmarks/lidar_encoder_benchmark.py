@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""激光雷达编码器基准: 同一帧点云上各编码器的耗时、输出大小, 以及共享极坐标变换的收益
+
+点云由FakeCarla的32线激光雷达模型生成(整圈扫描)。
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+from carla.sensors import LidarModel  # noqa: E402
+from src.environments.sensors.lidar_encoders import LidarEncoding, PolarTransform  # noqa: E402
+
+ENCODERS = {
+    'points': {'type': 'points', 'max_points': 1000},
+    'angle_histogram': {'type': 'angle_histogram', 'bins': 64},
+    'voxel': {'type': 'voxel'},
+    'range_image': {'type': 'range_image', 'channels': 32, 'columns': 1024},
+    'fps': {'type': 'fps', 'num_points': 512}
+}
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="激光雷达编码器基准")
+    parser.add_argument("--points-per-second", type=int, default=560000, help="雷达每秒点数")
+    parser.add_argument("--rotation-frequency", type=float, default=10.0, help="雷达转速(Hz)")
+    parser.add_argument("--range", type=float, default=50.0, help="雷达量程(米)")
+    parser.add_argument("--repeat", type=int, default=20, help="重复次数")
+    return parser.parse_args()
+
+
+def timeit(func, repeat: int) -> float:
+    """平均耗时(毫秒)"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    lidar = LidarModel({'channels': '32', 'range': str(args.range),
+                        'points_per_second': str(args.points_per_second),
+                        'rotation_frequency': str(args.rotation_frequency)},
+                       mount_height=2.4, rng=np.random.default_rng(0))
+    points, _, _ = lidar.measure(1.0 / args.rotation_frequency)
+    print(f"{len(points)} points per sweep")
+
+    # 极坐标变换本身的耗时
+    polar = PolarTransform()
+
+    def transform():
+        polar.update(points)
+        return polar.range, polar.azimuth, polar.elevation
+
+    transform_ms = timeit(transform, args.repeat)
+    print(f"{'polar transform':<18}{transform_ms:>10.3f} ms")
+
+    print(f"\n{'encoder':<18}{'ms':>10}{'output':>20}{'KB':>10}")
+    for name, config in ENCODERS.items():
+        encoder = LidarEncoding({name: config}).encoders[name]
+        # 每次编码前清空缓存, 计入该编码器需要的变换
+        ms = timeit(lambda: encoder.encode(polar.update(points)), args.repeat)
+        shape = 'x'.join(map(str, encoder.out.shape))
+        print(f"{name:<18}{ms:>10.3f}{shape:>20}{encoder.out.nbytes / 1024:>10.1f}")
+
+    # 共享一次变换 vs 各自重新计算 (不含耗时远大于变换的fps)
+    encoding = LidarEncoding({name: config for name, config in ENCODERS.items() if name != 'fps'})
+    shared = timeit(lambda: encoding.encode(points), args.repeat)
+    separate = timeit(lambda: [encoder.encode(polar.update(points))
+                               for encoder in encoding.encoders.values()], args.repeat)
+    print(f"\nencoders except fps: shared transform {shared:.3f} ms, "
+          f"separate transforms {separate:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
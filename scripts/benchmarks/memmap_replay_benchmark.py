@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""磁盘经验回放基准: 超过内存的MemmapReplayBuffer的写入、重新打开和采样吞吐
+
+按随机长度的回合逐条写入约 --size-gb 的相机观测(dedup_frames), flush后在同一进程中
+重新打开(只映射文件和读取索引), 再按不同的run_length采样。每种run_length测试前用
+posix_fadvise把文件逐出页缓存, 使读取来自磁盘。重新打开后的状态或采样到的next_state
+与写入时不一致时返回非零。
+"""
+import sys
+import argparse
+import os
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.training.utils.memmap_replay_buffer import META_FILE, MemmapReplayBuffer
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="磁盘经验回放基准")
+    parser.add_argument("--directory", type=str, default="/tmp/memmap_replay_benchmark",
+                        help="缓冲区目录")
+    parser.add_argument("--size-gb", type=float, default=50.0, help="观测数据大小(GB)")
+    parser.add_argument("--image-size", type=int, default=84, help="相机观测边长")
+    parser.add_argument("--episode-length", type=int, default=500, help="平均回合长度")
+    parser.add_argument("--batch-size", type=int, default=256, help="采样批大小")
+    parser.add_argument("--run-lengths", type=int, nargs="*", default=[1, 8, 32], help="每个连续段的槽数")
+    parser.add_argument("--samples", type=int, default=20, help="每种run_length的采样次数")
+    parser.add_argument("--keep", action="store_true", help="保留本次创建的缓冲区文件")
+    return parser.parse_args()
+
+
+def fill(buffer: MemmapReplayBuffer, args, rng) -> float:
+    """按回合写满缓冲区, state[0]记录帧编号; 返回每秒写入条数"""
+    frames = rng.integers(0, 256, (64, 3, args.image_size, args.image_size), dtype=np.uint8)
+    action = np.zeros(3, dtype=np.float32)
+    frame_id = 0
+    pushed = 0
+    report = buffer.capacity // 10
+    start = time.perf_counter()
+    while buffer.size < buffer.capacity:
+        length = int(rng.integers(1, 2 * args.episode_length))
+        for step in range(length):
+            state = {'camera': frames[frame_id % 64], 'state': np.array([frame_id], np.float32)}
+            next_id = frame_id + 1
+            next_state = {'camera': frames[next_id % 64], 'state': np.array([next_id], np.float32)}
+            buffer.push(state, action, 0.0, next_state, step == length - 1)
+            frame_id = next_id
+            pushed += 1
+            if pushed % report == 0:
+                rate = pushed / (time.perf_counter() - start)
+                print(f"  写入 {buffer.size}/{buffer.capacity} 槽, {rate:.0f} 条/秒")
+        frame_id += 1
+    return pushed / (time.perf_counter() - start)
+
+
+def evict(directory: Path):
+    """把缓冲区文件逐出页缓存"""
+    for path in directory.glob('*.npy'):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    directory = Path(args.directory)
+    frame_bytes = 3 * args.image_size ** 2
+    created = not (directory / META_FILE).exists()
+
+    if created:
+        capacity = int(args.size_gb * 2**30 // frame_bytes)
+        print(f"创建 {directory}: {capacity} 槽 x {frame_bytes} B = "
+              f"{capacity * frame_bytes / 2**30:.1f} GB")
+        buffer = MemmapReplayBuffer(directory, capacity, args.batch_size, seed=0, dedup_frames=True)
+        print(f"push: {fill(buffer, args, rng):.0f} 条/秒")
+        buffer.update_priorities(np.flatnonzero(buffer.valid), rng.exponential(1.0, len(buffer)))
+        start = time.perf_counter()
+        buffer.close()
+        print(f"flush: {time.perf_counter() - start:.1f} s")
+        expected = (buffer.position, buffer.size, len(buffer), buffer.sum_tree.total())
+        del buffer
+    else:
+        print(f"复用已有的缓冲区 {directory}")
+        expected = None
+
+    start = time.perf_counter()
+    buffer = MemmapReplayBuffer(directory, batch_size=args.batch_size, seed=0)
+    reopen = time.perf_counter() - start
+    size = sum(path.stat().st_size for path in directory.glob('*.npy'))
+    print(f"重新打开: {reopen:.2f} s, {len(buffer)} 条经验, 文件 {size / 2**30:.1f} GB")
+    failed = expected is not None and expected != (buffer.position, buffer.size, len(buffer),
+                                                   buffer.sum_tree.total())
+    if failed:
+        print(f"重新打开后的状态不一致: {expected}")
+
+    print(f"\n{'run_length':>10}{'sampled/s':>12}{'ms/batch':>10}{'MB/s':>8}{'check':>7}")
+    for run_length in args.run_lengths:
+        buffer.run_length = run_length
+        evict(directory)
+        start = time.perf_counter()
+        ok = True
+        for _ in range(args.samples):
+            batch = buffer.sample(args.batch_size)
+            ids = batch['states']['state'][:, 0]
+            ok &= bool(np.all(batch['next_states']['state'][:, 0] == ids + 1))
+        elapsed = time.perf_counter() - start
+        failed |= not ok
+        rate = args.samples * args.batch_size / elapsed
+        print(f"{run_length:>10}{rate:>12.0f}{elapsed / args.samples * 1e3:>10.1f}"
+              f"{rate * 2 * frame_bytes / 2**20:>8.0f}{'ok' if ok else 'FAIL':>7}")
+
+    buffer.close()
+    if created and not args.keep:
+        shutil.rmtree(directory)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+"""流水线步进基准: 观测处理与仿真tick重叠"""
+import sys
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from src.environments.rl_env import RLEnv
+
+
+class DelayedCarlaEnv:
+    """模拟CarlaEnv: step固定耗时tick_delay, 原始观测为BGRA字节图像和点云"""
+    def __init__(self, tick_delay=0.01, image_shape=(600, 800), num_points=5600):
+        self.tick_delay = tick_delay
+        self.frame = 0
+        rng = np.random.default_rng(0)
+        self._bgra = rng.integers(0, 256, image_shape + (4,), dtype=np.uint8)
+        self._lidar = rng.uniform(-60, 60, (num_points, 4)).astype(np.float32)
+
+    def reset(self):
+        self.frame = 0
+        return self.process_obs(self._raw_obs())
+
+    def step(self, action, compute_obs=True, process_obs=True):
+        # 仿真tick期间释放GIL, 与真实RPC等待一致
+        time.sleep(self.tick_delay)
+        self.frame += 1
+        obs = None
+        if compute_obs:
+            obs = self._raw_obs()
+            if process_obs:
+                obs = self.process_obs(obs)
+        info = {'speed': 30.0, 'collision': False, 'lane_invasion': False, 'frame': self.frame}
+        return obs, 0.0, False, info
+
+    def get_obs(self, process_obs=True):
+        obs = self._raw_obs()
+        return self.process_obs(obs) if process_obs else obs
+
+    def process_obs(self, raw_obs):
+        # 模拟SensorManager解码: BGRA -> RGB
+        return {
+            'camera_rgb': cv2.cvtColor(raw_obs['camera_bgra'], cv2.COLOR_BGRA2RGB),
+            'lidar': raw_obs['lidar'],
+            'vehicle_state': raw_obs['vehicle_state']
+        }
+
+    def _raw_obs(self):
+        return {
+            'camera_bgra': self._bgra,
+            'lidar': self._lidar,
+            'vehicle_state': {
+                'position': [float(self.frame), 0.0, 0.0],
+                'rotation': [0.0, 0.0, 0.0],
+                'velocity': [8.0, 0.0, 0.0]
+            }
+        }
+
+    def close(self):
+        pass
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="RLEnv流水线步进基准")
+    parser.add_argument("--tick-ms", type=float, nargs="+", default=[5.0, 10.0, 20.0],
+                        help="模拟仿真tick耗时(毫秒)")
+    parser.add_argument("--policy-ms", type=float, default=2.0, help="模拟策略推理耗时(毫秒)")
+    parser.add_argument("--frame-skip", type=int, default=1, help="跳帧数")
+    parser.add_argument("--steps", type=int, default=200, help="智能体步数")
+    parser.add_argument("--reward-config", type=str,
+                        default="configs/env_configs/rewards/reward_config.yaml", help="奖励配置文件")
+    return parser.parse_args()
+
+
+def bench(config: dict, tick_delay: float, policy_delay: float, steps: int):
+    """返回(steps/s, 每步step调用耗时数组(毫秒), 观测滞后帧数)"""
+    env = RLEnv(config, env=DelayedCarlaEnv(tick_delay))
+    env.reset()
+    action = np.zeros(3, dtype=np.float32)
+    latencies = np.empty(steps)
+    obs_lag = 0.0
+
+    start = time.perf_counter()
+    for i in range(steps):
+        time.sleep(policy_delay)
+        t0 = time.perf_counter()
+        obs, _, _, info = env.step(action)
+        latencies[i] = (time.perf_counter() - t0) * 1000
+        # 观测中的位置等于采集时的帧号
+        obs_lag += (info['frame'] - obs['state'][0]) / config['frame_skip']
+    elapsed = time.perf_counter() - start
+
+    env.close()
+    return steps / elapsed, latencies, obs_lag / steps
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    base_config = {
+        'reward': args.reward_config,
+        'frame_skip': args.frame_skip,
+        'time_limit': 10 ** 9,
+        'observation': {'normalize': False}
+    }
+
+    print(f"{'tick ms':>8}{'mode':>10}{'step/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'obs lag':>10}{'speedup':>10}")
+    for tick_ms in args.tick_ms:
+        baseline = None
+        for mode, pipeline in (('serial', False), ('pipeline', True)):
+            rate, latencies, lag = bench(dict(base_config, pipeline=pipeline),
+                                         tick_ms / 1000, args.policy_ms / 1000, args.steps)
+            baseline = baseline or rate
+            print(f"{tick_ms:>8.1f}{mode:>10}{rate:>10.1f}{np.percentile(latencies, 50):>10.2f}"
+                  f"{np.percentile(latencies, 95):>10.2f}{lag:>10.2f}{rate / baseline:>10.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
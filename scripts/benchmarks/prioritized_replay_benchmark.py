@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""优先经验回放基准: 求和树分层采样与按概率数组采样的耗时随容量的变化
+
+按概率数组采样(np.random.choice(p=...), 旧ReplayBuffer的做法)每次要归一化全部优先级, 为O(n);
+PrioritizedReplayBuffer在求和树上逐层下降, 为O(batch * log n)。同时测update_priorities,
+并检查采样频率与priority^alpha成正比; 偏差超过 --max-error 时返回非零。
+"""
+import sys
+import argparse
+import time
+
+import numpy as np
+
+from src.training.utils.replay_buffer import PrioritizedReplayBuffer
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="优先经验回放采样基准")
+    parser.add_argument("--capacities", type=int, nargs="*",
+                        default=[10_000, 100_000, 1_000_000, 4_000_000], help="缓冲区容量")
+    parser.add_argument("--batch-size", type=int, default=256, help="采样批大小")
+    parser.add_argument("--state-dim", type=int, default=10, help="状态向量维数")
+    parser.add_argument("--samples", type=int, default=200, help="每个容量的采样次数")
+    parser.add_argument("--naive-samples", type=int, default=5, help="按概率数组采样的次数")
+    parser.add_argument("--max-error", type=float, default=0.02,
+                        help="采样频率与理论分布的最大总变差")
+    return parser.parse_args()
+
+
+def fill(buffer: PrioritizedReplayBuffer, args, rng):
+    """用push_batch写满缓冲区, 再赋予随机优先级"""
+    chunk = 65536
+    states = {'state': rng.standard_normal((chunk, args.state_dim)).astype(np.float32)}
+    actions = np.zeros((chunk, 3), dtype=np.float32)
+    rewards = np.zeros(chunk, dtype=np.float32)
+    dones = np.zeros(chunk, dtype=bool)
+    for start in range(0, buffer.capacity, chunk):
+        count = min(chunk, buffer.capacity - start)
+        batch = {key: value[:count] for key, value in states.items()}
+        buffer.push_batch(batch, actions[:count], rewards[:count], batch, dones[:count])
+    buffer.update_priorities(np.arange(buffer.capacity), rng.exponential(1.0, buffer.capacity))
+
+
+def per_call_us(func, count: int) -> float:
+    """平均耗时(微秒)"""
+    func()
+    start = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def bench(args, rng, capacity: int) -> str:
+    """一个容量下各操作的耗时, 返回表格中的一行; 返回后释放缓冲区再测下一个容量"""
+    buffer = PrioritizedReplayBuffer(capacity, args.batch_size, seed=0)
+    fill(buffer, args, rng)
+    probs = buffer.sum_tree[np.arange(capacity)]
+
+    naive = per_call_us(lambda: rng.choice(capacity, args.batch_size, p=probs / probs.sum()),
+                        args.naive_samples)
+    sample = per_call_us(lambda: buffer.sample(), args.samples)
+    indices = per_call_us(lambda: buffer.sample_indices(args.batch_size), args.samples)
+    batch_indices = buffer.sample_indices(args.batch_size)
+    errors = rng.exponential(1.0, args.batch_size)
+    update = per_call_us(lambda: buffer.update_priorities(batch_indices, errors), args.samples)
+    return (f"{capacity:>10}{naive:>12.0f}{sample:>12.1f}{indices:>12.1f}{update:>12.1f}"
+            f"{args.batch_size / sample * 1e6:>12.0f}")
+
+
+def distribution_error(args, rng) -> float:
+    """小缓冲区上采样频率与priority^alpha分布的总变差"""
+    buffer = PrioritizedReplayBuffer(1000, args.batch_size, seed=0)
+    fill(buffer, args, rng)
+    expected = buffer.sum_tree[np.arange(1000)] / buffer.sum_tree.total()
+    counts = np.zeros(1000)
+    for _ in range(2000):
+        np.add.at(counts, buffer.sample_indices(args.batch_size), 1)
+    return 0.5 * np.abs(counts / counts.sum() - expected).sum()
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    print(f"batch {args.batch_size}, alpha 0.6, beta 0.4")
+    print(f"{'capacity':>10}{'naive us':>12}{'sample us':>12}{'indices us':>12}{'update us':>12}"
+          f"{'sampled/s':>12}")
+
+    for capacity in args.capacities:
+        print(bench(args, rng, capacity))
+
+    error = distribution_error(args, rng)
+    print(f"\n采样频率与priority^alpha分布的总变差: {error:.4f}")
+    return 1 if error > args.max_error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
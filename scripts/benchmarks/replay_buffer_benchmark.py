@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""经验回放基准: 逐条保存元组的ReplayBuffer与列式ArrayReplayBuffer的写入和采样吞吐
+
+两者写满 --capacity 条经验后采样。ReplayBuffer按求和树采样下标后逐条拼装批,
+--legacy-samples 控制其采样次数。
+"""
+import sys
+import argparse
+import time
+
+import numpy as np
+
+from src.training.utils.replay_buffer import ArrayReplayBuffer, ReplayBuffer
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="经验回放写入/采样基准")
+    parser.add_argument("--capacity", type=int, default=1_000_000, help="缓冲区容量")
+    parser.add_argument("--batch-size", type=int, default=256, help="采样批大小")
+    parser.add_argument("--state-dim", type=int, default=10, help="状态向量维数")
+    parser.add_argument("--image-size", type=int, default=0, help="相机观测边长(3通道uint8), 0表示不含图像")
+    parser.add_argument("--samples", type=int, default=200, help="列式缓冲区采样次数")
+    parser.add_argument("--legacy-samples", type=int, default=3, help="旧缓冲区采样次数")
+    parser.add_argument("--skip-legacy", action="store_true", help="不测旧缓冲区")
+    return parser.parse_args()
+
+
+def make_obs(args, rng) -> dict:
+    """一条观测"""
+    obs = {'state': rng.standard_normal(args.state_dim).astype(np.float32)}
+    if args.image_size:
+        obs['camera'] = rng.integers(0, 256, (3, args.image_size, args.image_size), dtype=np.uint8)
+    return obs
+
+
+def fill(buffer, args, observations: list) -> float:
+    """逐条写满缓冲区, 返回每秒写入条数"""
+    action = np.zeros(3, dtype=np.float32)
+    start = time.perf_counter()
+    for i in range(args.capacity):
+        buffer.push(observations[i % len(observations)], action, 1.0,
+                    observations[(i + 1) % len(observations)], False, {})
+    return args.capacity / (time.perf_counter() - start)
+
+
+def sample_rate(buffer, batch_size: int, count: int, **kwargs) -> float:
+    """每秒采样的经验条数"""
+    buffer.sample(batch_size, **kwargs)
+    start = time.perf_counter()
+    for _ in range(count):
+        buffer.sample(batch_size, **kwargs)
+    return count * batch_size / (time.perf_counter() - start)
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    observations = [make_obs(args, rng) for _ in range(64)]
+    obs_bytes = sum(value.nbytes for value in observations[0].values())
+    print(f"capacity {args.capacity}, batch {args.batch_size}, {obs_bytes} B per observation")
+    print(f"{'buffer':<22}{'push/s':>12}{'sampled/s':>14}")
+
+    columnar = ArrayReplayBuffer(args.capacity, args.batch_size, seed=0)
+    push = fill(columnar, args, observations)
+    print(f"{'ArrayReplayBuffer':<22}{push:>12.0f}"
+          f"{sample_rate(columnar, args.batch_size, args.samples):>14.0f}")
+    tensors = sample_rate(columnar, args.batch_size, args.samples, as_tensors=True)
+    print(f"{'  as_tensors':<22}{'-':>12}{tensors:>14.0f}")
+
+    # 向量化环境一次写入一批
+    batch = 64
+    states = {key: np.stack([obs[key] for obs in observations]) for key in observations[0]}
+    actions = np.zeros((batch, 3), dtype=np.float32)
+    rewards = np.ones(batch, dtype=np.float32)
+    dones = np.zeros(batch, dtype=bool)
+    start = time.perf_counter()
+    for _ in range(args.capacity // batch):
+        columnar.push_batch(states, actions, rewards, states, dones)
+    push_batch = args.capacity // batch * batch / (time.perf_counter() - start)
+    print(f"{'  push_batch(64)':<22}{push_batch:>12.0f}{'-':>14}")
+    columns = (*columnar.obs.values(), *columnar.next_obs.values(),
+               columnar.actions, columnar.rewards, columnar.dones)
+    memory = sum(column.nbytes for column in columns)
+    del columnar, columns
+
+    if not args.skip_legacy:
+        legacy = ReplayBuffer(args.capacity, args.batch_size)
+        push = fill(legacy, args, observations)
+        print(f"{'ReplayBuffer':<22}{push:>12.0f}"
+              f"{sample_rate(legacy, args.batch_size, args.legacy_samples):>14.0f}")
+    print(f"\nArrayReplayBuffer columns: {memory / 2**20:.0f} MB "
+          f"({memory / args.capacity:.0f} B per transition)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
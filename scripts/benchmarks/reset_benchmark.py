@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""环境重置耗时基准: 冷重置 vs 快速重置"""
+import sys
+import argparse
+
+import numpy as np
+
+from src.environments.carla_env import CarlaEnv
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="CarlaEnv重置耗时基准")
+    parser.add_argument("--host", type=str, default="localhost", help="CARLA服务器地址")
+    parser.add_argument("--port", type=int, default=2000, help="CARLA服务器端口")
+    parser.add_argument("--episodes", type=int, default=20, help="重置次数")
+    parser.add_argument("--episode-steps", type=int, default=10, help="每次重置之间的步数")
+    parser.add_argument("--device", type=str, default="cpu", help="传感器处理设备")
+    return parser.parse_args()
+
+
+def bench(config: dict, episodes: int, episode_steps: int) -> np.ndarray:
+    """返回每次reset的耗时(毫秒)"""
+    env = CarlaEnv(config)
+    action = np.zeros(3, dtype=np.float32)
+    latencies = []
+
+    for _ in range(episodes):
+        env.reset()
+        latencies.append(env.reset_latency * 1000)
+        for _ in range(episode_steps):
+            env.step(action)
+
+    env._cleanup()
+    return np.array(latencies)
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    config = {'host': args.host, 'port': args.port, 'sync_mode': True,
+              'sensors': {'device': args.device}}
+
+    print(f"{'mode':<8}{'first ms':>10}{'mean ms':>10}{'p95 ms':>10}")
+    for mode, warm in (('cold', False), ('warm', True)):
+        latencies = bench(dict(config, warm_reset=warm), args.episodes, args.episode_steps)
+        # 第一次reset总是冷启动, 单独列出
+        rest = latencies[1:] if len(latencies) > 1 else latencies
+        print(f"{mode:<8}{latencies[0]:>10.1f}{rest.mean():>10.1f}"
+              f"{np.percentile(rest, 95):>10.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
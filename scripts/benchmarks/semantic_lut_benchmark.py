@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""语义掩码基准: 逐类别比较与查找表解码的耗时, 以及随通道数的变化
+
+旧实现每个类别一次全图比较并分配float32掩码、分别上传; 查找表解码为一次gather写入
+(C, H, W) uint8缓冲区(masks), 或一次查表得到下标图后在设备上展开(one_hot)。
+host列为one_hot在CPU上的部分(缩放+查表), 与通道数无关; 在CPU设备上展开
+one-hot本身仍与通道数成正比。结果与逐类别比较不一致时返回非零。
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import torch
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+from src.environments.sensors.processor import SEMANTIC_OUTPUTS, SensorProcessor  # noqa: E402
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="语义掩码查找表基准")
+    parser.add_argument("--channels", type=int, nargs="*", default=[4, 8, 16, 23], help="输出通道数")
+    parser.add_argument("--width", type=int, default=800, help="原始图像宽度")
+    parser.add_argument("--height", type=int, default=600, help="原始图像高度")
+    parser.add_argument("--img-size", type=int, nargs=2, default=[224, 224], help="输出宽高")
+    parser.add_argument("--device", type=str, default="cpu", help="处理设备")
+    parser.add_argument("--repeat", type=int, default=50, help="重复次数")
+    return parser.parse_args()
+
+
+def legacy_masks(processor: SensorProcessor, semantic_image: np.ndarray, classes: dict) -> dict:
+    """旧实现: 每个类别一次比较, 分别转换为float32并上传"""
+    semantic = cv2.resize(semantic_image, processor.img_size, interpolation=cv2.INTER_NEAREST)
+    return {name: torch.from_numpy(np.isin(semantic, ids).astype(np.float32)).to(processor.device)
+            for name, ids in classes.items()}
+
+
+def timeit(func, repeat: int, device: str) -> float:
+    """平均耗时(毫秒), 包含设备同步"""
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+        if device.startswith('cuda'):
+            torch.cuda.synchronize()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    rng = np.random.default_rng(0)
+    # CARLA 0.9.x有23个语义类别
+    semantic_image = rng.integers(0, 23, (args.height, args.width), dtype=np.uint8)
+
+    print(f"{args.width}x{args.height} -> {args.img_size[0]}x{args.img_size[1]}, "
+          f"device {args.device}")
+    print(f"{'channels':>9}{'legacy ms':>11}"
+          + ''.join(f"{mode + ' ms':>12}" for mode in SEMANTIC_OUTPUTS) + f"{'host ms':>10}")
+    failed = False
+    for channels in args.channels:
+        classes = {f'class_{i}': [i] for i in range(channels)}
+        config = {'img_size': tuple(args.img_size), 'device': args.device,
+                  'semantic_classes': classes}
+        processors = {mode: SensorProcessor({**config, 'semantic_output': mode})
+                      for mode in SEMANTIC_OUTPUTS}
+
+        legacy = legacy_masks(processors['masks'], semantic_image, classes)
+        reference = torch.stack(list(legacy.values()))
+        legacy_ms = timeit(lambda: legacy_masks(processors['masks'], semantic_image, classes),
+                           args.repeat, args.device)
+        row = f"{channels:>9}{legacy_ms:>11.3f}"
+        for mode, processor in processors.items():
+            if not torch.equal(processor.semantic_masks(semantic_image), reference):
+                print(f"{mode}: 与逐类别比较的结果不一致")
+                failed = True
+            elapsed = timeit(lambda: processor.semantic_masks(semantic_image),
+                             args.repeat, args.device)
+            row += f"{elapsed:>12.3f}"
+
+        index = processors['one_hot']._semantic_index
+        host = timeit(lambda: np.take(index, cv2.resize(semantic_image, tuple(args.img_size),
+                                                        interpolation=cv2.INTER_NEAREST),
+                                      mode='clip'), args.repeat, 'cpu')
+        print(row + f"{host:>10.3f}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
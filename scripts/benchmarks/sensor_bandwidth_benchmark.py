@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""传感器带宽基准: 不同传感器套件下每个传感器每个仿真帧传输的字节数和steps/s
+
+在FakeCarla上比较默认套件(configs中的sensor_suite.yaml)、按网络输入尺寸渲染
+(render_at_target), 以及--suite指定的套件文件。
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+import carla  # noqa: E402
+from src.environments.carla_env import CarlaEnv  # noqa: E402
+from src.environments.sensors.manager import estimate_bandwidth  # noqa: E402
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="传感器带宽基准")
+    parser.add_argument("--steps", type=int, default=100, help="每个配置的步数")
+    parser.add_argument("--img-size", type=int, nargs=2, default=[84, 84], help="网络输入宽高")
+    parser.add_argument("--suite", type=str, default=None, help="额外比较的传感器套件文件")
+    parser.add_argument("--device", type=str, default="cpu", help="传感器处理设备")
+    return parser.parse_args()
+
+
+def run(args, port: int, sensors: dict):
+    """返回(steps/s, 带宽报告, 带宽估算)"""
+    config = {'port': port, 'sync_mode': True, 'frame_skip': 1,
+              'sensors': {'device': args.device, 'img_size': tuple(args.img_size), **sensors}}
+    env = CarlaEnv(config)
+    env.reset()
+    manager = env.sensor_manager
+    manager.reset_bandwidth()
+
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        env.step(np.array([rng.uniform(-0.2, 0.2), 0.5, 0.0], dtype=np.float32))
+    rate = args.steps / (time.perf_counter() - start)
+
+    report = manager.bandwidth_report()
+    # 估算使用实际创建的相机分辨率
+    suite = dict(manager.suite)
+    suite['cameras'] = {name: dict(camera, width=args.img_size[0], height=args.img_size[1])
+                        if manager.render_at_target or camera.get('render_at_target') else camera
+                        for name, camera in suite.get('cameras', {}).items()}
+    estimate = estimate_bandwidth(suite, env.delta_seconds)
+    env._cleanup()
+    return rate, report, estimate
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    carla.configure(seed=0)
+
+    configs = [
+        ('sensor_suite.yaml', {}),
+        ('render_at_target', {'render_at_target': True}),
+    ]
+    if args.suite:
+        configs.append((args.suite, {'suite': args.suite}))
+    for port, (label, sensors) in zip(range(2000, 2100, 2), configs):
+        rate, report, estimate = run(args, port, sensors)
+        total = sum(stats['bytes_per_tick'] for stats in report.values())
+        print(f"\n{label}: {rate:.1f} step/s, {total / 1024:.1f} KB/tick")
+        print(f"  {'sensor':<18}{'KB/frame':>10}{'KB/tick':>10}{'estimate':>10}")
+        for name, stats in report.items():
+            print(f"  {name:<18}{stats['bytes_per_frame'] / 1024:>10.1f}"
+                  f"{stats['bytes_per_tick'] / 1024:>10.1f}{estimate.get(name, 0) / 1024:>10.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""传感器队列压力测试: 消费方慢于传感器时各队列的内存峰值、丢弃数量和观测延迟
+
+回调线程按 --producer-hz 产生相机帧(每帧新分配的BGRA缓冲区, 与CARLA一致),
+消费方按 --consumer-hz 调用get_sensor_data。比较旧的无界queue.Queue(每次取一帧)
+与有界环形队列的三种溢出策略。有界队列的内存峰值超过 容量+3 帧(回调线程新旧各一帧, 消费方一帧)时返回非零。
+"""
+import sys
+import argparse
+import queue
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+from src.environments.sensors.ring_queue import OVERFLOW_POLICIES, RingQueue  # noqa: E402
+from src.environments.sensors.sensor_manager import SensorManager  # noqa: E402
+
+
+class _Image:
+    """最小的相机数据, 与carla.Image的字段一致"""
+    __slots__ = ('raw_data', 'width', 'height', 'frame')
+
+    def __init__(self, raw_data, width: int, height: int, frame: int):
+        self.raw_data = raw_data
+        self.width = width
+        self.height = height
+        self.frame = frame
+
+
+class _LegacyQueue(queue.Queue):
+    """旧实现: 无界队列, 每次get_sensor_data取出一帧"""
+    consumed_frame = -1
+
+    def put(self, frame, item):
+        super().put((frame, item))
+
+    def get_latest(self, frame=None, timeout=0.0):
+        if self.empty():
+            return None
+        entry = self.get()
+        self.consumed_frame = entry[0]
+        return entry
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="传感器队列压力测试")
+    parser.add_argument("--duration", type=float, default=2.0, help="每种队列的测试时长(秒)")
+    parser.add_argument("--producer-hz", type=float, default=200.0, help="回调频率")
+    parser.add_argument("--consumer-hz", type=float, default=20.0, help="消费频率")
+    parser.add_argument("--width", type=int, default=400, help="图像宽度")
+    parser.add_argument("--height", type=int, default=300, help="图像高度")
+    parser.add_argument("--queue-size", type=int, default=4, help="有界队列容量")
+    return parser.parse_args()
+
+
+def stress(args, manager: SensorManager, sensor_queue) -> dict:
+    """回调线程写入、主线程慢速消费, 返回内存峰值和消费到的帧的延迟"""
+    manager.sensor_queues = {'rgb_front': sensor_queue}
+    frame_bytes = args.width * args.height * 4
+    stop = threading.Event()
+    produced = [0]
+
+    def produce():
+        period = 1.0 / args.producer_hz
+        while not stop.is_set():
+            image = _Image(bytearray(frame_bytes), args.width, args.height, produced[0])
+            manager._camera_callback(image, sensor_queue)
+            produced[0] += 1
+            time.sleep(period)
+
+    tracemalloc.start()
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    ages = []
+    end = time.perf_counter() + args.duration
+    while time.perf_counter() < end:
+        time.sleep(1.0 / args.consumer_hz)
+        newest = produced[0] - 1
+        data = manager.get_sensor_data()
+        if 'rgb_front' in data:
+            # 消费到的帧比最新产生的帧旧多少帧
+            ages.append(newest - sensor_queue.consumed_frame)
+    stop.set()
+    # block策略下回调可能正在等待空位
+    manager.get_sensor_data()
+    producer.join()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    result = {'produced': produced[0], 'peak_mb': peak / 2**20, 'peak_frames': peak / frame_bytes,
+              'final_age': ages[-1] if ages else 0, 'max_age': max(ages, default=0)}
+    if isinstance(sensor_queue, RingQueue):
+        result.update(sensor_queue.stats())
+    return result
+
+
+def check_get_latest() -> bool:
+    """get_latest(frame)跳过更旧的帧, 更新的帧留在队列中"""
+    ring = RingQueue(capacity=16)
+    for frame in range(10):
+        ring.put(frame, frame)
+    entry = ring.get_latest(frame=5)
+    remaining = [ring.get()[0] for _ in range(len(ring))]
+    return entry == (5, 5) and remaining == [6, 7, 8, 9] and ring.skipped == 5
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    print(f"{args.width}x{args.height} frames, producer {args.producer_hz:.0f} Hz, "
+          f"consumer {args.consumer_hz:.0f} Hz, {args.duration:.1f}s")
+    print(f"{'queue':<14}{'produced':>9}{'peak MB':>9}{'peak frames':>12}{'dropped':>8}"
+          f"{'skipped':>8}{'lag':>5}{'final age':>10}{'max age':>8}")
+
+    failed = False
+    manager = SensorManager({'queue_size': args.queue_size})
+    legacy = stress(args, manager, _LegacyQueue())
+    print(f"{'unbounded':<14}{legacy['produced']:>9}{legacy['peak_mb']:>9.1f}"
+          f"{legacy['peak_frames']:>12.1f}{'-':>8}{'-':>8}{'-':>5}"
+          f"{legacy['final_age']:>10}{legacy['max_age']:>8}")
+    for policy in OVERFLOW_POLICIES:
+        manager = SensorManager({'queue_size': args.queue_size, 'queue_policy': policy})
+        result = stress(args, manager, manager._make_queue())
+        print(f"{policy:<14}{result['produced']:>9}{result['peak_mb']:>9.1f}"
+              f"{result['peak_frames']:>12.1f}{result['dropped']:>8}{result['skipped']:>8}"
+              f"{result['lag']:>5}{result['final_age']:>10}{result['max_age']:>8}")
+        # 队列容量 + 回调线程持有的新旧两帧 + 消费方持有的一帧, 另留64KB给对象开销
+        bound = (args.queue_size + 3) * args.width * args.height * 4 + 2**16
+        if result['peak_mb'] * 2**20 > bound:
+            print(f"{policy}: 内存峰值 {result['peak_frames']:.1f} 帧, 超过 {args.queue_size + 3} 帧")
+            failed = True
+
+    if not check_get_latest():
+        print("get_latest(frame) 结果错误")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+"""传感器更新频率基准: 低频传感器保持上次值时每步的处理次数和steps/s
+
+在FakeCarla上比较所有传感器每帧更新、服务器端sensor_tick降频以及客户端抽帧降频,
+并检查没有更新的传感器在观测中返回的是缓存的处理结果。
+"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+import carla  # noqa: E402
+from src.environments.carla_env import CarlaEnv  # noqa: E402
+
+SENSORS = ['rgb_front', 'depth_front', 'semantic_front', 'lidar', 'gnss', 'imu']
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="传感器更新频率基准")
+    parser.add_argument("--steps", type=int, default=100, help="每个配置的步数")
+    parser.add_argument("--semantic-rate", type=float, default=5.0, help="语义和深度相机频率(Hz)")
+    parser.add_argument("--gnss-rate", type=float, default=1.0, help="GNSS频率(Hz)")
+    parser.add_argument("--device", type=str, default="cpu", help="传感器处理设备")
+    return parser.parse_args()
+
+
+def run(args, port: int, sensors: dict):
+    """返回(steps/s, 收到的帧数, 数据更新次数, 处理次数, 保持上次值是否正确)"""
+    config = {'port': port, 'sync_mode': True, 'frame_skip': 1,
+              'sensors': {'device': args.device, **sensors}}
+    env = CarlaEnv(config)
+    env.reset()
+    manager = env.sensor_manager
+    manager.reset_bandwidth()
+
+    updates = dict.fromkeys(SENSORS, 0)
+    processed = dict.fromkeys(SENSORS, 0)
+    data_frames = dict(manager.data_frames)
+    processed_frames = {name: frame for name, (frame, _) in manager._processed.items()}
+    previous = {}
+    held_ok = True
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        obs, _, _, _ = env.step(np.array([rng.uniform(-0.2, 0.2), 0.5, 0.0], dtype=np.float32))
+        for name in SENSORS:
+            if manager.data_frames.get(name) != data_frames.get(name):
+                updates[name] += 1
+            data_frames[name] = manager.data_frames.get(name)
+            if name not in manager._processed:
+                continue
+            if manager._processed[name][0] != processed_frames.get(name):
+                processed[name] += 1
+            elif name in previous and obs[name] is not previous[name]:
+                held_ok = False  # 没有更新却重新处理了
+            processed_frames[name] = manager._processed[name][0]
+            previous[name] = obs[name]
+    rate = args.steps / (time.perf_counter() - start)
+
+    received = dict(manager.frames_received)
+    env._cleanup()
+    return rate, received, updates, processed, held_ok
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    carla.configure(seed=0)
+
+    rates = {'semantic_front': args.semantic_rate, 'depth_front': args.semantic_rate,
+             'gnss': args.gnss_rate}
+    configs = [
+        ('every frame', {}),
+        ('sensor_tick', {'sensor_rates': rates}),
+        ('client decimation', {'sensor_rates': rates, 'client_decimation': True}),
+    ]
+    print(f"{args.steps} steps, semantic/depth {args.semantic_rate} Hz, gnss {args.gnss_rate} Hz")
+    failed = False
+    for port, (label, sensors) in zip(range(2000, 2100, 2), configs):
+        rate, received, updates, processed, held_ok = run(args, port, sensors)
+        print(f"\n{label}: {rate:.1f} step/s, hold last value {'ok' if held_ok else 'FAILED'}")
+        print(f"  {'sensor':<18}{'received':>10}{'updates':>10}{'processed':>11}")
+        for name in SENSORS:
+            # 只统计相机和激光雷达的传输帧数和处理次数, GNSS/IMU原样传递
+            raw = name not in ('gnss', 'imu')
+            print(f"  {name:<18}{received.get(name, 0) if raw else '-':>10}{updates[name]:>10}"
+                  f"{processed[name] if raw else '-':>11}")
+        failed |= not held_ok
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
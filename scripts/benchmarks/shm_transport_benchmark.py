@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""观测传输基准: 共享内存 vs pickle管道"""
+import sys
+import argparse
+import time
+from functools import partial
+
+import numpy as np
+
+from src.environments.stub_env import StubEnv
+from src.environments.vec_env import VecCarlaEnv
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="共享内存观测传输基准")
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[1, 4, 8], help="并行环境数量")
+    parser.add_argument("--steps", type=int, default=200, help="每个配置的批量步数")
+    parser.add_argument("--camera-shape", type=int, nargs=3, default=[3, 600, 800], help="相机观测形状")
+    parser.add_argument("--lidar-shape", type=int, nargs=3, default=[32, 1000, 4], help="激光雷达观测形状")
+    parser.add_argument("--start-method", type=str, default=None, help="多进程启动方式")
+    return parser.parse_args()
+
+
+def bench(config: dict, num_envs: int, steps: int, start_method: str,
+          shared_memory: bool) -> float:
+    """返回批量steps/s"""
+    env_fns = [partial(StubEnv, dict(config, seed=i)) for i in range(num_envs)]
+    env = VecCarlaEnv(env_fns, start_method, shared_memory=shared_memory)
+    env.reset()
+    actions = np.zeros((num_envs, 3), dtype=np.float32)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        obs, _, _, _ = env.step(actions)
+    elapsed = time.perf_counter() - start
+
+    env.close()
+    return steps / elapsed
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    config = {
+        'episode_length': 1000,
+        'camera_shape': tuple(args.camera_shape),
+        'camera_dtype': np.uint8,  # 原始分辨率的相机帧
+        'lidar_shape': tuple(args.lidar_shape)
+    }
+    obs_bytes = np.prod(args.camera_shape) + np.prod(args.lidar_shape) * 4 + 10 * 4
+    print(f"observation size: {obs_bytes / 1024 ** 2:.2f} MB per env")
+
+    print(f"{'envs':>6}{'pickle step/s':>16}{'shm step/s':>14}{'speedup':>10}")
+    for num_envs in args.num_envs:
+        pickle_rate = bench(config, num_envs, args.steps, args.start_method, False)
+        shm_rate = bench(config, num_envs, args.steps, args.start_method, True)
+        print(f"{num_envs:>6}{pickle_rate:>16.1f}{shm_rate:>14.1f}{shm_rate / pickle_rate:>10.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+"""分阶段耗时基准: 计时开销(开启/关闭)以及FakeCarla上RLEnv各阶段的p50/p95/p99"""
+import sys
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'fake_carla'))
+
+import carla  # noqa: E402
+from src.environments.rl_env import RLEnv  # noqa: E402
+from src.training.monitor import TrainingMonitor  # noqa: E402
+from src.utils.timing import StageTimer, stage_timer  # noqa: E402
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="分阶段耗时基准")
+    parser.add_argument("--iters", type=int, default=200000, help="计时开销测量的迭代次数")
+    parser.add_argument("--steps", type=int, default=300, help="RLEnv步数, 为0时跳过")
+    parser.add_argument("--device", type=str, default="cpu", help="传感器处理设备")
+    parser.add_argument("--reward-config", type=str,
+                        default="configs/env_configs/rewards/reward_config.yaml", help="奖励配置文件")
+    parser.add_argument("--export", type=str, default=None, help="导出路径(.json或.csv)")
+    return parser.parse_args()
+
+
+def span_overhead(iters: int, enabled: bool) -> float:
+    """每个空span的耗时(纳秒), 已扣除空循环"""
+    timer = StageTimer(enabled=enabled)
+    start = time.perf_counter_ns()
+    for _ in range(iters):
+        pass
+    loop_ns = time.perf_counter_ns() - start
+
+    start = time.perf_counter_ns()
+    for _ in range(iters):
+        with timer.span('bench'):
+            pass
+    return (time.perf_counter_ns() - start - loop_ns) / iters
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+
+    print(f"{'timer':<12}{'ns/span':>10}")
+    for enabled in (False, True):
+        label = 'enabled' if enabled else 'disabled'
+        print(f"{label:<12}{span_overhead(args.iters, enabled):>10.1f}")
+
+    if args.steps <= 0:
+        return 0
+
+    carla.configure(seed=0)
+    config = {'port': 2000, 'sync_mode': True, 'sensors': {'device': args.device},
+              'reward': args.reward_config, 'frame_skip': 1, 'time_limit': 10 ** 9,
+              'stage_timing': True}
+    env = RLEnv(config)
+    env.reset()
+    stage_timer.reset()  # 只统计稳态步进
+    rng = np.random.default_rng(0)
+    for _ in range(args.steps):
+        action = np.array([rng.uniform(-0.2, 0.2), rng.uniform(0.3, 1.0), 0.0], dtype=np.float32)
+        env.step(action)
+    env.env._cleanup()
+
+    print()
+    print(stage_timer.report())
+
+    monitor = TrainingMonitor({})
+    monitor.ingest_stage_timings()
+    if args.export:
+        monitor.export_stage_latency(args.export)
+        print(f"\n已导出到 {args.export}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
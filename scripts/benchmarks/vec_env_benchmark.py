@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""向量化环境吞吐量基准"""
+import sys
+import argparse
+import time
+from functools import partial
+
+import numpy as np
+
+from src.environments.stub_env import StubEnv
+from src.environments.vec_env import VecCarlaEnv
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="VecCarlaEnv吞吐量基准")
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[1, 2, 4, 8], help="并行环境数量")
+    parser.add_argument("--steps", type=int, default=200, help="每个配置的批量步数")
+    parser.add_argument("--step-delay", type=float, default=0.01, help="模拟的服务器往返耗时(秒)")
+    parser.add_argument("--start-method", type=str, default=None, help="多进程启动方式")
+    return parser.parse_args()
+
+
+def bench_serial(config: dict, steps: int) -> float:
+    """单环境串行步进, 返回steps/s"""
+    env = StubEnv(config)
+    env.reset()
+    action = np.zeros(3, dtype=np.float32)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        _, _, done, _ = env.step(action)
+        if done:
+            env.reset()
+    elapsed = time.perf_counter() - start
+
+    env.close()
+    return steps / elapsed
+
+
+def bench_vec(config: dict, num_envs: int, steps: int, start_method: str) -> float:
+    """向量化环境步进, 返回总steps/s"""
+    env_fns = [partial(StubEnv, dict(config, seed=i)) for i in range(num_envs)]
+    env = VecCarlaEnv(env_fns, start_method)
+    env.reset()
+    actions = np.zeros((num_envs, 3), dtype=np.float32)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.step(actions)
+    elapsed = time.perf_counter() - start
+
+    env.close()
+    return steps * num_envs / elapsed
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    config = {'step_delay': args.step_delay, 'episode_length': 100}
+
+    serial = bench_serial(config, args.steps)
+    print(f"{'mode':<12}{'envs':>6}{'steps/s':>12}{'speedup':>10}")
+    print(f"{'serial':<12}{1:>6}{serial:>12.1f}{1.0:>10.2f}")
+
+    for num_envs in args.num_envs:
+        throughput = bench_vec(config, num_envs, args.steps, args.start_method)
+        print(f"{'vec':<12}{num_envs:>6}{throughput:>12.1f}{throughput / serial:>10.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""FakeCarla: 进程内的carla模块替身, 用于无服务器的确定性离线基准
+
+实现本平台用到的carla接口子集: Client、World、Map/Waypoint、参与者和蓝图库、
+带listen回调的传感器、command批量命令(apply_batch_sync)以及记录/回放。
+车辆使用自行车运动学模型, 相机和激光雷达按真实分辨率和字节布局生成合成数据。
+
+使用方式: 把本目录(scripts/fake_carla)放到sys.path最前面, 之后的 import carla
+即得到本模块, 例如
+
+    PYTHONPATH=scripts/fake_carla:. python scripts/evaluate.py ...
+
+scripts/benchmarks/fake_carla_benchmark.py 会自行插入该路径。
+
+同一进程内相同host:port的Client共享一个模拟服务器, 不同端口互相独立;
+随机数只由seed和世界编号决定, 相同操作序列产生相同数据。
+"""
+from . import command
+from .actors import (Actor, ActorAttribute, ActorBlueprint, ActorList, ActorSnapshot,
+                     BlueprintLibrary, Sensor, Vehicle, VehicleControl, VehiclePhysicsControl,
+                     Walker, WalkerAIController, WalkerControl, WorldSnapshot)
+from .geometry import BoundingBox, GeoLocation, Location, Rotation, Timestamp, Transform, Vector3D
+from .road import (LaneChange, LaneMarking, LaneMarkingColor, LaneMarkingType, LaneType, Map,
+                   Waypoint)
+from .sensors import (CollisionEvent, GnssMeasurement, Image, IMUMeasurement, LaneInvasionEvent,
+                      LidarMeasurement, SensorData)
+from .world import (SETTINGS, Client, DebugHelper, TrafficManager, WeatherParameters, World,
+                    WorldSettings)
+
+IS_FAKE = True
+
+
+def configure(seed: int = None, tick_latency: float = None, async_sensors: bool = None,
+              default_delta_seconds: float = None):
+    """设置模拟服务器参数
+
+    seed: 随机种子; tick_latency: 每次tick额外休眠的秒数, 模拟服务器渲染耗时;
+    async_sensors: 传感器回调是否在后台线程执行; default_delta_seconds: 未设置
+    fixed_delta_seconds时的仿真步长。只影响之后创建的世界和之后的tick。
+    """
+    for key, value in (('seed', seed), ('tick_latency', tick_latency),
+                       ('async_sensors', async_sensors),
+                       ('default_delta_seconds', default_delta_seconds)):
+        if value is not None:
+            SETTINGS[key] = value
+
+
+__all__ = [
+    'command', 'configure', 'IS_FAKE',
+    'Actor', 'ActorAttribute', 'ActorBlueprint', 'ActorList', 'ActorSnapshot', 'BlueprintLibrary',
+    'Sensor', 'Vehicle', 'VehicleControl', 'VehiclePhysicsControl', 'Walker', 'WalkerAIController',
+    'WalkerControl', 'WorldSnapshot',
+    'BoundingBox', 'GeoLocation', 'Location', 'Rotation', 'Timestamp', 'Transform', 'Vector3D',
+    'LaneChange', 'LaneMarking', 'LaneMarkingColor', 'LaneMarkingType', 'LaneType', 'Map',
+    'Waypoint',
+    'CollisionEvent', 'GnssMeasurement', 'Image', 'IMUMeasurement', 'LaneInvasionEvent',
+    'LidarMeasurement', 'SensorData',
+    'Client', 'DebugHelper', 'TrafficManager', 'WeatherParameters', 'World', 'WorldSettings'
+]
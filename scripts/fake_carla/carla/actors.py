@@ -0,0 +1,573 @@
+"""蓝图、控制量和参与者(车辆、行人、传感器)"""
+import fnmatch
+import math
+from typing import Callable, Dict, List, Optional
+
+from .geometry import BoundingBox, Location, Rotation, Transform, Vector3D
+
+
+class ActorAttribute:
+    """蓝图属性, 值统一以字符串保存"""
+    def __init__(self, attr_id: str, value: str, attr_type: str = 'string',
+                 is_modifiable: bool = True, recommended_values: Optional[List[str]] = None):
+        self.id = attr_id
+        self.value = str(value)
+        self.type = attr_type
+        self.is_modifiable = is_modifiable
+        self.recommended_values = recommended_values or []
+
+    def as_bool(self) -> bool:
+        return self.value.lower() == 'true'
+
+    def as_int(self) -> int:
+        return int(float(self.value))
+
+    def as_float(self) -> float:
+        return float(self.value)
+
+    def as_str(self) -> str:
+        return self.value
+
+    def __str__(self):
+        return self.value
+
+    def __repr__(self):
+        return f"ActorAttribute(id={self.id}, type={self.type}, value={self.value})"
+
+
+class ActorBlueprint:
+    """参与者蓝图"""
+    def __init__(self, blueprint_id: str, tags: List[str], attributes: List[ActorAttribute],
+                 extent: Vector3D = None):
+        self.id = blueprint_id
+        self.tags = tags
+        self._attributes = {attr.id: attr for attr in attributes}
+        self.extent = extent if extent is not None else Vector3D(0.1, 0.1, 0.1)
+
+    def copy(self) -> 'ActorBlueprint':
+        attributes = [ActorAttribute(a.id, a.value, a.type, a.is_modifiable, a.recommended_values)
+                      for a in self._attributes.values()]
+        return ActorBlueprint(self.id, list(self.tags), attributes, self.extent)
+
+    def has_tag(self, tag: str) -> bool:
+        return tag in self.tags
+
+    def match_tags(self, wildcard_pattern: str) -> bool:
+        return any(fnmatch.fnmatch(tag, wildcard_pattern) for tag in self.tags)
+
+    def has_attribute(self, attr_id: str) -> bool:
+        return attr_id in self._attributes
+
+    def get_attribute(self, attr_id: str) -> ActorAttribute:
+        if attr_id not in self._attributes:
+            raise IndexError(f"blueprint '{self.id}' does not have attribute '{attr_id}'")
+        return self._attributes[attr_id]
+
+    def set_attribute(self, attr_id: str, value: str):
+        attribute = self.get_attribute(attr_id)
+        if not attribute.is_modifiable:
+            raise IndexError(f"attribute '{attr_id}' of blueprint '{self.id}' is not modifiable")
+        attribute.value = str(value)
+
+    def __iter__(self):
+        return iter(self._attributes.values())
+
+    def __len__(self):
+        return len(self._attributes)
+
+    def __repr__(self):
+        return f"ActorBlueprint(id={self.id}, tags={self.tags})"
+
+
+class BlueprintLibrary:
+    """蓝图库, find返回副本, 修改属性不影响库中蓝图"""
+    def __init__(self, blueprints: List[ActorBlueprint]):
+        self._blueprints = list(blueprints)
+
+    def find(self, blueprint_id: str) -> ActorBlueprint:
+        for blueprint in self._blueprints:
+            if blueprint.id == blueprint_id:
+                return blueprint.copy()
+        raise IndexError(f"blueprint '{blueprint_id}' not found")
+
+    def filter(self, wildcard_pattern: str) -> 'BlueprintLibrary':
+        return BlueprintLibrary([
+            blueprint for blueprint in self._blueprints
+            if fnmatch.fnmatch(blueprint.id, wildcard_pattern)
+            or blueprint.match_tags(wildcard_pattern)
+        ])
+
+    def __getitem__(self, index):
+        return self._blueprints[index].copy()
+
+    def __iter__(self):
+        return (blueprint.copy() for blueprint in self._blueprints)
+
+    def __len__(self):
+        return len(self._blueprints)
+
+
+def _attrs(**values) -> List[ActorAttribute]:
+    return [ActorAttribute(key, value) for key, value in values.items()]
+
+
+_SENSOR_TICK = {'sensor_tick': '0.0'}
+_CAMERA_ATTRIBUTES = dict(_SENSOR_TICK, image_size_x='800', image_size_y='600', fov='90',
+                          lens_circle_falloff='5.0', lens_circle_multiplier='0.0',
+                          lens_k='-1.0', lens_kcube='0.0', lens_x_size='0.08', lens_y_size='0.08')
+_NOISE_KEYS = ('noise_alt_bias', 'noise_lat_bias', 'noise_lon_bias',
+               'noise_alt_stddev', 'noise_lat_stddev', 'noise_lon_stddev', 'noise_seed')
+_IMU_KEYS = tuple(f'noise_{kind}_{axis}' for kind in ('accel_stddev', 'gyro_stddev', 'gyro_bias')
+                  for axis in 'xyz') + ('noise_seed',)
+
+
+def default_blueprints() -> List[ActorBlueprint]:
+    """蓝图目录: 常用车辆、行人、行人AI控制器和传感器"""
+    vehicles = [
+        ('vehicle.tesla.model3', 4, Vector3D(2.40, 1.08, 0.75)),
+        ('vehicle.audi.a2', 4, Vector3D(1.85, 0.90, 0.77)),
+        ('vehicle.lincoln.mkz_2020', 4, Vector3D(2.44, 1.12, 0.76)),
+        ('vehicle.toyota.prius', 4, Vector3D(2.27, 1.01, 0.76)),
+        ('vehicle.nissan.micra', 4, Vector3D(1.83, 0.94, 0.77)),
+        ('vehicle.carlamotors.carlacola', 4, Vector3D(2.60, 1.28, 1.28)),
+        ('vehicle.bh.crossbike', 2, Vector3D(0.74, 0.43, 0.54)),
+    ]
+    blueprints = [
+        ActorBlueprint(bp_id, ['vehicle', bp_id.split('.')[1], bp_id.split('.')[2]], _attrs(
+            role_name='autopilot', color='255,255,255', number_of_wheels=str(wheels),
+            sticky_control='true', generation='2', base_type='car' if wheels == 4 else 'bicycle'
+        ), extent)
+        for bp_id, wheels, extent in vehicles
+    ]
+    blueprints += [
+        ActorBlueprint(f'walker.pedestrian.{i:04d}', ['walker', 'pedestrian'], _attrs(
+            role_name='pedestrian', is_invincible='true', speed='1.4', age='adult', gender='male'
+        ), Vector3D(0.19, 0.19, 0.93))
+        for i in range(1, 5)
+    ]
+    blueprints.append(ActorBlueprint('controller.ai.walker', ['controller', 'ai', 'walker'],
+                                     _attrs(role_name='')))
+    for camera in ('rgb', 'depth', 'semantic_segmentation'):
+        blueprints.append(ActorBlueprint(f'sensor.camera.{camera}', ['sensor', 'camera', camera],
+                                         _attrs(role_name='front', **_CAMERA_ATTRIBUTES)))
+    lidar_attributes = _attrs(
+        role_name='front', channels='32', range='10.0', points_per_second='56000',
+        rotation_frequency='10.0', upper_fov='10.0', lower_fov='-30.0', horizontal_fov='360.0',
+        atmosphere_attenuation_rate='0.004', dropoff_general_rate='0.45',
+        dropoff_intensity_limit='0.8', dropoff_zero_intensity='0.4', noise_stddev='0.0',
+        **_SENSOR_TICK
+    )
+    blueprints.append(ActorBlueprint('sensor.lidar.ray_cast', ['sensor', 'lidar', 'ray_cast'],
+                                     lidar_attributes))
+    blueprints.append(ActorBlueprint('sensor.other.gnss', ['sensor', 'other', 'gnss'], _attrs(
+        role_name='front', **_SENSOR_TICK, **{key: '0.0' for key in _NOISE_KEYS})))
+    blueprints.append(ActorBlueprint('sensor.other.imu', ['sensor', 'other', 'imu'], _attrs(
+        role_name='front', **_SENSOR_TICK, **{key: '0.0' for key in _IMU_KEYS})))
+    blueprints.append(ActorBlueprint('sensor.other.collision', ['sensor', 'other', 'collision'],
+                                     _attrs(role_name='front')))
+    blueprints.append(ActorBlueprint('sensor.other.lane_invasion',
+                                     ['sensor', 'other', 'lane_invasion'],
+                                     _attrs(role_name='front')))
+    return blueprints
+
+
+class VehicleControl:
+    """车辆控制量"""
+    def __init__(self, throttle: float = 0.0, steer: float = 0.0, brake: float = 0.0,
+                 hand_brake: bool = False, reverse: bool = False,
+                 manual_gear_shift: bool = False, gear: int = 0):
+        self.throttle = float(throttle)
+        self.steer = float(steer)
+        self.brake = float(brake)
+        self.hand_brake = bool(hand_brake)
+        self.reverse = bool(reverse)
+        self.manual_gear_shift = bool(manual_gear_shift)
+        self.gear = int(gear)
+
+    def __eq__(self, other):
+        return isinstance(other, VehicleControl) and vars(self) == vars(other)
+
+    def __repr__(self):
+        return (f"VehicleControl(throttle={self.throttle:.6f}, steer={self.steer:.6f}, "
+                f"brake={self.brake:.6f}, hand_brake={self.hand_brake}, reverse={self.reverse})")
+
+
+class WalkerControl:
+    """行人控制量"""
+    def __init__(self, direction: Vector3D = None, speed: float = 0.0, jump: bool = False):
+        self.direction = direction if direction is not None else Vector3D(1.0, 0.0, 0.0)
+        self.speed = float(speed)
+        self.jump = bool(jump)
+
+
+class VehiclePhysicsControl:
+    """车辆物理参数, 运动学模型只使用质量、阻力系数和最大转向角"""
+    def __init__(self, mass: float = 1845.0, max_rpm: float = 15000.0, moi: float = 1.0,
+                 drag_coefficient: float = 0.15, max_steer_angle: float = 70.0, wheels=None):
+        self.mass = mass
+        self.max_rpm = max_rpm
+        self.moi = moi
+        self.drag_coefficient = drag_coefficient
+        self.max_steer_angle = max_steer_angle
+        self.damping_rate_full_throttle = 0.15
+        self.damping_rate_zero_throttle_clutch_engaged = 2.0
+        self.damping_rate_zero_throttle_clutch_disengaged = 0.35
+        self.use_gear_autobox = True
+        self.gear_switch_time = 0.5
+        self.clutch_strength = 10.0
+        self.final_ratio = 4.0
+        self.center_of_mass = Vector3D()
+        self.steering_curve = [Vector3D(0.0, 1.0), Vector3D(120.0, 0.3)]
+        self.torque_curve = [Vector3D(0.0, 400.0), Vector3D(15000.0, 400.0)]
+        self.forward_gears = []
+        self.wheels = wheels or []
+        self.use_sweep_wheel_collision = False
+
+
+class Actor:
+    """参与者基类, 运动状态保存在客户端进程内"""
+    def __init__(self, world, actor_id: int, blueprint: ActorBlueprint, transform: Transform,
+                 parent: 'Actor' = None):
+        self._world = world
+        self.id = actor_id
+        self.type_id = blueprint.id
+        self.attributes = {attr.id: attr.value for attr in blueprint}
+        self.semantic_tags = []
+        self.parent = parent
+        self.is_alive = True
+        self.bounding_box = BoundingBox(Location(0.0, 0.0, blueprint.extent.z), blueprint.extent)
+
+        # 挂载在父对象上时transform为相对变换
+        self._transform = Transform(transform.location, transform.rotation)
+        self._velocity = Vector3D()
+        self._angular_velocity = Vector3D()
+        self._acceleration = Vector3D()
+        self._simulate_physics = True
+
+    def __repr__(self):
+        return f"Actor(id={self.id}, type={self.type_id})"
+
+    def __eq__(self, other):
+        return isinstance(other, Actor) and self.id == other.id
+
+    def __hash__(self):
+        return self.id
+
+    def get_world(self):
+        return self._world
+
+    def get_transform(self) -> Transform:
+        if self.parent is not None:
+            parent = self.parent.get_transform()
+            rotation = Rotation(parent.rotation.pitch + self._transform.rotation.pitch,
+                                parent.rotation.yaw + self._transform.rotation.yaw,
+                                parent.rotation.roll + self._transform.rotation.roll)
+            return Transform(parent.transform(self._transform.location), rotation)
+        return Transform(self._transform.location, self._transform.rotation)
+
+    def get_location(self) -> Location:
+        return self.get_transform().location
+
+    def get_velocity(self) -> Vector3D:
+        if self.parent is not None:
+            return self.parent.get_velocity()
+        return Vector3D(self._velocity.x, self._velocity.y, self._velocity.z)
+
+    def get_angular_velocity(self) -> Vector3D:
+        if self.parent is not None:
+            return self.parent.get_angular_velocity()
+        angular_velocity = self._angular_velocity
+        return Vector3D(angular_velocity.x, angular_velocity.y, angular_velocity.z)
+
+    def get_acceleration(self) -> Vector3D:
+        if self.parent is not None:
+            return self.parent.get_acceleration()
+        return Vector3D(self._acceleration.x, self._acceleration.y, self._acceleration.z)
+
+    def set_transform(self, transform: Transform):
+        self._transform = Transform(transform.location, transform.rotation)
+
+    def set_location(self, location: Location):
+        self._transform.location = Location(location.x, location.y, location.z)
+
+    def set_target_velocity(self, velocity: Vector3D):
+        self._velocity = Vector3D(velocity.x, velocity.y, velocity.z)
+
+    def set_target_angular_velocity(self, angular_velocity: Vector3D):
+        self._angular_velocity = Vector3D(angular_velocity.x, angular_velocity.y,
+                                          angular_velocity.z)
+
+    def set_simulate_physics(self, enabled: bool = True):
+        self._simulate_physics = enabled
+
+    def set_enable_gravity(self, enabled: bool = True):
+        pass
+
+    def add_impulse(self, impulse: Vector3D):
+        pass
+
+    def destroy(self) -> bool:
+        return self._world._destroy_actor(self)
+
+    def _step(self, dt: float):
+        """推进一个物理步"""
+        pass
+
+
+class Vehicle(Actor):
+    """车辆: 自行车运动学模型"""
+    ROLLING_RESISTANCE = 0.015
+    AIR_DENSITY = 1.2
+    FRONTAL_AREA = 2.2
+    MAX_BRAKE_DECEL = 8.0
+    MAX_STEER = 35.0  # 轮胎最大转角(度)
+
+    def __init__(self, world, actor_id, blueprint, transform, parent=None):
+        super().__init__(world, actor_id, blueprint, transform, parent)
+        self._control = VehicleControl()
+        self._physics = VehiclePhysicsControl()
+        self._autopilot = False
+        self._tm_port = 8000
+        self.wheelbase = max(blueprint.extent.x * 1.2, 1.0)
+        self.distance_traveled = 0.0
+
+    def apply_control(self, control: VehicleControl):
+        self._control = VehicleControl(control.throttle, control.steer, control.brake,
+                                       control.hand_brake, control.reverse,
+                                       control.manual_gear_shift, control.gear)
+
+    def get_control(self) -> VehicleControl:
+        control = self._control
+        return VehicleControl(control.throttle, control.steer, control.brake, control.hand_brake,
+                              control.reverse, control.manual_gear_shift, control.gear)
+
+    def get_physics_control(self) -> VehiclePhysicsControl:
+        return self._physics
+
+    def apply_physics_control(self, physics_control: VehiclePhysicsControl):
+        self._physics = physics_control
+
+    def set_autopilot(self, enabled: bool = True, tm_port: int = 8000):
+        self._autopilot = enabled
+        self._tm_port = tm_port
+
+    def get_speed_limit(self) -> float:
+        return 30.0
+
+    def is_at_traffic_light(self) -> bool:
+        return False
+
+    def get_traffic_light(self):
+        return None
+
+    def get_traffic_light_state(self):
+        return None
+
+    def _speed(self) -> float:
+        """沿车头方向的有符号速度"""
+        return self._velocity.dot(self._transform.rotation.get_forward_vector())
+
+    def _autopilot_control(self) -> VehicleControl:
+        """交通管理器: 沿当前车道以限速行驶"""
+        speed = self._speed()
+        target_speed = self._world._traffic_manager_speed(self) / 3.6
+        waypoint = self._world.get_map().get_waypoint(self._transform.location)
+        target = waypoint.next(max(5.0, speed))[0].transform.location
+        dx = target.x - self._transform.location.x
+        dy = target.y - self._transform.location.y
+        bearing = math.degrees(math.atan2(dy, dx))
+        heading_error = (bearing - self._transform.rotation.yaw + 180.0) % 360.0 - 180.0
+        steer = max(-1.0, min(1.0, heading_error / self.MAX_STEER))
+        throttle = max(0.0, min(1.0, 0.5 * (target_speed - speed)))
+        brake = max(0.0, min(1.0, 0.3 * (speed - target_speed - 1.0)))
+        return VehicleControl(throttle=throttle, steer=steer, brake=brake)
+
+    def _step(self, dt: float):
+        if not self._simulate_physics or self.parent is not None:
+            return
+        control = self._autopilot_control() if self._autopilot else self._control
+        mass = self._physics.mass
+        speed = self._speed()
+
+        # 纵向: 驱动 - 制动 - 滚阻 - 风阻
+        drive = control.throttle * 3.5 * 1500.0 / mass * (-1.0 if control.reverse else 1.0)
+        resist = (self.ROLLING_RESISTANCE * 9.81
+                  + 0.5 * self.AIR_DENSITY * self._physics.drag_coefficient
+                  * self.FRONTAL_AREA * speed * speed / mass)
+        brake = max(control.brake, 1.0 if control.hand_brake else 0.0) * self.MAX_BRAKE_DECEL
+        new_speed = speed + drive * dt
+        if new_speed != 0.0:
+            # 阻力和制动只能减速到静止, 不会反向
+            decel = (resist + brake) * dt
+            new_speed = math.copysign(max(abs(new_speed) - decel, 0.0), new_speed)
+
+        # 横向: 自行车模型
+        steer_angle = math.radians(control.steer * self.MAX_STEER)
+        yaw_rate = math.degrees(new_speed / self.wheelbase * math.tan(steer_angle))
+        rotation = self._transform.rotation
+        mid_yaw = math.radians(rotation.yaw + 0.5 * yaw_rate * dt)
+        location = self._transform.location
+        location.x += new_speed * math.cos(mid_yaw) * dt
+        location.y += new_speed * math.sin(mid_yaw) * dt
+        location.z = 0.0
+        rotation.yaw = (rotation.yaw + yaw_rate * dt + 180.0) % 360.0 - 180.0
+        rotation.pitch = 0.0
+        rotation.roll = 0.0
+
+        forward = rotation.get_forward_vector()
+        right = rotation.get_right_vector()
+        longitudinal = (new_speed - speed) / dt
+        lateral = new_speed * math.radians(yaw_rate)
+        self._velocity = forward * new_speed
+        self._angular_velocity = Vector3D(0.0, 0.0, yaw_rate)
+        self._acceleration = forward * longitudinal + right * lateral
+        self.distance_traveled += abs(new_speed) * dt
+
+    def set_target_velocity(self, velocity: Vector3D):
+        super().set_target_velocity(velocity)
+        self._acceleration = Vector3D()
+
+
+class Walker(Actor):
+    """行人: 按控制方向匀速移动"""
+    def __init__(self, world, actor_id, blueprint, transform, parent=None):
+        super().__init__(world, actor_id, blueprint, transform, parent)
+        self._control = WalkerControl()
+
+    def apply_control(self, control: WalkerControl):
+        self._control = WalkerControl(control.direction, control.speed, control.jump)
+
+    def get_control(self) -> WalkerControl:
+        return WalkerControl(self._control.direction, self._control.speed, self._control.jump)
+
+    def _step(self, dt: float):
+        if not self._simulate_physics:
+            return
+        direction = self._control.direction.make_unit_vector()
+        direction.z = 0.0
+        self._velocity = direction * self._control.speed
+        location = self._transform.location
+        location.x += self._velocity.x * dt
+        location.y += self._velocity.y * dt
+        if self._control.speed > 0:
+            self._transform.rotation.yaw = math.degrees(math.atan2(direction.y, direction.x))
+
+
+class WalkerAIController(Actor):
+    """行人AI控制器, 挂载在行人上"""
+    def __init__(self, world, actor_id, blueprint, transform, parent=None):
+        super().__init__(world, actor_id, blueprint, transform, parent)
+        self._started = False
+        self._target = None
+        self._max_speed = 1.4
+
+    def start(self):
+        self._started = True
+
+    def stop(self):
+        self._started = False
+        if isinstance(self.parent, Walker):
+            self.parent.apply_control(WalkerControl(speed=0.0))
+
+    def go_to_location(self, destination: Location):
+        self._target = Location(destination.x, destination.y, destination.z)
+
+    def set_max_speed(self, speed: float = 1.4):
+        self._max_speed = speed
+
+    def _step(self, dt: float):
+        walker = self.parent
+        if not self._started or self._target is None or not isinstance(walker, Walker):
+            return
+        offset = self._target - walker.get_location()
+        offset.z = 0.0
+        if offset.length() < 0.5:
+            walker.apply_control(WalkerControl(speed=0.0))
+            self._target = None
+            return
+        walker.apply_control(WalkerControl(offset.make_unit_vector(), self._max_speed))
+
+
+class Sensor(Actor):
+    """传感器: 世界tick时按sensor_tick产生数据并回调"""
+    def __init__(self, world, actor_id, blueprint, transform, parent=None):
+        super().__init__(world, actor_id, blueprint, transform, parent)
+        self._callback = None
+        self._next_time = 0.0
+        self.sensor_tick = float(self.attributes.get('sensor_tick', 0.0) or 0.0)
+        self.model = None
+
+    @property
+    def is_listening(self) -> bool:
+        return self._callback is not None
+
+    def listen(self, callback: Callable):
+        self._callback = callback
+
+    def stop(self):
+        self._callback = None
+
+    def _due(self, elapsed_seconds: float) -> bool:
+        """本帧是否需要产生数据"""
+        if elapsed_seconds + 1e-9 < self._next_time:
+            return False
+        self._next_time = elapsed_seconds + self.sensor_tick
+        return True
+
+
+class ActorList(list):
+    """参与者列表"""
+    def filter(self, wildcard_pattern: str) -> 'ActorList':
+        return ActorList(actor for actor in self
+                         if fnmatch.fnmatch(actor.type_id, wildcard_pattern))
+
+    def find(self, actor_id: int) -> Optional[Actor]:
+        for actor in self:
+            if actor.id == actor_id:
+                return actor
+        return None
+
+
+class ActorSnapshot:
+    """tick时刻参与者的运动状态"""
+    __slots__ = ('id', '_transform', '_velocity', '_angular_velocity', '_acceleration')
+
+    def __init__(self, actor: Actor):
+        self.id = actor.id
+        self._transform = actor.get_transform()
+        self._velocity = actor.get_velocity()
+        self._angular_velocity = actor.get_angular_velocity()
+        self._acceleration = actor.get_acceleration()
+
+    def get_transform(self) -> Transform:
+        return self._transform
+
+    def get_velocity(self) -> Vector3D:
+        return self._velocity
+
+    def get_angular_velocity(self) -> Vector3D:
+        return self._angular_velocity
+
+    def get_acceleration(self) -> Vector3D:
+        return self._acceleration
+
+
+class WorldSnapshot:
+    """一帧的世界快照"""
+    def __init__(self, world_id: int, timestamp, actors: Dict[int, ActorSnapshot]):
+        self.id = world_id
+        self.timestamp = timestamp
+        self.frame = timestamp.frame
+        self._actors = actors
+
+    def find(self, actor_id: int) -> Optional[ActorSnapshot]:
+        return self._actors.get(actor_id)
+
+    def has_actor(self, actor_id: int) -> bool:
+        return actor_id in self._actors
+
+    def __iter__(self):
+        return iter(self._actors.values())
+
+    def __len__(self):
+        return len(self._actors)
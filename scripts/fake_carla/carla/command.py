@@ -0,0 +1,135 @@
+"""批量命令, 由Client.apply_batch/apply_batch_sync执行"""
+
+
+class FutureActor:
+    """批量命令中引用前一条SpawnActor生成的参与者"""
+    pass
+
+
+def _actor_id(actor):
+    if actor is FutureActor or isinstance(actor, int):
+        return actor
+    return actor.id
+
+
+class Response:
+    """批量命令执行结果"""
+    def __init__(self, actor_id: int = 0, error: str = ''):
+        self.actor_id = actor_id
+        self.error = error
+
+    def has_error(self) -> bool:
+        return bool(self.error)
+
+    def __repr__(self):
+        return f"Response(actor_id={self.actor_id}, error='{self.error}')"
+
+
+class Command:
+    """命令基类"""
+    def __init__(self):
+        self._then = []
+
+    def then(self, command: 'Command') -> 'Command':
+        """生成成功后执行的后续命令, 其中的FutureActor替换为新参与者"""
+        self._then.append(command)
+        return self
+
+    def _resolve(self, actor_id: int):
+        for name, value in list(vars(self).items()):
+            if value is FutureActor:
+                setattr(self, name, actor_id)
+
+    def execute(self, world) -> Response:
+        raise NotImplementedError
+
+
+class SpawnActor(Command):
+    def __init__(self, blueprint, transform, parent=None):
+        super().__init__()
+        self.blueprint = blueprint
+        self.transform = transform
+        self.parent_id = 0 if parent is None else _actor_id(parent)
+
+    def execute(self, world) -> Response:
+        parent = world.get_actor(self.parent_id) if self.parent_id else None
+        try:
+            actor = world.spawn_actor(self.blueprint, self.transform, attach_to=parent)
+        except RuntimeError as e:
+            return Response(0, str(e))
+        for command in self._then:
+            command._resolve(actor.id)
+            command.execute(world)
+        return Response(actor.id)
+
+
+class DestroyActor(Command):
+    def __init__(self, actor):
+        super().__init__()
+        self.actor_id = _actor_id(actor)
+
+    def execute(self, world) -> Response:
+        actor = world.get_actor(self.actor_id)
+        if actor is None or not actor.destroy():
+            return Response(self.actor_id, f"actor {self.actor_id} not found")
+        return Response(self.actor_id)
+
+
+class _ActorCommand(Command):
+    """对单个参与者调用方法的命令"""
+    method = None
+
+    def __init__(self, actor, *args):
+        super().__init__()
+        self.actor_id = _actor_id(actor)
+        self.args = args
+
+    def execute(self, world) -> Response:
+        actor = world.get_actor(self.actor_id)
+        if actor is None:
+            return Response(self.actor_id, f"actor {self.actor_id} not found")
+        getattr(actor, self.method)(*self.args)
+        return Response(self.actor_id)
+
+
+class ApplyVehicleControl(_ActorCommand):
+    method = 'apply_control'
+
+
+class ApplyWalkerControl(_ActorCommand):
+    method = 'apply_control'
+
+
+class ApplyTransform(_ActorCommand):
+    method = 'set_transform'
+
+
+class ApplyLocation(_ActorCommand):
+    method = 'set_location'
+
+
+class ApplyTargetVelocity(_ActorCommand):
+    method = 'set_target_velocity'
+
+
+class ApplyTargetAngularVelocity(_ActorCommand):
+    method = 'set_target_angular_velocity'
+
+
+class ApplyVehiclePhysicsControl(_ActorCommand):
+    method = 'apply_physics_control'
+
+
+class SetSimulatePhysics(_ActorCommand):
+    method = 'set_simulate_physics'
+
+
+class SetEnableGravity(_ActorCommand):
+    method = 'set_enable_gravity'
+
+
+class SetAutopilot(_ActorCommand):
+    method = 'set_autopilot'
+
+    def __init__(self, actor, enabled: bool, tm_port: int = 8000):
+        super().__init__(actor, enabled, tm_port)
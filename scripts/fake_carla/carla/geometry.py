@@ -0,0 +1,212 @@
+"""几何类型: 向量、位置、旋转和变换 (与CARLA一致的左手坐标系, 角度单位为度)"""
+import math
+
+
+class Vector3D:
+    """三维向量"""
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    def __add__(self, other):
+        return type(self)(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return type(self)(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, scalar: float):
+        return type(self)(self.x * scalar, self.y * scalar, self.z * scalar)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, scalar: float):
+        return type(self)(self.x / scalar, self.y / scalar, self.z / scalar)
+
+    def __eq__(self, other):
+        return (isinstance(other, Vector3D) and self.x == other.x
+                and self.y == other.y and self.z == other.z)
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def __repr__(self):
+        return f"{type(self).__name__}(x={self.x:.6f}, y={self.y:.6f}, z={self.z:.6f})"
+
+    def length(self) -> float:
+        """向量长度"""
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z)
+
+    def squared_length(self) -> float:
+        """向量长度平方"""
+        return self.x * self.x + self.y * self.y + self.z * self.z
+
+    def make_unit_vector(self) -> 'Vector3D':
+        """单位向量"""
+        length = self.length()
+        if length == 0.0:
+            return Vector3D()
+        return Vector3D(self.x / length, self.y / length, self.z / length)
+
+    def dot(self, other) -> float:
+        """点积"""
+        return self.x * other.x + self.y * other.y + self.z * other.z
+
+    def cross(self, other) -> 'Vector3D':
+        """叉积"""
+        return Vector3D(
+            self.y * other.z - self.z * other.y,
+            self.z * other.x - self.x * other.z,
+            self.x * other.y - self.y * other.x
+        )
+
+    def distance(self, other) -> float:
+        """欧氏距离"""
+        return (self - other).length()
+
+    def distance_2d(self, other) -> float:
+        """水平面距离"""
+        return math.hypot(self.x - other.x, self.y - other.y)
+
+
+class Location(Vector3D):
+    """世界坐标位置(米)"""
+    __slots__ = ()
+
+
+class Rotation:
+    """欧拉角旋转(度)"""
+    __slots__ = ('pitch', 'yaw', 'roll')
+
+    def __init__(self, pitch: float = 0.0, yaw: float = 0.0, roll: float = 0.0):
+        self.pitch = float(pitch)
+        self.yaw = float(yaw)
+        self.roll = float(roll)
+
+    def __eq__(self, other):
+        return (isinstance(other, Rotation) and self.pitch == other.pitch
+                and self.yaw == other.yaw and self.roll == other.roll)
+
+    def __hash__(self):
+        return hash((self.pitch, self.yaw, self.roll))
+
+    def __repr__(self):
+        return f"Rotation(pitch={self.pitch:.6f}, yaw={self.yaw:.6f}, roll={self.roll:.6f})"
+
+    def _trig(self):
+        cp, sp = math.cos(math.radians(self.pitch)), math.sin(math.radians(self.pitch))
+        cy, sy = math.cos(math.radians(self.yaw)), math.sin(math.radians(self.yaw))
+        cr, sr = math.cos(math.radians(self.roll)), math.sin(math.radians(self.roll))
+        return cp, sp, cy, sy, cr, sr
+
+    def get_forward_vector(self) -> Vector3D:
+        """前向单位向量"""
+        cp, sp, cy, sy, _, _ = self._trig()
+        return Vector3D(cp * cy, cp * sy, sp)
+
+    def get_right_vector(self) -> Vector3D:
+        """右向单位向量"""
+        cp, sp, cy, sy, cr, sr = self._trig()
+        return Vector3D(cy * sp * sr - sy * cr, sy * sp * sr + cy * cr, -cp * sr)
+
+    def get_up_vector(self) -> Vector3D:
+        """上向单位向量"""
+        cp, sp, cy, sy, cr, sr = self._trig()
+        return Vector3D(-cy * sp * cr - sy * sr, -sy * sp * cr + cy * sr, cp * cr)
+
+
+class Transform:
+    """位置和旋转组成的刚体变换"""
+    __slots__ = ('location', 'rotation')
+
+    def __init__(self, location: Location = None, rotation: Rotation = None):
+        self.location = (Location(location.x, location.y, location.z) if location is not None
+                         else Location())
+        self.rotation = (Rotation(rotation.pitch, rotation.yaw, rotation.roll)
+                         if rotation is not None else Rotation())
+
+    def __eq__(self, other):
+        return (isinstance(other, Transform) and self.location == other.location
+                and self.rotation == other.rotation)
+
+    def __repr__(self):
+        return f"Transform({self.location!r}, {self.rotation!r})"
+
+    def get_forward_vector(self) -> Vector3D:
+        return self.rotation.get_forward_vector()
+
+    def get_right_vector(self) -> Vector3D:
+        return self.rotation.get_right_vector()
+
+    def get_up_vector(self) -> Vector3D:
+        return self.rotation.get_up_vector()
+
+    def transform(self, point: Vector3D) -> Location:
+        """局部坐标点转换到世界坐标"""
+        forward = self.get_forward_vector()
+        right = self.get_right_vector()
+        up = self.get_up_vector()
+        return Location(
+            self.location.x + forward.x * point.x + right.x * point.y + up.x * point.z,
+            self.location.y + forward.y * point.x + right.y * point.y + up.y * point.z,
+            self.location.z + forward.z * point.x + right.z * point.y + up.z * point.z
+        )
+
+    def get_matrix(self) -> list:
+        """4x4齐次变换矩阵"""
+        forward = self.get_forward_vector()
+        right = self.get_right_vector()
+        up = self.get_up_vector()
+        loc = self.location
+        return [
+            [forward.x, right.x, up.x, loc.x],
+            [forward.y, right.y, up.y, loc.y],
+            [forward.z, right.z, up.z, loc.z],
+            [0.0, 0.0, 0.0, 1.0]
+        ]
+
+
+class BoundingBox:
+    """包围盒, extent为半尺寸"""
+    __slots__ = ('location', 'extent', 'rotation')
+
+    def __init__(self, location: Location = None, extent: Vector3D = None):
+        self.location = location if location is not None else Location()
+        self.extent = extent if extent is not None else Vector3D()
+        self.rotation = Rotation()
+
+    def __repr__(self):
+        extent = self.extent
+        return f"BoundingBox({self.location!r}, Extent({extent.x}, {extent.y}, {extent.z}))"
+
+
+class GeoLocation:
+    """地理坐标"""
+    __slots__ = ('latitude', 'longitude', 'altitude')
+
+    def __init__(self, latitude: float = 0.0, longitude: float = 0.0, altitude: float = 0.0):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.altitude = altitude
+
+    def __repr__(self):
+        return (f"GeoLocation(latitude={self.latitude:.6f}, longitude={self.longitude:.6f}, "
+                f"altitude={self.altitude:.6f})")
+
+
+class Timestamp:
+    """仿真时间戳"""
+    __slots__ = ('frame', 'elapsed_seconds', 'delta_seconds', 'platform_timestamp')
+
+    def __init__(self, frame: int, elapsed_seconds: float, delta_seconds: float,
+                 platform_timestamp: float):
+        self.frame = frame
+        self.elapsed_seconds = elapsed_seconds
+        self.delta_seconds = delta_seconds
+        self.platform_timestamp = platform_timestamp
+
+    def __repr__(self):
+        return (f"Timestamp(frame={self.frame}, elapsed_seconds={self.elapsed_seconds:.6f}, "
+                f"delta_seconds={self.delta_seconds:.6f})")
@@ -0,0 +1,379 @@
+"""合成地图: 圆角矩形环形道路, 每个方向两条车道加人行道"""
+import enum
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .geometry import GeoLocation, Location, Rotation, Transform
+
+EARTH_RADIUS = 6378137.0
+
+
+class LaneType(enum.IntFlag):
+    """车道类型"""
+    NONE = 0x1
+    Driving = 0x2
+    Stop = 0x4
+    Shoulder = 0x8
+    Biking = 0x10
+    Sidewalk = 0x20
+    Border = 0x40
+    Any = 0xFFFFFFFE
+
+
+class LaneChange(enum.IntFlag):
+    """允许的变道方向"""
+    NONE = 0x0
+    Right = 0x1
+    Left = 0x2
+    Both = 0x3
+
+
+class LaneMarkingType(enum.Enum):
+    """车道线类型"""
+    NONE = 0
+    Other = 1
+    Broken = 2
+    Solid = 3
+    SolidSolid = 4
+    SolidBroken = 5
+    BrokenSolid = 6
+    BrokenBroken = 7
+    BottsDots = 8
+    Grass = 9
+    Curb = 10
+
+
+class LaneMarkingColor(enum.Enum):
+    """车道线颜色"""
+    Standard = 0
+    Blue = 1
+    Green = 2
+    Red = 3
+    Yellow = 4
+    Other = 5
+
+    White = 0
+
+
+class LaneMarking:
+    """车道线"""
+    __slots__ = ('type', 'color', 'lane_change', 'width')
+
+    def __init__(self, marking_type: LaneMarkingType,
+                 color: LaneMarkingColor = LaneMarkingColor.White,
+                 lane_change: LaneChange = LaneChange.NONE, width: float = 0.15):
+        self.type = marking_type
+        self.color = color
+        self.lane_change = lane_change
+        self.width = width
+
+    def __repr__(self):
+        return f"LaneMarking({self.type.name}, {self.color.name})"
+
+
+# 车道从道路右侧到左侧的排列, 负车道沿参考线方向行驶
+LANE_IDS = (-3, -2, -1, 1, 2, 3)
+
+# 相邻车道之间的车道线
+_BOUNDARY_MARKINGS = {
+    frozenset((-1, 1)): LaneMarking(LaneMarkingType.SolidSolid, LaneMarkingColor.Yellow),
+    frozenset((-1, -2)): LaneMarking(LaneMarkingType.Broken, LaneMarkingColor.White,
+                                     LaneChange.Both),
+    frozenset((1, 2)): LaneMarking(LaneMarkingType.Broken, LaneMarkingColor.White,
+                                   LaneChange.Both),
+    frozenset((-2, -3)): LaneMarking(LaneMarkingType.Solid),
+    frozenset((2, 3)): LaneMarking(LaneMarkingType.Solid),
+}
+_NO_MARKING = LaneMarking(LaneMarkingType.NONE, LaneMarkingColor.Other)
+
+
+def _right_lane(lane_id: int) -> Optional[int]:
+    """沿车道行驶方向的右侧车道"""
+    right = lane_id - 1 if lane_id < 0 else lane_id + 1
+    return right if abs(right) <= 3 else None
+
+
+def _left_lane(lane_id: int) -> Optional[int]:
+    """沿车道行驶方向的左侧车道"""
+    if lane_id == -1:
+        return 1
+    if lane_id == 1:
+        return -1
+    return lane_id + 1 if lane_id < 0 else lane_id - 1
+
+
+def marking_between(lane_a: int, lane_b: int) -> LaneMarking:
+    """两条相邻车道之间的车道线"""
+    return _BOUNDARY_MARKINGS.get(frozenset((lane_a, lane_b)), _NO_MARKING)
+
+
+class Waypoint:
+    """车道中心线上的路点, 同一位置的路点是同一个对象"""
+    def __init__(self, world_map: 'Map', lane_id: int, index: int):
+        self._map = world_map
+        self._index = index
+        self.lane_id = lane_id
+        self.id = (lane_id + 8) * 10 ** 7 + index
+        self.road_id = 0
+        self.section_id = 0
+        self.junction_id = -1
+        self.is_junction = False
+        self.is_intersection = False
+        self.s = index * world_map.resolution
+        self.lane_width = world_map.lane_width(lane_id)
+        self.lane_type = LaneType.Sidewalk if abs(lane_id) == 3 else LaneType.Driving
+        self.transform = world_map.lane_transform(lane_id, index)
+
+        left, right = _left_lane(lane_id), _right_lane(lane_id)
+        self.left_lane_marking = marking_between(lane_id, left) if left is not None else _NO_MARKING
+        self.right_lane_marking = (marking_between(lane_id, right) if right is not None
+                                   else _NO_MARKING)
+        self.lane_change = LaneChange.NONE
+        if self.lane_type == LaneType.Driving:
+            if self.left_lane_marking.type == LaneMarkingType.Broken:
+                self.lane_change |= LaneChange.Left
+            if self.right_lane_marking.type == LaneMarkingType.Broken:
+                self.lane_change |= LaneChange.Right
+
+    def __eq__(self, other):
+        return isinstance(other, Waypoint) and self.id == other.id
+
+    def __hash__(self):
+        return self.id
+
+    def __repr__(self):
+        return f"Waypoint(id={self.id}, lane_id={self.lane_id}, s={self.s:.2f})"
+
+    @property
+    def _direction(self) -> int:
+        return 1 if self.lane_id < 0 else -1
+
+    def _offset(self, distance: float) -> 'Waypoint':
+        steps = max(1, int(round(distance / self._map.resolution)))
+        return self._map._waypoint(self.lane_id, self._index + self._direction * steps)
+
+    def next(self, distance: float) -> List['Waypoint']:
+        """前方distance米处的路点"""
+        return [self._offset(distance)]
+
+    def previous(self, distance: float) -> List['Waypoint']:
+        """后方distance米处的路点"""
+        steps = max(1, int(round(distance / self._map.resolution)))
+        return [self._map._waypoint(self.lane_id, self._index - self._direction * steps)]
+
+    def next_until_lane_end(self, distance: float) -> List['Waypoint']:
+        """环形道路没有终点, 返回一整圈内的路点"""
+        count = int(self._map.length // distance)
+        waypoints, current = [], self
+        for _ in range(count):
+            current = current._offset(distance)
+            waypoints.append(current)
+        return waypoints
+
+    def previous_until_lane_start(self, distance: float) -> List['Waypoint']:
+        """环形道路没有起点, 返回一整圈内的路点"""
+        count = int(self._map.length // distance)
+        waypoints, current = [], self
+        for _ in range(count):
+            current = current.previous(distance)[0]
+            waypoints.append(current)
+        return waypoints
+
+    def get_left_lane(self) -> Optional['Waypoint']:
+        """左侧车道上的对应路点"""
+        lane = _left_lane(self.lane_id)
+        return self._map._waypoint(lane, self._index) if lane is not None else None
+
+    def get_right_lane(self) -> Optional['Waypoint']:
+        """右侧车道上的对应路点"""
+        lane = _right_lane(self.lane_id)
+        return self._map._waypoint(lane, self._index) if lane is not None else None
+
+    def get_junction(self):
+        return None
+
+    def get_landmarks(self, distance: float, stop_at_junction: bool = False) -> list:
+        return []
+
+
+class Map:
+    """圆角矩形环形道路地图
+
+    参考线逆时针闭合, 每侧两条3.5米行车道和一条3米人行道,
+    路点按0.5米分辨率离散并缓存。
+    """
+    def __init__(self, name: str = 'Carla/Maps/FakeTown', half_length: float = 150.0,
+                 half_width: float = 100.0, corner_radius: float = 30.0,
+                 driving_lane_width: float = 3.5, sidewalk_width: float = 3.0,
+                 resolution: float = 0.5, spawn_spacing: float = 20.0,
+                 geo_reference: Tuple[float, float, float] = (49.0, 8.0, 0.0)):
+        self.name = name
+        self.driving_lane_width = driving_lane_width
+        self.sidewalk_width = sidewalk_width
+        self.spawn_spacing = spawn_spacing
+        self.geo_reference = geo_reference
+        self._waypoints = {}
+        self._build_reference_line(half_length, half_width, corner_radius, resolution)
+
+    def _build_reference_line(self, a: float, b: float, r: float, resolution: float):
+        """按分辨率采样参考线"""
+        straight_x, straight_y, arc = 2 * (a - r), 2 * (b - r), math.pi * r / 2
+        self.length = 2 * straight_x + 2 * straight_y + 4 * arc
+        count = int(round(self.length / resolution))
+        self.resolution = self.length / count
+        s = np.arange(count) * self.resolution
+
+        # (长度, 起点x, 起点y, 航向角度) 表示直线; (长度, 圆心x, 圆心y, 起始角度) 表示圆弧
+        segments = [
+            ('line', straight_x, -a + r, -b, 0.0),
+            ('arc', arc, a - r, -b + r, -90.0),
+            ('line', straight_y, a, -b + r, 90.0),
+            ('arc', arc, a - r, b - r, 0.0),
+            ('line', straight_x, a - r, b, 180.0),
+            ('arc', arc, -a + r, b - r, 90.0),
+            ('line', straight_y, -a, b - r, 270.0),
+            ('arc', arc, -a + r, -b + r, 180.0),
+        ]
+        x, y, yaw = np.empty(count), np.empty(count), np.empty(count)
+        start = 0.0
+        for kind, length, px, py, angle in segments:
+            mask = (s >= start) & (s < start + length)
+            t = s[mask] - start
+            if kind == 'line':
+                x[mask] = px + t * math.cos(math.radians(angle))
+                y[mask] = py + t * math.sin(math.radians(angle))
+                yaw[mask] = angle
+            else:
+                phi = math.radians(angle) + t / r
+                x[mask] = px + r * np.cos(phi)
+                y[mask] = py + r * np.sin(phi)
+                yaw[mask] = np.degrees(phi) + 90.0
+            start += length
+
+        self._x, self._y = x, y
+        self._yaw = np.mod(yaw + 180.0, 360.0) - 180.0
+        self._right_x = -np.sin(np.radians(self._yaw))
+        self._right_y = np.cos(np.radians(self._yaw))
+
+    def lane_width(self, lane_id: int) -> float:
+        """车道宽度"""
+        return self.sidewalk_width if abs(lane_id) == 3 else self.driving_lane_width
+
+    def lane_offset(self, lane_id: int) -> float:
+        """车道中心相对参考线的右向偏移"""
+        k = abs(lane_id)
+        if k <= 2:
+            offset = (k - 0.5) * self.driving_lane_width
+        else:
+            offset = 2 * self.driving_lane_width + self.sidewalk_width / 2
+        return offset if lane_id < 0 else -offset
+
+    def lane_transform(self, lane_id: int, index: int) -> Transform:
+        """车道中心线上第index个采样点的变换"""
+        offset = self.lane_offset(lane_id)
+        yaw = self._yaw[index] if lane_id < 0 else self._yaw[index] + 180.0
+        z = 0.15 if abs(lane_id) == 3 else 0.0
+        return Transform(
+            Location(self._x[index] + offset * self._right_x[index],
+                     self._y[index] + offset * self._right_y[index], z),
+            Rotation(yaw=(yaw + 180.0) % 360.0 - 180.0)
+        )
+
+    def _waypoint(self, lane_id: int, index: int) -> Waypoint:
+        """获取缓存的路点"""
+        index %= len(self._x)
+        key = (lane_id, index)
+        waypoint = self._waypoints.get(key)
+        if waypoint is None:
+            waypoint = Waypoint(self, lane_id, index)
+            self._waypoints[key] = waypoint
+        return waypoint
+
+    def locate(self, location) -> Tuple[int, float, Optional[int]]:
+        """返回最近的参考线采样点、右向偏移和所在车道(路外为None)"""
+        dx = self._x - location.x
+        dy = self._y - location.y
+        index = int(np.argmin(dx * dx + dy * dy))
+        offset = -(dx[index] * self._right_x[index] + dy[index] * self._right_y[index])
+
+        width = self.driving_lane_width
+        distance = abs(offset)
+        if distance < width:
+            k = 1
+        elif distance < 2 * width:
+            k = 2
+        elif distance < 2 * width + self.sidewalk_width:
+            k = 3
+        else:
+            return index, offset, None
+        return index, offset, -k if offset >= 0 else k
+
+    def get_waypoint(self, location, project_to_road: bool = True,
+                     lane_type: LaneType = LaneType.Driving) -> Optional[Waypoint]:
+        """位置对应的路点"""
+        index, offset, lane_id = self.locate(location)
+        if lane_id is None and not project_to_road:
+            return None
+        if lane_id is None:
+            lane_id = -3 if offset >= 0 else 3
+
+        allowed = [lane for lane in LANE_IDS
+                   if (LaneType.Sidewalk if abs(lane) == 3 else LaneType.Driving) & lane_type]
+        if not allowed:
+            return None
+        if lane_id not in allowed:
+            if not project_to_road:
+                return None
+            lane_id = min(allowed, key=lambda lane: abs(self.lane_offset(lane) - offset))
+        return self._waypoint(lane_id, index)
+
+    def get_waypoint_xodr(self, road_id: int, lane_id: int, s: float) -> Optional[Waypoint]:
+        """按OpenDRIVE坐标获取路点"""
+        if road_id != 0 or lane_id not in LANE_IDS:
+            return None
+        return self._waypoint(lane_id, int(round(s / self.resolution)))
+
+    def get_spawn_points(self) -> List[Transform]:
+        """行车道上等间距的生成点"""
+        step = max(1, int(round(self.spawn_spacing / self.resolution)))
+        spawn_points = []
+        for lane_id in (-2, -1, 1, 2):
+            for index in range(0, len(self._x), step):
+                transform = self.lane_transform(lane_id, index)
+                transform.location.z += 0.5
+                spawn_points.append(transform)
+        return spawn_points
+
+    def generate_waypoints(self, distance: float) -> List[Waypoint]:
+        """所有行车道上间隔distance米的路点"""
+        step = max(1, int(round(distance / self.resolution)))
+        return [self._waypoint(lane_id, index)
+                for lane_id in (-2, -1, 1, 2)
+                for index in range(0, len(self._x), step)]
+
+    def get_topology(self) -> List[Tuple[Waypoint, Waypoint]]:
+        """每条行车道的首尾路点对"""
+        last = len(self._x) - 1
+        topology = []
+        for lane_id in (-2, -1, 1, 2):
+            start, end = (0, last) if lane_id < 0 else (last, 0)
+            topology.append((self._waypoint(lane_id, start), self._waypoint(lane_id, end)))
+        return topology
+
+    def get_crosswalks(self) -> list:
+        return []
+
+    def transform_to_geolocation(self, location) -> GeoLocation:
+        """世界坐标转换为经纬度(墨卡托投影, 与CARLA一致)"""
+        lat0, lon0, alt0 = self.geo_reference
+        scale = math.cos(math.radians(lat0))
+        mx = scale * math.radians(lon0) * EARTH_RADIUS + location.x
+        my = scale * EARTH_RADIUS * math.log(math.tan(math.radians(90.0 + lat0) / 2)) - location.y
+        longitude = math.degrees(mx / (EARTH_RADIUS * scale))
+        latitude = 360.0 * math.atan(math.exp(my / (EARTH_RADIUS * scale))) / math.pi - 90.0
+        return GeoLocation(latitude, longitude, alt0 + location.z)
+
+    def __repr__(self):
+        return f"Map(name={self.name})"
@@ -0,0 +1,354 @@
+"""传感器数据类型和合成数据模型
+
+相机和激光雷达数据由静态合成场景(行车道、车道线、人行道、两侧建筑和天空)
+按真实尺寸和CARLA的字节布局生成: 相机为BGRA uint8, 深度为24位RGB编码,
+语义分割的类别写在R通道, 激光雷达为每点 (x, y, z, intensity) 的float32。
+"""
+import math
+from typing import Dict, List
+
+import numpy as np
+
+from .geometry import Vector3D
+
+# CARLA 0.9.13 语义标签
+TAG_BUILDING = 1
+TAG_ROAD_LINE = 6
+TAG_ROAD = 7
+TAG_SIDEWALK = 8
+TAG_SKY = 13
+TAG_TERRAIN = 22
+
+# 合成场景横向布局(米, 相对车辆中心线)
+ROAD_HALF_WIDTH = 7.0
+SIDEWALK_EDGE = 10.0
+BUILDING_OFFSET = 14.0
+BUILDING_HEIGHT = 15.0
+LANE_LINES = (-3.5, 0.0, 3.5)
+DASHED_LINES = (-3.5, 3.5)
+LINE_HALF_WIDTH = 0.08
+DASH_PERIOD = 6.0
+DASH_LENGTH = 3.0
+MAX_DEPTH = 1000.0
+
+_TAG_COLORS = {
+    TAG_BUILDING: (150, 110, 90),
+    TAG_ROAD_LINE: (250, 250, 245),
+    TAG_ROAD: (105, 105, 108),
+    TAG_SIDEWALK: (190, 180, 170),
+    TAG_TERRAIN: (80, 140, 60),
+}
+
+
+class SensorData:
+    """传感器数据基类"""
+    def __init__(self, frame: int, timestamp: float, transform):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.transform = transform
+
+
+class Image(SensorData):
+    """相机图像, raw_data为BGRA字节"""
+    def __init__(self, frame, timestamp, transform, width: int, height: int, fov: float, raw_data):
+        super().__init__(frame, timestamp, transform)
+        self.width = width
+        self.height = height
+        self.fov = fov
+        self.raw_data = raw_data
+
+    def __len__(self):
+        return self.width * self.height
+
+    def convert(self, color_converter):
+        pass
+
+
+class LidarMeasurement(SensorData):
+    """激光雷达点云, raw_data为每点4个float32"""
+    def __init__(self, frame, timestamp, transform, channels: int, horizontal_angle: float,
+                 raw_data, point_counts: List[int]):
+        super().__init__(frame, timestamp, transform)
+        self.channels = channels
+        self.horizontal_angle = horizontal_angle
+        self.raw_data = raw_data
+        self._point_counts = point_counts
+
+    def get_point_count(self, channel: int) -> int:
+        return self._point_counts[channel]
+
+    def __len__(self):
+        return sum(self._point_counts)
+
+
+class GnssMeasurement(SensorData):
+    """GNSS测量"""
+    def __init__(self, frame, timestamp, transform, latitude: float, longitude: float,
+                 altitude: float):
+        super().__init__(frame, timestamp, transform)
+        self.latitude = latitude
+        self.longitude = longitude
+        self.altitude = altitude
+
+
+class IMUMeasurement(SensorData):
+    """IMU测量"""
+    def __init__(self, frame, timestamp, transform, accelerometer: Vector3D,
+                 gyroscope: Vector3D, compass: float):
+        super().__init__(frame, timestamp, transform)
+        self.accelerometer = accelerometer
+        self.gyroscope = gyroscope
+        self.compass = compass
+
+
+class CollisionEvent(SensorData):
+    """碰撞事件"""
+    def __init__(self, frame, timestamp, transform, actor, other_actor, normal_impulse: Vector3D):
+        super().__init__(frame, timestamp, transform)
+        self.actor = actor
+        self.other_actor = other_actor
+        self.normal_impulse = normal_impulse
+
+
+class LaneInvasionEvent(SensorData):
+    """车道入侵事件"""
+    def __init__(self, frame, timestamp, transform, actor, crossed_lane_markings: list):
+        super().__init__(frame, timestamp, transform)
+        self.actor = actor
+        self.crossed_lane_markings = crossed_lane_markings
+
+
+def _attr(attributes: Dict[str, str], key: str, default: float) -> float:
+    value = attributes.get(key)
+    return float(value) if value not in (None, '') else default
+
+
+class CameraModel:
+    """相机合成模型: 初始化时按针孔投影预计算整幅场景, 每帧只复制并更新虚线相位"""
+    def __init__(self, type_id: str, attributes: Dict[str, str], mount_height: float,
+                 mount_pitch: float, rng: np.random.Generator):
+        self.type_id = type_id
+        self.width = int(_attr(attributes, 'image_size_x', 800))
+        self.height = int(_attr(attributes, 'image_size_y', 600))
+        self.fov = _attr(attributes, 'fov', 90.0)
+
+        tags, depth, forward, dashed = self._ray_cast(max(mount_height, 0.5), mount_pitch)
+        if type_id == 'sensor.camera.depth':
+            self.template = self._encode_depth(depth)
+        elif type_id == 'sensor.camera.semantic_segmentation':
+            self.template = self._encode_semantic(tags)
+        else:
+            self.template = self._encode_rgb(tags, depth, rng)
+
+        # 虚线车道线像素: 行驶时按前向距离周期性在车道线和路面之间切换
+        self._dash_index = np.flatnonzero(dashed)
+        self._dash_forward = forward.ravel()[self._dash_index]
+        self._dash_on = self.template.reshape(-1, 4)[self._dash_index].copy()
+        self._dash_off = self._dash_on.copy()
+        if type_id == 'sensor.camera.semantic_segmentation':
+            self._dash_off[:, 2] = TAG_ROAD
+        elif type_id == 'sensor.camera.rgb':
+            self._dash_off[:, :3] = _TAG_COLORS[TAG_ROAD][::-1]
+
+    def _ray_cast(self, mount_height: float, mount_pitch: float):
+        """计算每个像素的语义类别、平面深度和前向距离"""
+        focal = self.width / (2.0 * math.tan(math.radians(self.fov) / 2.0))
+        u = (np.arange(self.width) - self.width / 2.0 + 0.5) / focal
+        v = (np.arange(self.height) - self.height / 2.0 + 0.5) / focal
+        lateral, down = np.meshgrid(u, v)
+
+        # 相机坐标(前, 右, 上) = (1, lateral, -down), 按俯仰角旋转到车体坐标
+        pitch = math.radians(mount_pitch)
+        forward_dir = math.cos(pitch) + down * math.sin(pitch)
+        up_dir = math.sin(pitch) - down * math.cos(pitch)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_ground = np.where(up_dir < 0, mount_height / -up_dir, np.inf)
+            t_building = np.where(np.abs(lateral) > 1e-6, BUILDING_OFFSET / np.abs(lateral), np.inf)
+        building_z = mount_height + t_building * up_dir
+        hits_building = ((t_building < t_ground) & (building_z >= 0)
+                         & (building_z <= BUILDING_HEIGHT))
+
+        depth = np.where(hits_building, t_building, t_ground)
+        depth = np.minimum(depth, MAX_DEPTH)
+        side = np.abs(lateral * depth)
+        forward = forward_dir * depth
+
+        tags = np.full(depth.shape, TAG_SKY, dtype=np.uint8)
+        ground = ~hits_building & np.isfinite(t_ground) & (t_ground < MAX_DEPTH)
+        tags[ground] = TAG_TERRAIN
+        tags[ground & (side < SIDEWALK_EDGE)] = TAG_SIDEWALK
+        tags[ground & (side < ROAD_HALF_WIDTH)] = TAG_ROAD
+        line = np.zeros(depth.shape, dtype=bool)
+        dashed = np.zeros(depth.shape, dtype=bool)
+        signed = lateral * depth
+        for offset in LANE_LINES:
+            on_line = ground & (np.abs(signed - offset) < LINE_HALF_WIDTH)
+            line |= on_line
+            if offset in DASHED_LINES:
+                dashed |= on_line
+        tags[line] = TAG_ROAD_LINE
+        tags[hits_building] = TAG_BUILDING
+        return tags, depth, forward, dashed
+
+    def _encode_rgb(self, tags: np.ndarray, depth: np.ndarray,
+                    rng: np.random.Generator) -> np.ndarray:
+        """按类别上色, 加固定纹理噪声和距离雾化"""
+        image = np.zeros(tags.shape + (4,), dtype=np.float32)
+        rows = np.linspace(0.0, 1.0, self.height, dtype=np.float32)[:, None]
+        sky = np.stack([235 - 30 * rows, 206 + 20 * rows, 135 + 60 * rows], axis=-1)  # B, G, R
+        image[..., :3] = np.broadcast_to(sky, tags.shape + (3,))
+        for tag, color in _TAG_COLORS.items():
+            image[tags == tag, :3] = color[::-1]
+
+        textured = tags != TAG_SKY
+        noise = rng.normal(0.0, 6.0, tags.shape).astype(np.float32)
+        image[..., :3] += (noise * textured)[..., None]
+        fog = np.clip(depth / 400.0, 0.0, 0.6)[..., None] * textured[..., None]
+        image[..., :3] = image[..., :3] * (1 - fog) + np.array([225, 220, 210], np.float32) * fog
+        image[..., 3] = 255
+        return np.clip(image, 0, 255).astype(np.uint8)
+
+    def _encode_depth(self, depth: np.ndarray) -> np.ndarray:
+        """CARLA 24位深度编码: normalized = (R + G*256 + B*256^2) / (256^3 - 1) * 1000米"""
+        normalized = np.minimum(depth, MAX_DEPTH) / MAX_DEPTH
+        encoded = np.round(normalized * (256 ** 3 - 1)).astype(np.uint32)
+        image = np.empty(depth.shape + (4,), dtype=np.uint8)
+        image[..., 2] = encoded & 0xFF
+        image[..., 1] = (encoded >> 8) & 0xFF
+        image[..., 0] = (encoded >> 16) & 0xFF
+        image[..., 3] = 255
+        return image
+
+    def _encode_semantic(self, tags: np.ndarray) -> np.ndarray:
+        """语义类别写入R通道"""
+        image = np.zeros(tags.shape + (4,), dtype=np.uint8)
+        image[..., 2] = tags
+        image[..., 3] = 255
+        return image
+
+    def measure(self, distance_traveled: float) -> np.ndarray:
+        """生成一帧新的BGRA图像"""
+        image = self.template.copy()
+        if len(self._dash_index):
+            phase = np.mod(self._dash_forward + distance_traveled, DASH_PERIOD) < DASH_LENGTH
+            flat = image.reshape(-1, 4)
+            flat[self._dash_index] = np.where(phase[:, None], self._dash_on, self._dash_off)
+        image.flags.writeable = False
+        return image
+
+
+class LidarModel:
+    """旋转激光雷达合成模型: 预计算一整圈的射线命中, 每帧取本帧扫过的扇区"""
+    def __init__(self, attributes: Dict[str, str], mount_height: float, rng: np.random.Generator):
+        self.rng = rng
+        self.channels = int(_attr(attributes, 'channels', 32))
+        self.range = _attr(attributes, 'range', 10.0)
+        self.points_per_second = _attr(attributes, 'points_per_second', 56000)
+        self.rotation_frequency = _attr(attributes, 'rotation_frequency', 10.0)
+        self.upper_fov = _attr(attributes, 'upper_fov', 10.0)
+        self.lower_fov = _attr(attributes, 'lower_fov', -30.0)
+        self.attenuation = _attr(attributes, 'atmosphere_attenuation_rate', 0.004)
+        self.dropoff_general_rate = _attr(attributes, 'dropoff_general_rate', 0.45)
+        self.dropoff_intensity_limit = _attr(attributes, 'dropoff_intensity_limit', 0.8)
+        self.dropoff_zero_intensity = _attr(attributes, 'dropoff_zero_intensity', 0.4)
+        self.noise_stddev = _attr(attributes, 'noise_stddev', 0.0)
+
+        # 每圈每通道的水平采样数
+        self.columns = max(1, int(round(
+            self.points_per_second / (self.rotation_frequency * self.channels))))
+        self.angle = 0.0
+        self._build_table(max(mount_height, 0.5))
+
+    def _build_table(self, mount_height: float):
+        """(channels, columns, 4) 的命中点表和有效掩码"""
+        elevation = np.radians(np.linspace(self.upper_fov, self.lower_fov, self.channels))[:, None]
+        azimuth = np.radians(np.arange(self.columns) * 360.0 / self.columns)[None, :]
+        horizontal = np.cos(elevation)
+        dir_x = horizontal * np.cos(azimuth)
+        dir_y = horizontal * np.sin(azimuth)
+        dir_z = np.broadcast_to(np.sin(elevation), dir_x.shape)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            t_ground = np.where(dir_z < 0, mount_height / -dir_z, np.inf)
+            t_building = np.where(np.abs(dir_y) > 1e-6, BUILDING_OFFSET / np.abs(dir_y), np.inf)
+        building_z = mount_height + t_building * dir_z
+        hits_building = ((t_building < t_ground) & (building_z >= 0)
+                         & (building_z <= BUILDING_HEIGHT))
+        distance = np.where(hits_building, t_building, t_ground)
+
+        self.valid = np.isfinite(distance) & (distance <= self.range)
+        distance = np.where(self.valid, distance, 0.0)
+        self.table = np.stack([
+            dir_x * distance, dir_y * distance, dir_z * distance,
+            np.exp(-self.attenuation * distance)
+        ], axis=-1).astype(np.float32)
+        self.distance = distance.astype(np.float32)
+
+    def measure(self, delta_seconds: float):
+        """生成本帧扫过扇区的点, 按通道顺序排列"""
+        start = int(round(self.angle / 360.0 * self.columns))
+        count = int(round(self.rotation_frequency * delta_seconds * self.columns))
+        count = min(max(count, 1), self.columns)
+        columns = np.arange(start, start + count) % self.columns
+        self.angle = (self.angle + count * 360.0 / self.columns) % 360.0
+
+        valid = self.valid[:, columns]
+        intensity = self.table[:, columns, 3]
+        # CARLA的随机丢点: 强度低于阈值的点按general rate丢弃
+        if self.dropoff_general_rate > 0:
+            keep = self.rng.random(valid.shape) >= self.dropoff_general_rate
+            valid = valid & ((intensity > self.dropoff_intensity_limit) | keep)
+
+        points = self.table[:, columns][valid]
+        if self.noise_stddev > 0 and len(points):
+            noise = self.rng.normal(0.0, self.noise_stddev, len(points)).astype(np.float32)
+            scale = 1.0 + noise / np.maximum(self.distance[:, columns][valid], 1e-3)
+            points[:, :3] *= scale[:, None]
+
+        counts = valid.sum(axis=1).tolist()
+        return np.ascontiguousarray(points, dtype=np.float32), counts, self.angle
+
+
+class GnssModel:
+    """GNSS模型: 位置转经纬度并叠加偏置和高斯噪声"""
+    def __init__(self, attributes: Dict[str, str], rng: np.random.Generator):
+        self.rng = rng
+        axes = ('lat', 'lon', 'alt')
+        self.bias = np.array([_attr(attributes, f'noise_{k}_bias', 0.0) for k in axes])
+        self.stddev = np.array([_attr(attributes, f'noise_{k}_stddev', 0.0) for k in axes])
+
+    def measure(self, geolocation):
+        noise = self.bias
+        if self.stddev.any():
+            noise = noise + self.rng.normal(0.0, 1.0, 3) * self.stddev
+        return (geolocation.latitude + noise[0], geolocation.longitude + noise[1],
+                geolocation.altitude + noise[2])
+
+
+class ImuModel:
+    """IMU模型: 车体坐标系下的加速度(含重力)、角速度(rad/s)和罗盘"""
+    def __init__(self, attributes: Dict[str, str], rng: np.random.Generator):
+        self.rng = rng
+        self.accel_stddev = np.array([_attr(attributes, f'noise_accel_stddev_{k}', 0.0)
+                                      for k in 'xyz'])
+        self.gyro_stddev = np.array([_attr(attributes, f'noise_gyro_stddev_{k}', 0.0)
+                                     for k in 'xyz'])
+        self.gyro_bias = np.array([_attr(attributes, f'noise_gyro_bias_{k}', 0.0) for k in 'xyz'])
+
+    def measure(self, transform, acceleration: Vector3D, angular_velocity: Vector3D):
+        forward = transform.get_forward_vector()
+        right = transform.get_right_vector()
+        up = transform.get_up_vector()
+        accel = acceleration + Vector3D(0.0, 0.0, 9.81)
+        local_accel = np.array([accel.dot(forward), accel.dot(right), accel.dot(up)])
+        gyro = np.radians([angular_velocity.dot(forward), angular_velocity.dot(right),
+                           angular_velocity.dot(up)])
+        if self.accel_stddev.any():
+            local_accel = local_accel + self.rng.normal(0.0, 1.0, 3) * self.accel_stddev
+        if self.gyro_stddev.any():
+            gyro = gyro + self.rng.normal(0.0, 1.0, 3) * self.gyro_stddev
+        gyro = gyro + self.gyro_bias
+        # 北向为世界坐标 (0, -1, 0)
+        compass = math.radians((transform.rotation.yaw + 90.0) % 360.0)
+        return Vector3D(*local_accel), Vector3D(*gyro), compass
@@ -0,0 +1,698 @@
+"""进程内模拟服务器: Client、World、交通管理器和记录器"""
+import math
+import os
+import pickle
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from . import command as _command
+from .actors import (Actor, ActorBlueprint, ActorList, ActorSnapshot, BlueprintLibrary, Sensor,
+                     Vehicle, Walker, WalkerAIController, WorldSnapshot, default_blueprints)
+from .geometry import Location, Rotation, Timestamp, Transform, Vector3D
+from .road import Map, marking_between
+from .sensors import (CameraModel, CollisionEvent, GnssMeasurement, GnssModel, Image,
+                      IMUMeasurement, ImuModel, LaneInvasionEvent, LidarMeasurement, LidarModel)
+
+# 模拟服务器参数, 可由carla.configure或环境变量FAKE_CARLA_*设置
+SETTINGS = {
+    'seed': int(os.environ.get('FAKE_CARLA_SEED', 0)),
+    'tick_latency': float(os.environ.get('FAKE_CARLA_TICK_LATENCY', 0.0)),
+    'async_sensors': os.environ.get('FAKE_CARLA_ASYNC_SENSORS', '0') == '1',
+    'default_delta_seconds': 0.05,
+}
+
+AVAILABLE_MAPS = ['/Game/Carla/Maps/FakeTown', '/Game/Carla/Maps/Town01', '/Game/Carla/Maps/Town03']
+
+
+class WorldSettings:
+    """世界设置"""
+    def __init__(self, synchronous_mode: bool = False, no_rendering_mode: bool = False,
+                 fixed_delta_seconds: Optional[float] = None, substepping: bool = True,
+                 max_substep_delta_time: float = 0.01, max_substeps: int = 10,
+                 max_culling_distance: float = 0.0, deterministic_ragdolls: bool = False):
+        self.synchronous_mode = synchronous_mode
+        self.no_rendering_mode = no_rendering_mode
+        self.fixed_delta_seconds = fixed_delta_seconds
+        self.substepping = substepping
+        self.max_substep_delta_time = max_substep_delta_time
+        self.max_substeps = max_substeps
+        self.max_culling_distance = max_culling_distance
+        self.deterministic_ragdolls = deterministic_ragdolls
+
+    def _copy(self) -> 'WorldSettings':
+        settings = WorldSettings()
+        settings.__dict__.update(self.__dict__)
+        return settings
+
+
+class WeatherParameters:
+    """天气参数"""
+    _FIELDS = ('cloudiness', 'precipitation', 'precipitation_deposits', 'wind_intensity',
+               'sun_azimuth_angle', 'sun_altitude_angle', 'fog_density', 'fog_distance',
+               'wetness', 'fog_falloff', 'scattering_intensity', 'mie_scattering_scale',
+               'rayleigh_scattering_scale')
+
+    def __init__(self, cloudiness=0.0, precipitation=0.0, precipitation_deposits=0.0,
+                 wind_intensity=0.0, sun_azimuth_angle=0.0, sun_altitude_angle=0.0,
+                 fog_density=0.0, fog_distance=0.0, wetness=0.0, fog_falloff=0.0,
+                 scattering_intensity=0.0, mie_scattering_scale=0.0,
+                 rayleigh_scattering_scale=0.0331):
+        values = locals()
+        for field in self._FIELDS:
+            setattr(self, field, float(values[field]))
+
+    def __eq__(self, other):
+        return isinstance(other, WeatherParameters) and vars(self) == vars(other)
+
+    def __repr__(self):
+        fields = ", ".join(f"{f}={getattr(self, f)}" for f in self._FIELDS)
+        return f"WeatherParameters({fields})"
+
+
+WeatherParameters.Default = WeatherParameters(sun_altitude_angle=45.0)
+WeatherParameters.ClearNoon = WeatherParameters(cloudiness=5.0, sun_altitude_angle=45.0)
+WeatherParameters.CloudyNoon = WeatherParameters(cloudiness=60.0, sun_altitude_angle=45.0)
+WeatherParameters.WetNoon = WeatherParameters(cloudiness=5.0, precipitation_deposits=50.0,
+                                              sun_altitude_angle=45.0, wetness=50.0)
+WeatherParameters.SoftRainNoon = WeatherParameters(cloudiness=20.0, precipitation=30.0,
+                                                   precipitation_deposits=50.0,
+                                                   sun_altitude_angle=45.0)
+WeatherParameters.HardRainNoon = WeatherParameters(cloudiness=100.0, precipitation=100.0,
+                                                   precipitation_deposits=90.0,
+                                                   wind_intensity=100.0, sun_altitude_angle=45.0)
+WeatherParameters.ClearSunset = WeatherParameters(cloudiness=5.0, sun_altitude_angle=15.0)
+WeatherParameters.ClearNight = WeatherParameters(cloudiness=5.0, sun_altitude_angle=-90.0)
+
+
+class DebugHelper:
+    """调试绘制接口, 无渲染时忽略"""
+    def draw_point(self, *args, **kwargs):
+        pass
+
+    def draw_line(self, *args, **kwargs):
+        pass
+
+    def draw_arrow(self, *args, **kwargs):
+        pass
+
+    def draw_box(self, *args, **kwargs):
+        pass
+
+    def draw_string(self, *args, **kwargs):
+        pass
+
+
+class TrafficManager:
+    """交通管理器: 自动驾驶车辆沿车道以限速行驶"""
+    def __init__(self, port: int):
+        self._port = port
+        self.global_speed_difference = 30.0
+        self.speed_difference = {}
+        self.leading_distance = 2.5
+        self.synchronous_mode = False
+
+    def get_port(self) -> int:
+        return self._port
+
+    def set_global_distance_to_leading_vehicle(self, distance: float):
+        self.leading_distance = distance
+
+    def distance_to_leading_vehicle(self, actor, distance: float):
+        pass
+
+    def global_percentage_speed_difference(self, percentage: float):
+        self.global_speed_difference = percentage
+
+    def vehicle_percentage_speed_difference(self, actor, percentage: float):
+        self.speed_difference[actor.id] = percentage
+
+    def set_synchronous_mode(self, mode: bool = True):
+        self.synchronous_mode = mode
+
+    def set_random_device_seed(self, seed: int):
+        pass
+
+    def set_hybrid_physics_mode(self, enabled: bool = True):
+        pass
+
+    def auto_lane_change(self, actor, enable: bool):
+        pass
+
+    def ignore_lights_percentage(self, actor, percentage: float):
+        pass
+
+    def target_speed(self, vehicle: Vehicle) -> float:
+        """目标速度(km/h)"""
+        percentage = self.speed_difference.get(vehicle.id, self.global_speed_difference)
+        return vehicle.get_speed_limit() * (1.0 - percentage / 100.0)
+
+
+class _Recorder:
+    """记录每帧所有参与者的位姿, stop时写入文件"""
+    VERSION = 1
+
+    def __init__(self, filename: str, map_name: str):
+        self.filename = filename
+        self.map_name = map_name
+        self.date = datetime.now().strftime('%m/%d/%y %H:%M:%S')
+        self.frames = []
+        self.actors = {}
+        self.collisions = []
+
+    def record(self, timestamp: Timestamp, actors: List[Actor]):
+        ids = np.array([actor.id for actor in actors], dtype=np.int64)
+        poses = np.empty((len(actors), 6), dtype=np.float32)
+        for i, actor in enumerate(actors):
+            self.actors.setdefault(actor.id, actor.type_id)
+            transform = actor.get_transform()
+            location, rotation = transform.location, transform.rotation
+            poses[i] = (location.x, location.y, location.z,
+                        rotation.pitch, rotation.yaw, rotation.roll)
+        self.frames.append((timestamp.frame, timestamp.elapsed_seconds, ids, poses))
+
+    def save(self):
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.filename, 'wb') as f:
+            pickle.dump({
+                'version': self.VERSION,
+                'map': self.map_name,
+                'date': self.date,
+                'actors': self.actors,
+                'collisions': self.collisions,
+                'frames': self.frames,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _load_recording(filename: str) -> Dict:
+    if not os.path.exists(filename):
+        raise RuntimeError(f"File {filename} not found on server")
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
+
+
+class World:
+    """模拟世界
+
+    tick时依次推进车辆/行人运动学、检测碰撞和车道入侵、记录帧,
+    再向到期的传感器回调合成数据。默认在tick线程内同步回调,
+    async_sensors为True时由后台线程回调, 与真实客户端一致。
+    """
+    def __init__(self, server: '_Server', map_name: str):
+        self._server = server
+        self.id = server.next_episode_id()
+        self._map = Map(name=map_name)
+        self._blueprints = BlueprintLibrary(default_blueprints())
+        self._settings = WorldSettings()
+        self._weather = WeatherParameters.Default
+        self._rng = np.random.default_rng([SETTINGS['seed'], self.id])
+        self._lock = threading.RLock()
+        self._actors = {}
+        self._next_actor_id = 1
+        self._on_tick = {}
+        self._lanes = {}
+        self._contacts = set()
+        self.debug = DebugHelper()
+
+        self._frame = 0
+        self._elapsed = 0.0
+        self._timestamp = Timestamp(0, 0.0, 0.0, time.time())
+        self._snapshot = WorldSnapshot(self.id, self._timestamp, {})
+        self._spectator = self._create_actor(
+            Actor, ActorBlueprint('spectator', ['spectator'], []),
+            Transform(Location(0.0, 0.0, 50.0), Rotation(pitch=-90.0)))
+
+    # ---- 查询接口 ----
+    def get_map(self) -> Map:
+        return self._map
+
+    def get_blueprint_library(self) -> BlueprintLibrary:
+        return self._blueprints
+
+    def get_spectator(self) -> Actor:
+        return self._spectator
+
+    def get_settings(self) -> WorldSettings:
+        return self._settings._copy()
+
+    def apply_settings(self, settings: WorldSettings) -> int:
+        self._settings = settings._copy()
+        return self._frame
+
+    def get_weather(self) -> WeatherParameters:
+        return self._weather
+
+    def set_weather(self, weather: WeatherParameters):
+        self._weather = weather
+
+    def get_snapshot(self) -> WorldSnapshot:
+        return self._snapshot
+
+    def get_actor(self, actor_id: int) -> Optional[Actor]:
+        return self._actors.get(actor_id)
+
+    def get_actors(self, actor_ids: Optional[List[int]] = None) -> ActorList:
+        with self._lock:
+            if actor_ids is None:
+                return ActorList(self._actors.values())
+            return ActorList(self._actors[i] for i in actor_ids if i in self._actors)
+
+    def get_random_location_from_navigation(self) -> Location:
+        """人行道上的随机位置"""
+        index = int(self._rng.integers(len(self._map._x)))
+        lane_id = -3 if self._rng.random() < 0.5 else 3
+        return self._map.lane_transform(lane_id, index).location
+
+    def on_tick(self, callback: Callable) -> int:
+        callback_id = len(self._on_tick) + 1
+        self._on_tick[callback_id] = callback
+        return callback_id
+
+    def remove_on_tick(self, callback_id: int):
+        self._on_tick.pop(callback_id, None)
+
+    # ---- 生成与销毁 ----
+    def spawn_actor(self, blueprint, transform: Transform, attach_to: Actor = None,
+                    attachment_type=None) -> Actor:
+        """生成参与者, 生成点被占用时抛出RuntimeError"""
+        if blueprint.id.startswith('vehicle.') or blueprint.id.startswith('walker.'):
+            if attach_to is None and self._occupied(transform.location, blueprint.extent):
+                raise RuntimeError("Spawn failed because of collision at spawn position")
+            cls = Vehicle if blueprint.id.startswith('vehicle.') else Walker
+        elif blueprint.id.startswith('sensor.'):
+            cls = Sensor
+        elif blueprint.id == 'controller.ai.walker':
+            cls = WalkerAIController
+        else:
+            cls = Actor
+        actor = self._create_actor(cls, blueprint, transform, attach_to)
+        if isinstance(actor, Sensor):
+            actor.model = self._create_sensor_model(actor)
+        return actor
+
+    def try_spawn_actor(self, blueprint, transform: Transform, attach_to: Actor = None,
+                        attachment_type=None) -> Optional[Actor]:
+        try:
+            return self.spawn_actor(blueprint, transform, attach_to, attachment_type)
+        except RuntimeError:
+            return None
+
+    def _create_actor(self, cls, blueprint, transform: Transform, parent: Actor = None) -> Actor:
+        with self._lock:
+            actor = cls(self, self._next_actor_id, blueprint, transform, parent)
+            self._actors[actor.id] = actor
+            self._next_actor_id += 1
+        return actor
+
+    def _create_sensor_model(self, sensor: Sensor):
+        """按传感器类型创建合成数据模型"""
+        attributes = sensor.attributes
+        mount = sensor._transform
+        height = mount.location.z + (sensor.parent.bounding_box.extent.z if sensor.parent else 0.0)
+        if sensor.type_id.startswith('sensor.camera.'):
+            return CameraModel(sensor.type_id, attributes, height, mount.rotation.pitch, self._rng)
+        if sensor.type_id == 'sensor.lidar.ray_cast':
+            return LidarModel(attributes, height, self._rng)
+        if sensor.type_id == 'sensor.other.gnss':
+            return GnssModel(attributes, self._rng)
+        if sensor.type_id == 'sensor.other.imu':
+            return ImuModel(attributes, self._rng)
+        return None
+
+    def _occupied(self, location: Location, extent: Vector3D) -> bool:
+        """生成位置附近是否已有车辆或行人"""
+        radius = math.hypot(extent.x, extent.y)
+        for actor in self._actors.values():
+            if isinstance(actor, (Vehicle, Walker)) and actor.parent is None:
+                other = actor.bounding_box.extent
+                reach = radius + math.hypot(other.x, other.y)
+                if actor.get_location().distance_2d(location) < reach:
+                    return True
+        return False
+
+    def _destroy_actor(self, actor: Actor) -> bool:
+        with self._lock:
+            if self._actors.pop(actor.id, None) is None:
+                return False
+            actor.is_alive = False
+            if isinstance(actor, Sensor):
+                actor.stop()
+            # 挂载在其上的传感器和控制器一并销毁
+            for child in [a for a in self._actors.values() if a.parent is actor]:
+                self._destroy_actor(child)
+            self._lanes.pop(actor.id, None)
+        return True
+
+    # ---- 仿真推进 ----
+    def tick(self, seconds: float = 10.0) -> int:
+        """推进一帧, 返回帧号"""
+        return self._advance().frame
+
+    def wait_for_tick(self, seconds: float = 10.0) -> WorldSnapshot:
+        """异步模式下等待服务器的下一帧"""
+        if self._settings.synchronous_mode:
+            # 同步模式下没有其他客户端推进仿真
+            raise RuntimeError(
+                f"time-out of {int(seconds * 1000)}ms while waiting for the simulator")
+        return self._advance()
+
+    def _advance(self) -> WorldSnapshot:
+        dt = self._settings.fixed_delta_seconds or SETTINGS['default_delta_seconds']
+        with self._lock:
+            self._frame += 1
+            self._elapsed += dt
+            self._timestamp = Timestamp(self._frame, self._elapsed, dt, time.time())
+            actors = list(self._actors.values())
+
+            for actor in actors:
+                if isinstance(actor, WalkerAIController):
+                    actor._step(dt)
+            for actor in actors:
+                if isinstance(actor, (Vehicle, Walker)):
+                    actor._step(dt)
+            self._server.replay_step(self, self._elapsed)
+
+            events = self._detect_collisions(actors) + self._detect_lane_invasions(actors)
+            self._snapshot = WorldSnapshot(self.id, self._timestamp,
+                                           {actor.id: ActorSnapshot(actor) for actor in actors})
+            self._server.record(self._timestamp, actors)
+
+            measurements = [(sensor, self._measure(sensor, dt)) for sensor in actors
+                            if isinstance(sensor, Sensor) and sensor.is_listening
+                            and sensor.model is not None and sensor._due(self._elapsed)]
+
+        for sensor, data in measurements + events:
+            self._server.dispatch(sensor, data)
+        for callback in list(self._on_tick.values()):
+            callback(self._snapshot)
+
+        if SETTINGS['tick_latency'] > 0:
+            time.sleep(SETTINGS['tick_latency'])
+        return self._snapshot
+
+    def _measure(self, sensor: Sensor, dt: float):
+        """生成一帧传感器数据"""
+        frame, elapsed = self._frame, self._elapsed
+        transform = sensor.get_transform()
+        model = sensor.model
+        if isinstance(model, CameraModel):
+            distance = getattr(sensor.parent, 'distance_traveled', 0.0)
+            image = model.measure(distance)
+            return Image(frame, elapsed, transform, model.width, model.height, model.fov,
+                         image.reshape(-1).data)
+        if isinstance(model, LidarModel):
+            points, counts, angle = model.measure(dt)
+            return LidarMeasurement(frame, elapsed, transform, model.channels, angle,
+                                    points.reshape(-1).data, counts)
+        if isinstance(model, GnssModel):
+            geolocation = self._map.transform_to_geolocation(transform.location)
+            latitude, longitude, altitude = model.measure(geolocation)
+            return GnssMeasurement(frame, elapsed, transform, latitude, longitude, altitude)
+        if isinstance(model, ImuModel):
+            accelerometer, gyroscope, compass = model.measure(
+                transform, sensor.get_acceleration(), sensor.get_angular_velocity())
+            return IMUMeasurement(frame, elapsed, transform, accelerometer, gyroscope, compass)
+        return None
+
+    def _event_sensors(self, actors: List[Actor], type_id: str) -> Dict[int, List[Sensor]]:
+        sensors = {}
+        for actor in actors:
+            if isinstance(actor, Sensor) and actor.type_id == type_id and actor.is_listening:
+                sensors.setdefault(actor.parent.id if actor.parent else 0, []).append(actor)
+        return sensors
+
+    def _detect_collisions(self, actors: List[Actor]) -> list:
+        """按包围圆检测车辆和行人之间的接触, 新接触时产生碰撞事件"""
+        sensors = self._event_sensors(actors, 'sensor.other.collision')
+        bodies = [a for a in actors if isinstance(a, (Vehicle, Walker)) and a.parent is None]
+        contacts, events = set(), []
+        for i, first in enumerate(bodies):
+            first_location = first._transform.location
+            first_radius = 0.5 * (first.bounding_box.extent.x + first.bounding_box.extent.y)
+            for second in bodies[i + 1:]:
+                second_radius = 0.5 * (second.bounding_box.extent.x + second.bounding_box.extent.y)
+                distance = first_location.distance_2d(second._transform.location)
+                if distance >= first_radius + second_radius:
+                    continue
+                contacts.add((first.id, second.id))
+                if (first.id, second.id) in self._contacts:
+                    continue
+                relative = first.get_velocity() - second.get_velocity()
+                for actor, other, sign in ((first, second, 1.0), (second, first, -1.0)):
+                    mass = actor.get_physics_control().mass if isinstance(actor, Vehicle) else 80.0
+                    impulse = relative * (mass * sign)
+                    for sensor in sensors.get(actor.id, []):
+                        events.append((sensor, CollisionEvent(
+                            self._frame, self._elapsed, sensor.get_transform(), actor, other,
+                            impulse)))
+                # 发生碰撞的车辆停下
+                for body in (first, second):
+                    body.set_target_velocity(Vector3D())
+        self._contacts = contacts
+        return events
+
+    def _detect_lane_invasions(self, actors: List[Actor]) -> list:
+        """挂有车道入侵传感器的车辆跨越车道线时产生事件"""
+        sensors = self._event_sensors(actors, 'sensor.other.lane_invasion')
+        events = []
+        for actor_id, actor_sensors in sensors.items():
+            vehicle = self._actors.get(actor_id)
+            if vehicle is None:
+                continue
+            _, _, lane_id = self._map.locate(vehicle._transform.location)
+            previous = self._lanes.get(actor_id)
+            self._lanes[actor_id] = lane_id
+            if previous is None or lane_id is None or lane_id == previous:
+                continue
+            markings = self._crossed_markings(previous, lane_id)
+            for sensor in actor_sensors:
+                events.append((sensor, LaneInvasionEvent(
+                    self._frame, self._elapsed, sensor.get_transform(), vehicle, markings)))
+        return events
+
+    @staticmethod
+    def _crossed_markings(from_lane: int, to_lane: int) -> list:
+        order = (-3, -2, -1, 1, 2, 3)
+        a, b = order.index(from_lane), order.index(to_lane)
+        step = 1 if b > a else -1
+        return [marking_between(order[i], order[i + step]) for i in range(a, b, step)]
+
+    def _traffic_manager_speed(self, vehicle: Vehicle) -> float:
+        return self._server.get_trafficmanager(vehicle._tm_port).target_speed(vehicle)
+
+
+class _Server:
+    """一个host:port对应的模拟服务器状态, 同进程内的多个Client共享"""
+    def __init__(self, port: int):
+        self.port = port
+        self._episode = 0
+        self._traffic_managers = {}
+        self._recorder = None
+        self._replay = None
+        self._dispatch_queue = None
+        self.world = World(self, AVAILABLE_MAPS[0].split('/Game/')[-1])
+
+    def next_episode_id(self) -> int:
+        self._episode += 1
+        return self._episode
+
+    def load_world(self, map_name: str) -> World:
+        for actor in list(self.world._actors.values()):
+            actor.is_alive = False
+        if map_name.startswith('Carla/Maps/'):
+            name = map_name
+        else:
+            name = f'Carla/Maps/{map_name.split("/")[-1]}'
+        self.world = World(self, name)
+        return self.world
+
+    def get_trafficmanager(self, port: int) -> TrafficManager:
+        if port not in self._traffic_managers:
+            self._traffic_managers[port] = TrafficManager(port)
+        return self._traffic_managers[port]
+
+    def dispatch(self, sensor: Sensor, data):
+        """回调传感器, async_sensors时交给后台线程"""
+        callback = sensor._callback
+        if callback is None:
+            return
+        if not SETTINGS['async_sensors']:
+            callback(data)
+            return
+        if self._dispatch_queue is None:
+            self._dispatch_queue = queue.SimpleQueue()
+            threading.Thread(target=self._dispatch_loop, daemon=True).start()
+        self._dispatch_queue.put((callback, data))
+
+    def _dispatch_loop(self):
+        while True:
+            callback, data = self._dispatch_queue.get()
+            callback(data)
+
+    # ---- 记录与回放 ----
+    def start_recorder(self, filename: str, additional_data: bool = False) -> str:
+        self._recorder = _Recorder(filename, self.world.get_map().name)
+        return filename
+
+    def stop_recorder(self):
+        if self._recorder is not None:
+            self._recorder.save()
+            self._recorder = None
+
+    def record(self, timestamp: Timestamp, actors: List[Actor]):
+        if self._recorder is not None:
+            self._recorder.record(timestamp,
+                                  [a for a in actors if isinstance(a, (Vehicle, Walker))])
+
+    def replay_file(self, filename: str, start: float, duration: float, follow_id: int,
+                    replay_sensors: bool = False) -> str:
+        recording = _load_recording(filename)
+        frames = recording['frames']
+        if not frames:
+            return f"Replaying file: {filename}\nNo frames recorded"
+        t0 = frames[0][1]
+        begin = t0 + (start if start >= 0 else frames[-1][1] - t0 + start)
+        end = begin + duration if duration > 0 else math.inf
+        frames = [f for f in frames if begin <= f[1] <= end]
+
+        # 回放参与者按记录的类型生成, 不参与物理模拟
+        library = self.world.get_blueprint_library()
+        actors = {}
+        for actor_id, type_id in recording['actors'].items():
+            try:
+                blueprint = library.find(type_id)
+            except IndexError:
+                continue
+            actor = self.world._create_actor(Vehicle if type_id.startswith('vehicle.') else Walker,
+                                             blueprint, Transform())
+            actor.set_simulate_physics(False)
+            actors[actor_id] = actor
+        self._replay = {'frames': frames, 'actors': actors, 'cursor': 0}
+        return (f"Replaying file: {filename}\nReplaying from {begin - t0:.2f} s "
+                f"- {min(end, frames[-1][1] if frames else begin) - t0:.2f} s")
+
+    def replay_step(self, world: World, elapsed: float):
+        """回放时每帧应用一帧记录的位姿"""
+        replay = self._replay
+        if replay is None or world is not self.world:
+            return
+        if replay['cursor'] >= len(replay['frames']):
+            self._replay = None
+            return
+        _, _, ids, poses = replay['frames'][replay['cursor']]
+        replay['cursor'] += 1
+        for actor_id, pose in zip(ids.tolist(), poses.tolist()):
+            actor = replay['actors'].get(actor_id)
+            if actor is not None and actor.is_alive:
+                actor.set_transform(Transform(Location(*pose[:3]), Rotation(*pose[3:])))
+
+    def stop_replayer(self, keep_actors: bool = False):
+        if self._replay is not None and not keep_actors:
+            for actor in self._replay['actors'].values():
+                actor.destroy()
+        self._replay = None
+
+    def show_recorder_file_info(self, filename: str, show_all: bool = False) -> str:
+        recording = _load_recording(filename)
+        frames = recording['frames']
+        duration = frames[-1][1] - frames[0][1] if frames else 0.0
+        lines = [
+            f"Version: {recording['version']}",
+            f"Map: {recording['map']}",
+            f"Date: {recording['date']}",
+            "",
+        ]
+        if show_all:
+            for frame, elapsed, ids, _ in frames:
+                lines.append(f"Frame {frame} at {elapsed - frames[0][1]:.4f} seconds "
+                             f"({len(ids)} actors)")
+        else:
+            for actor_id, type_id in recording['actors'].items():
+                lines.append(f" Create {actor_id}: {type_id}")
+        lines += ["", f"Frames: {len(frames)}", f"Duration: {duration:.4f} seconds"]
+        return "\n".join(lines)
+
+    def show_recorder_collisions(self, filename: str, category1: str = 'a',
+                                 category2: str = 'a') -> str:
+        recording = _load_recording(filename)
+        return f"Version: {recording['version']}\nMap: {recording['map']}\n\nCollisions: 0"
+
+
+_SERVERS: Dict[tuple, _Server] = {}
+
+
+class Client:
+    """客户端, 同一host:port的客户端共享同一个模拟服务器"""
+    def __init__(self, host: str = 'localhost', port: int = 2000, worker_threads: int = 0):
+        key = (host, int(port))
+        if key not in _SERVERS:
+            _SERVERS[key] = _Server(int(port))
+        self._server = _SERVERS[key]
+        self._timeout = 5.0
+
+    def set_timeout(self, seconds: float):
+        self._timeout = seconds
+
+    def get_client_version(self) -> str:
+        return '0.9.13-fake'
+
+    def get_server_version(self) -> str:
+        return '0.9.13-fake'
+
+    def get_world(self) -> World:
+        return self._server.world
+
+    def load_world(self, map_name: str, reset_settings: bool = True, map_layers=None) -> World:
+        return self._server.load_world(map_name)
+
+    def reload_world(self, reset_settings: bool = True) -> World:
+        return self._server.load_world(self._server.world.get_map().name)
+
+    def get_available_maps(self) -> List[str]:
+        return list(AVAILABLE_MAPS)
+
+    def get_trafficmanager(self, client_connection: int = 8000) -> TrafficManager:
+        return self._server.get_trafficmanager(client_connection)
+
+    def apply_batch(self, commands: list):
+        self.apply_batch_sync(commands)
+
+    def apply_batch_sync(self, commands: list, do_tick: bool = False) -> List[_command.Response]:
+        world = self._server.world
+        responses = [cmd.execute(world) for cmd in commands]
+        if do_tick:
+            world.tick()
+        return responses
+
+    def start_recorder(self, filename: str, additional_data: bool = False) -> str:
+        return self._server.start_recorder(filename, additional_data)
+
+    def stop_recorder(self):
+        self._server.stop_recorder()
+
+    def replay_file(self, name: str, time_start: float, duration: float, follow_id: int,
+                    replay_sensors: bool = False) -> str:
+        return self._server.replay_file(name, time_start, duration, follow_id, replay_sensors)
+
+    def stop_replayer(self, keep_actors: bool = False):
+        self._server.stop_replayer(keep_actors)
+
+    def set_replayer_time_factor(self, time_factor: float = 1.0):
+        pass
+
+    def show_recorder_file_info(self, filename: str, show_all: bool = False) -> str:
+        return self._server.show_recorder_file_info(filename, show_all)
+
+    def show_recorder_collisions(self, filename: str, category1: str = 'a',
+                                 category2: str = 'a') -> str:
+        return self._server.show_recorder_collisions(filename, category1, category2)
+
+    def show_recorder_actors_blocked(self, filename: str, min_time: float = 60.0,
+                                     min_distance: float = 100.0) -> str:
+        return self._server.show_recorder_collisions(filename)
@@ -9,18 +9,22 @@ __license__ = "MIT"
 from typing import Dict, Any
 import logging
 
+from src.utils.lazy import lazy_module
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-# 导出主要接口
-from .environments import CarlaEnv
-from .algorithms import BaseAlgorithm
-from .training import TrainManager
-from .evaluation import ModelEvaluator
-from .visualization import Dashboard
+# 导出主要接口; 访问时才导入对应模块, 避免 import src 时加载carla/torch等重依赖
+_LAZY_IMPORTS = {
+    'CarlaEnv': 'src.environments.carla_env',
+    'BaseAlgorithm': 'src.algorithms.base',
+    'TrainManager': 'src.training.train_manager',
+    'ModelEvaluator': 'src.utils.evaluator',
+    'Dashboard': 'src.visualization.dashboard.dashboard'
+}
 
 __all__ = [
     'CarlaEnv',
@@ -28,4 +32,6 @@ __all__ = [
     'TrainManager',
     'ModelEvaluator',
     'Dashboard'
-] 
\ No newline at end of file
+]
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
@@ -1,9 +1,13 @@
 """算法模块"""
-from .base import BaseAlgorithm
-from .registry import ALGORITHM_REGISTRY, register_algorithm
+from src.utils.lazy import lazy_module
 
-__all__ = [
-    'BaseAlgorithm',
-    'ALGORITHM_REGISTRY',
-    'register_algorithm'
-] 
\ No newline at end of file
+# 导出名称 -> 所在模块, 访问时才导入, 避免加载包时引入重依赖
+_LAZY_IMPORTS = {
+    'BaseAlgorithm': 'src.algorithms.base',
+    'ALGORITHM_REGISTRY': 'src.algorithms.registry',
+    'register_algorithm': 'src.algorithms.registry'
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
@@ -6,6 +6,8 @@ from torch.utils.tensorboard import SummaryWriter
 import os
 import time
 
+from src.utils.timing import stage_timer
+
 
 class BaseTrainer(ABC):
     """训练器基类"""
@@ -42,7 +44,8 @@ class BaseTrainer(ABC):
             
             while True:
                 # 选择动作
-                action = self.agent.predict(state)
+                with stage_timer.span('agent.predict'):
+                    action = self.agent.predict(state)
                 
                 # 执行动作
                 next_state, reward, done, info = self.env.step(action)
@@ -1,10 +1,12 @@
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import torch
 from collections import deque
 
 
 from src.algorithms.base.trainer import BaseTrainer
+from src.environments.shared_obs import copy_obs
+from src.utils.timing import stage_timer
 
 
 class PPOTrainer(BaseTrainer):
@@ -16,6 +18,9 @@ class PPOTrainer(BaseTrainer):
         self.n_steps = config.get('n_steps', 2048)
         self.batch_size = config.get('batch_size', 64)
         
+        # 并行环境数量, VecCarlaEnv下每次step收集num_envs条经验
+        self.n_envs = getattr(env, 'num_envs', 1)
+        
         # 经验缓冲区
         self.buffer = {
             'states': [],
@@ -36,12 +41,114 @@ class PPOTrainer(BaseTrainer):
         self.buffer['states'].append(state)
         self.buffer['actions'].append(action)
         self.buffer['rewards'].append(reward)
-        self.buffer['values'].append(value.cpu().numpy())
+        self.buffer['values'].append(value.cpu().numpy().squeeze(-1))
         self.buffer['dones'].append(done)
         
     def should_update(self, step: int) -> bool:
         """是否应该更新"""
-        return len(self.buffer['states']) >= self.n_steps
+        return len(self.buffer['states']) * self.n_envs >= self.n_steps
+        
+    def train(self):
+        """训练主循环"""
+        if self.n_envs == 1:
+            return super().train()
+            
+        step = 0
+        episode = 0
+        episode_rewards = np.zeros(self.n_envs)
+        episode_lengths = np.zeros(self.n_envs, dtype=np.int64)
+        states = self.env.reset()
+        
+        while step < self.total_steps:
+            # 在所有环境上同时收集n_steps条经验
+            states, finished = self.collect_rollouts(states, episode_rewards, episode_lengths)
+            collected = len(self.buffer['states']) * self.n_envs
+            step += collected
+            
+            # 记录完成的回合
+            for reward, length in finished:
+                self.log_episode(episode, reward, length)
+                episode += 1
+                
+            # 更新智能体
+            metrics = self.update()
+            self.log_update(step, metrics)
+            
+            # 评估 (评估会打断训练环境, 之后需重新reset)
+            if self._crossed(step, collected, self.eval_interval):
+                eval_metrics = self.evaluate()
+                self.log_eval(step, eval_metrics)
+                states = self.env.reset()
+                episode_rewards[:] = 0
+                episode_lengths[:] = 0
+                
+            # 保存模型
+            if self._crossed(step, collected, self.save_interval):
+                self.save_checkpoint(step)
+                
+        # 训练结束,保存最终模型
+        self.save_checkpoint('final')
+        
+    def collect_rollouts(self, states, episode_rewards: np.ndarray,
+                         episode_lengths: np.ndarray) -> Tuple[Dict, List]:
+        """在向量化环境上批量收集n_steps条经验, 返回最新观测和完成回合的(奖励, 长度)"""
+        finished = []
+        
+        while len(self.buffer['states']) * self.n_envs < self.n_steps:
+            with stage_timer.span('agent.predict'):
+                actions = self.agent.predict(states)
+            next_states, rewards, dones, infos = self.env.step(actions)
+            if getattr(self.env, 'shared_memory', False):
+                # 共享内存视图会被后续step覆盖, 存入缓冲区前需复制
+                states = copy_obs(states)
+            self.store_transition(states, actions, rewards, next_states, dones, infos)
+            
+            episode_rewards += rewards
+            episode_lengths += 1
+            for i in np.flatnonzero(dones):
+                finished.append((episode_rewards[i], episode_lengths[i]))
+                episode_rewards[i] = 0
+                episode_lengths[i] = 0
+                
+            # 环境在done时已自动重置
+            states = next_states
+            
+        return states, finished
+        
+    def evaluate(self, n_episodes=10) -> Dict:
+        """评估智能体"""
+        if self.n_envs == 1:
+            return super().evaluate(n_episodes)
+            
+        rewards = []
+        lengths = []
+        successes = 0
+        episode_rewards = np.zeros(self.n_envs)
+        episode_lengths = np.zeros(self.n_envs, dtype=np.int64)
+        states = self.env.reset()
+        
+        while len(rewards) < n_episodes:
+            actions = self.agent.predict(states)
+            states, reward, dones, infos = self.env.step(actions)
+            episode_rewards += reward
+            episode_lengths += 1
+            
+            for i in np.flatnonzero(dones):
+                rewards.append(episode_rewards[i])
+                lengths.append(episode_lengths[i])
+                successes += int(infos[i].get('success', False))
+                episode_rewards[i] = 0
+                episode_lengths[i] = 0
+                
+        return {
+            'eval/mean_reward': np.mean(rewards[:n_episodes]),
+            'eval/mean_length': np.mean(lengths[:n_episodes]),
+            'eval/success_rate': successes / len(rewards)
+        }
+        
+    def _crossed(self, step: int, collected: int, interval: int) -> bool:
+        """本轮收集是否跨过了interval的整数倍"""
+        return step // interval != (step - collected) // interval
         
     def update(self) -> Dict:
         """更新模型"""
@@ -58,6 +165,13 @@ class PPOTrainer(BaseTrainer):
             'log_probs': np.array(self.buffer['log_probs'])
         }
         
+        # 向量化环境: (n_steps, n_envs, ...) 展平为 (n_steps * n_envs, ...)
+        if self.n_envs > 1:
+            train_data = {
+                key: value.reshape(-1, *value.shape[2:]) if value.ndim >= 2 else value
+                for key, value in train_data.items()
+            }
+        
         # 清空缓冲区
         self.buffer = {key: [] for key in self.buffer.keys()}
         
@@ -77,7 +191,7 @@ class PPOTrainer(BaseTrainer):
             last_state = self.buffer['states'][-1]
             last_state_tensor = torch.FloatTensor(last_state).to(self.agent.device)
             _, last_value = self.agent.network(last_state_tensor)
-            last_value = last_value.cpu().numpy()
+            last_value = last_value.cpu().numpy().squeeze(-1)
             
         # 计算GAE
         advantages = np.zeros_like(rewards)
@@ -12,8 +12,11 @@ class DataCollector:
         self.save_dir = Path(config['save_dir'])
         self.save_dir.mkdir(parents=True, exist_ok=True)
         
-        # 数据缓存
+        # 数据缓存; dedup_next_obs为True时不保存每步的next_obs(回合内就是下一步的obs),
+        # 只另存回合的最后一个观测final_obs, 用load_episode还原
+        self.dedup_next_obs = config.get('dedup_next_obs', False)
         self.episode_buffer = []
+        self.final_obs = None
         self.current_episode = 0
         
     def collect(self, obs: Dict, action: np.ndarray, reward: float, 
@@ -23,11 +26,13 @@ class DataCollector:
             'obs': obs,
             'action': action,
             'reward': reward,
-            'next_obs': next_obs,
             'done': done,
             'info': info
         }
+        if not self.dedup_next_obs:
+            data['next_obs'] = next_obs
         self.episode_buffer.append(data)
+        self.final_obs = next_obs
         
         if done:
             self._save_episode()
@@ -52,9 +57,40 @@ class DataCollector:
                 step_group.create_dataset("reward", data=data['reward'])
                 
                 # 保存下一个观测
-                for key, value in data['next_obs'].items():
+                for key, value in data.get('next_obs', {}).items():
                     step_group.create_dataset(f"next_obs/{key}", data=value)
                     
                 # 保存其他信息
                 step_group.create_dataset("done", data=data['done'])
-                step_group.attrs['info'] = json.dumps(data['info']) 
\ No newline at end of file
+                step_group.attrs['info'] = json.dumps(data['info'])
+                
+            # 第i步的next_obs为第i+1步的obs, 最后一步的next_obs为final_obs
+            if self.dedup_next_obs:
+                for key, value in self.final_obs.items():
+                    f.create_dataset(f"final_obs/{key}", data=value)
+                
+                
+def load_episode(episode_path) -> List[Dict]:
+    """读取回合数据; dedup_next_obs格式的回合按下标还原每一步的next_obs"""
+    def read(group) -> Dict:
+        return {key: value[()] for key, value in group.items()}
+
+    with h5py.File(episode_path, 'r') as f:
+        steps = sorted(name for name in f.keys() if name.startswith('step_'))
+        observations = [read(f[f"{name}/obs"]) for name in steps]
+        if 'final_obs' in f:
+            next_observations = observations[1:] + [read(f['final_obs'])]
+        else:
+            next_observations = [read(f[f"{name}/next_obs"]) for name in steps]
+        episode = []
+        for i, name in enumerate(steps):
+            group = f[name]
+            episode.append({
+                'obs': observations[i],
+                'action': group['action'][()],
+                'reward': group['reward'][()],
+                'next_obs': next_observations[i],
+                'done': group['done'][()],
+                'info': json.loads(group.attrs['info'])
+            })
+    return episode
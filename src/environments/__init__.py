@@ -1,11 +1,17 @@
 """环境模块"""
-from .carla_env import CarlaEnv
-from src.environments.sensors.sensor_manager import SensorManager
-from src.environments.tasks.task_registry import TaskRegistry, register_task
+from src.utils.lazy import lazy_module
 
-__all__ = [
-    'CarlaEnv',
-    'SensorManager',
-    'TaskRegistry',
-    'register_task'
-] 
\ No newline at end of file
+# 导出名称 -> 所在模块, 访问时才导入, 避免加载包时引入重依赖
+_LAZY_IMPORTS = {
+    'CarlaEnv': 'src.environments.carla_env',
+    'SensorManager': 'src.environments.sensors.sensor_manager',
+    'TaskRegistry': 'src.environments.tasks.task_registry',
+    'register_task': 'src.environments.tasks.task_registry',
+    'VecCarlaEnv': 'src.environments.vec_env',
+    'make_vec_env': 'src.environments.vec_env',
+    'StubEnv': 'src.environments.stub_env'
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
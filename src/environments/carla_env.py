@@ -7,7 +7,19 @@ import time
 
 import gym
 
-from src.environments.sensors.sensor_manager import SensorManager
+from src.environments.sensors.manager import SensorManager
+from src.utils.timing import stage_timer
+
+
+# 每帧车辆状态快照的紧凑结构化布局
+VEHICLE_STATE_DTYPE = np.dtype([
+    ('frame', np.int64),
+    ('position', np.float32, (3,)),           # x, y, z
+    ('rotation', np.float32, (3,)),           # roll, pitch, yaw
+    ('velocity', np.float32, (3,)),
+    ('angular_velocity', np.float32, (3,)),
+    ('acceleration', np.float32, (3,))
+])
 
 
 class CarlaEnv:
@@ -31,8 +43,32 @@ class CarlaEnv:
         if 'weather' in config:
             self.world.set_weather(self._get_weather(config['weather']))
             
+        # 环境配置
+        self.sync_mode = config.get('sync_mode', True)  # 同步/异步模式
+        self.delta_seconds = config.get('delta_seconds', 0.05)  # 仿真步长
+        self.frame_skip = config.get('frame_skip', 1)  # 跳帧数
+        self.warm_reset = config.get('warm_reset', False)  # 复用车辆和传感器的快速重置
+        if config.get('stage_timing', False):
+            stage_timer.enable()  # 分阶段耗时统计, 见src/utils/timing.py
+        if self.sync_mode:
+            self._apply_sync_settings()
+            
         # 初始化传感器
-        self.sensor_manager = SensorManager(config.get('sensors', {}))
+        self.sensor_manager = SensorManager(config.get('sensors', {}), self.delta_seconds)
+        self.reserved_frames = 0  # reserve_frames要求的相机帧缓冲槽位数, 重建传感器时保留
+        self.frame = None  # 当前仿真帧号
+        
+        # 车辆状态快照缓存, 按帧号失效
+        self._vehicle_state = np.zeros((), dtype=VEHICLE_STATE_DTYPE)
+        self._vehicle_state['frame'] = -1
+        
+        # 每步服务器调用计数
+        self.rpc_count = 0
+        
+        # 地图生成点和车辆蓝图缓存
+        self._spawn_points = None
+        self._vehicle_blueprints = None
+        self.reset_latency = 0.0  # 最近一次reset耗时(秒)
         
         # 初始化车辆
         self.vehicle = None
@@ -45,11 +81,6 @@ class CarlaEnv:
         self._done = False
         self._info = {}
         
-        # 环境配置
-        self.sync_mode = config.get('sync_mode', True)  # 同步/异步模式
-        self.delta_seconds = config.get('delta_seconds', 0.05)  # 仿真步长
-        self.frame_skip = config.get('frame_skip', 1)  # 跳帧数
-        
         # 动作空间配置
         self.continuous_actions = config.get('continuous_actions', True)
         self.action_space = self._create_action_space()
@@ -114,47 +145,150 @@ class CarlaEnv:
 
     def reset(self) -> Dict:
         """重置环境"""
-        # 清理现有对象
-        self._cleanup()
-        
-        # 生成车辆
-        self._spawn_vehicle()
-        
-        # 设置传感器
-        self.sensor_manager.setup_sensors(self.world, self.vehicle)
-        
-        # 等待传感器初始化
-        time.sleep(0.5)
+        start_time = time.perf_counter()
+        
+        if self.warm_reset and self.vehicle is not None and self.vehicle.is_alive:
+            # 快速重置: 传送现有车辆, 复用传感器
+            self._warm_reset()
+        else:
+            # 清理现有对象
+            self._cleanup()
+            
+            # 生成车辆
+            self._spawn_vehicle()
+            
+            # 设置传感器
+            self.sensor_manager.setup_sensors(self.world, self.vehicle)
+            
+        # 推进一帧并等待所有传感器送达该帧数据
+        self.frame = self._tick()
+        self.sensor_manager.wait_for_frame(self.frame)
         
         # 获取初始观测
         obs = self._get_obs()
         
+        self.reset_latency = time.perf_counter() - start_time
         return obs
         
-    def step(self, action: np.ndarray) -> Tuple[Dict, float, bool, Dict]:
-        """环境步进"""
-        # 执行动作
-        self._apply_action(action)
-        
-        # 更新世界
-        self.world.tick()
-        
-        # 获取观测和奖励
-        obs = self._get_obs()
-        reward = self._get_reward()
-        done = self._is_done()
-        info = self._get_info()
+    def step(self, action: np.ndarray, compute_obs: bool = True,
+             process_obs: bool = True) -> Tuple[Dict, float, bool, Dict]:
+        """环境步进
+
+        compute_obs为False时跳过传感器等待和观测处理, 返回的obs为None,
+        用于跳帧时的中间帧; process_obs为False时返回未处理的原始观测,
+        之后可在其他线程中调用process_obs处理。
+        """
+        self.rpc_count = 0
+        
+        with stage_timer.span('env.step'):
+            # 执行动作
+            with stage_timer.span('env.apply_action'):
+                self._apply_action(action)
+            
+            # 更新世界, 并等待传感器送达本帧数据
+            with stage_timer.span('env.tick'):
+                self.frame = self._tick()
+            obs = None
+            if compute_obs:
+                with stage_timer.span('env.sensor_wait'):
+                    self.sensor_manager.wait_for_frame(self.frame)
+                    
+                # 获取观测
+                with stage_timer.span('env.get_obs'):
+                    obs = self._get_obs(process_obs)
+                    
+            # 奖励和终止判断
+            with stage_timer.span('env.reward'):
+                reward = self._get_reward()
+                done = self._is_done()
+                info = self._get_info()
         
         return obs, reward, done, info
         
+    def _apply_sync_settings(self):
+        """开启服务器同步模式"""
+        settings = self.world.get_settings()
+        settings.synchronous_mode = True
+        settings.fixed_delta_seconds = self.delta_seconds
+        self.world.apply_settings(settings)
+        
+    def _tick(self) -> int:
+        """推进仿真并返回当前帧号"""
+        if self.sync_mode:
+            return self._rpc(self.world.tick)
+        return self._rpc(self.world.wait_for_tick).frame
+        
+    def _rpc(self, func, *args, **kwargs):
+        """调用服务器接口并计数"""
+        self.rpc_count += 1
+        return func(*args, **kwargs)
+        
+    def _get_vehicle_state(self) -> np.ndarray:
+        """获取当前帧的车辆状态快照, 同一帧内只查询一次服务器"""
+        state = self._vehicle_state
+        if self.frame is not None and state['frame'] == self.frame:
+            return state
+            
+        # 从世界快照一次性读取车辆的全部运动状态
+        snapshot = self._rpc(self.world.get_snapshot)
+        source = snapshot.find(self.vehicle.id)
+        if source is None:
+            # 快照中找不到车辆时退回逐项查询
+            source = self.vehicle
+            self.rpc_count += 4
+            
+        transform = source.get_transform()
+        velocity = source.get_velocity()
+        angular_velocity = source.get_angular_velocity()
+        acceleration = source.get_acceleration()
+        
+        state['frame'] = snapshot.frame if self.frame is None else self.frame
+        state['position'] = (transform.location.x, transform.location.y, transform.location.z)
+        rotation = transform.rotation
+        state['rotation'] = (rotation.roll, rotation.pitch, rotation.yaw)
+        state['velocity'] = (velocity.x, velocity.y, velocity.z)
+        state['angular_velocity'] = (angular_velocity.x, angular_velocity.y, angular_velocity.z)
+        state['acceleration'] = (acceleration.x, acceleration.y, acceleration.z)
+        
+        return state
+        
+    def _warm_reset(self):
+        """传送车辆到新的生成点并清零运动状态"""
+        spawn_point = np.random.choice(self._get_spawn_points())
+        self.vehicle.set_transform(spawn_point)
+        self.vehicle.set_target_velocity(carla.Vector3D(0.0, 0.0, 0.0))
+        self.vehicle.set_target_angular_velocity(carla.Vector3D(0.0, 0.0, 0.0))
+        self.vehicle.apply_control(carla.VehicleControl())
+        
+        # 传感器配置变化时才重建传感器
+        sensor_config = self.config.get('sensors', {})
+        if self.sensor_manager.config_changed(sensor_config):
+            self.sensor_manager.cleanup()
+            self.sensor_manager = SensorManager(sensor_config, self.delta_seconds)
+            self.sensor_manager.reserve_frames(self.reserved_frames)
+            self.sensor_manager.setup_sensors(self.world, self.vehicle)
+        else:
+            self.sensor_manager.clear_event_buffers()
+            
+    def _get_spawn_points(self) -> list:
+        """获取地图生成点(缓存)"""
+        if self._spawn_points is None:
+            self._spawn_points = self.world.get_map().get_spawn_points()
+        return self._spawn_points
+        
+    def _get_vehicle_blueprints(self) -> list:
+        """获取车辆蓝图(缓存)"""
+        if self._vehicle_blueprints is None:
+            self._vehicle_blueprints = list(self.world.get_blueprint_library().filter('vehicle.*'))
+        return self._vehicle_blueprints
+        
     def _spawn_vehicle(self):
         """生成车辆"""
         # 获取生成点
-        spawn_points = self.world.get_map().get_spawn_points()
-        spawn_point = np.random.choice(spawn_points)
+        spawn_point = np.random.choice(self._get_spawn_points())
         
         # 创建车辆
-        blueprint = np.random.choice(self.world.get_blueprint_library().filter('vehicle.*'))
+        blueprint = np.random.choice(self._get_vehicle_blueprints())
         self.vehicle = self.world.spawn_actor(blueprint, spawn_point)
         
         # 设置车辆物理参数
@@ -184,32 +318,43 @@ class CarlaEnv:
             reverse=False,
             manual_gear_shift=False
         )
-        self.vehicle.apply_control(control)
+        self._rpc(self.vehicle.apply_control, control)
+        
+    def reserve_frames(self, slots: int):
+        """保证相机帧在之后slots-1帧内不被覆盖, 热重置重建传感器后仍然有效"""
+        self.reserved_frames = max(self.reserved_frames, slots)
+        self.sensor_manager.reserve_frames(slots)
+        
+    def get_obs(self, process_obs: bool = True) -> Dict:
+        """等待当前帧传感器数据并获取观测"""
+        if self.frame is not None:
+            self.sensor_manager.wait_for_frame(self.frame)
+        return self._get_obs(process_obs)
+        
+    def process_obs(self, raw_obs: Dict) -> Dict:
+        """处理process_obs=False时得到的原始观测"""
+        if not raw_obs:
+            return raw_obs
+        return {
+            **self.sensor_manager.process_sensor_data(raw_obs),
+            'vehicle_state': raw_obs['vehicle_state']
+        }
         
-    def _get_obs(self) -> Dict:
+    def _get_obs(self, process_obs: bool = True) -> Dict:
         """获取观测"""
         if self.vehicle is None:
             return {}
             
         # 获取传感器数据
-        sensor_data = self.sensor_manager.get_sensor_data()
-        
-        # 获取车辆状态
-        transform = self.vehicle.get_transform()
-        velocity = self.vehicle.get_velocity()
-        angular_velocity = self.vehicle.get_angular_velocity()
-        acceleration = self.vehicle.get_acceleration()
-        
-        # 组合观测
+        if process_obs:
+            sensor_data = self.sensor_manager.get_sensor_data()
+        else:
+            sensor_data = self.sensor_manager.get_raw_data()
+            
+        # 组合观测, 车辆状态为VEHICLE_STATE_DTYPE结构化数组的副本
         obs = {
             **sensor_data,
-            'vehicle_state': {
-                'position': [transform.location.x, transform.location.y, transform.location.z],
-                'rotation': [transform.rotation.roll, transform.rotation.pitch, transform.rotation.yaw],
-                'velocity': [velocity.x, velocity.y, velocity.z],
-                'angular_velocity': [angular_velocity.x, angular_velocity.y, angular_velocity.z],
-                'acceleration': [acceleration.x, acceleration.y, acceleration.z]
-            }
+            'vehicle_state': self._get_vehicle_state().copy()
         }
         
         return obs
@@ -230,10 +375,12 @@ class CarlaEnv:
             return {}
             
         # 获取车辆状态
-        velocity = self.vehicle.get_velocity()
-        speed = 3.6 * np.sqrt(velocity.x**2 + velocity.y**2)  # km/h
+        velocity = self._get_vehicle_state()['velocity']
+        speed = 3.6 * float(np.sqrt(velocity[0]**2 + velocity[1]**2))  # km/h
         
         info = {
+            'frame': self.frame,
+            'rpc_count': self.rpc_count,
             'speed': speed,
             'collision': self._check_collision(),
             'lane_invasion': self._check_lane_invasion(),
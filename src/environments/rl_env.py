@@ -1,20 +1,22 @@
 import gym
 import numpy as np
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, Tuple, Any
 from gym import spaces
 
 from src.environments.carla_env import CarlaEnv
 from src.utils.observation_processor import ObservationProcessor
 from src.utils.reward_calculator import RewardCalculator
+from src.utils.timing import stage_timer
 
 
 class RLEnv(gym.Env):
     """强化学习环境包装器"""
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, env: CarlaEnv = None):
         super().__init__()
         
-        # 创建CARLA环境
-        self.env = CarlaEnv(config)
+        # 创建CARLA环境 (可传入已有的CarlaEnv实例)
+        self.env = env if env is not None else CarlaEnv(config)
         
         # 创建观测和奖励处理器
         self.obs_processor = ObservationProcessor(config.get('observation', {}))
@@ -27,37 +29,70 @@ class RLEnv(gym.Env):
             dtype=np.float32
         )
         
-        # 定义观测空间
-        self.observation_space = spaces.Dict({
-            'camera': spaces.Box(0, 255, (3, 84, 84), dtype=np.uint8),
-            'lidar': spaces.Box(-np.inf, np.inf, (32, 1000, 4), dtype=np.float32),
-            'state': spaces.Box(-np.inf, np.inf, (10,), dtype=np.float32)
-        })
+        # 观测空间与观测处理器的输出一致
+        self.observation_space = self.obs_processor.observation_space()
         
         # 环境参数
         self.frame_skip = config.get('frame_skip', 4)
+        self.max_pool = config.get('max_pool', False)  # 对最后两帧观测取最大值
+        self.max_pool_keys = config.get('max_pool_keys', ['camera'])
         self.time_limit = config.get('time_limit', 1000)
         self.current_step = 0
         
+        # 流水线模式: 后台线程处理第t帧观测, 同时服务器仿真第t+1帧
+        # step返回的观测比reward/info滞后一帧 (一步动作延迟)
+        self.pipeline = config.get('pipeline', False)
+        self._executor = ThreadPoolExecutor(max_workers=1) if self.pipeline else None
+        self._pending = None
+        if self.pipeline:
+            # 后台处理第t帧(及max_pool的t-1帧)期间服务器还会推进frame_skip帧,
+            # 相机帧缓冲池需保证这些原始帧不被覆盖; 没有帧缓冲池的环境无需预留
+            reserve_frames = getattr(self.env, 'reserve_frames', None)
+            if reserve_frames is not None:
+                reserve_frames(self.frame_skip + 2)
+        
     def reset(self) -> Dict[str, np.ndarray]:
         """重置环境"""
+        self._drain_pipeline()
         raw_obs = self.env.reset()
         self.current_step = 0
-        return self.obs_processor.process(raw_obs)
+        obs = self.obs_processor.process(raw_obs)
+        
+        # 第一步返回的仍是初始观测
+        if self.pipeline:
+            self._pending = Future()
+            self._pending.set_result(obs)
+        return obs
         
     def step(self, action: np.ndarray) -> Tuple[Dict[str, np.ndarray], float, bool, Dict]:
-        """环境步进"""
+        """环境步进
+
+        中间帧只获取标量信息用于累积奖励, 图像/激光雷达处理只在
+        最后一帧(开启max_pool时为最后两帧)执行。
+        流水线模式下返回的是上一次step末尾那一帧的观测。
+        """
+        with stage_timer.span('rl_env.step'):
+            return self._step(action)
+            
+    def _step(self, action: np.ndarray) -> Tuple[Dict[str, np.ndarray], float, bool, Dict]:
         total_reward = 0
         done = False
         info = {}
+        raw_obs = None
+        prev_raw_obs = None
         
         # 执行frame_skip次动作
-        for _ in range(self.frame_skip):
-            raw_obs, env_reward, env_done, env_info = self.env.step(action)
+        for i in range(self.frame_skip):
+            # 只有最后一帧(及max_pool需要的倒数第二帧)获取完整观测
+            remaining = self.frame_skip - 1 - i
+            need_obs = remaining == 0 or (self.max_pool and remaining == 1)
+            prev_raw_obs = raw_obs
+            
+            raw_obs, env_reward, env_done, env_info = self.env.step(
+                action, compute_obs=need_obs, process_obs=not self.pipeline)
             
-            # 处理观测和奖励
-            obs = self.obs_processor.process(raw_obs)
-            reward = self.reward_calculator.calculate(raw_obs, action, env_info)
+            # 奖励只依赖动作和info中的标量
+            reward, _ = self.reward_calculator.calculate(raw_obs or {}, action, env_info)
             
             total_reward += reward
             info.update(env_info)
@@ -68,12 +103,53 @@ class RLEnv(gym.Env):
             if done:
                 break
                 
+        # 提前结束时最后一帧可能未获取观测
+        if raw_obs is None:
+            raw_obs = self.env.get_obs(process_obs=not self.pipeline)
+            
+        if not self.pipeline:
+            obs = self._finalize_obs(raw_obs, prev_raw_obs)
+        elif done:
+            # 回合结束时排空流水线, 直接返回终止观测
+            self._drain_pipeline()
+            obs = self._finalize_obs(raw_obs, prev_raw_obs)
+        else:
+            # 取回上一帧的处理结果, 本帧交给后台线程在下一次仿真期间处理
+            obs = self._pending.result()
+            self._pending = self._executor.submit(self._finalize_obs, raw_obs, prev_raw_obs)
+            
         return obs, total_reward, done, info
         
+    def _finalize_obs(self, raw_obs: Dict, prev_raw_obs: Dict = None) -> Dict[str, np.ndarray]:
+        """处理观测, 开启max_pool时与前一帧取最大值"""
+        if self.pipeline:
+            # 流水线模式下传感器解码也放在后台线程
+            raw_obs = self.env.process_obs(raw_obs)
+            if prev_raw_obs is not None:
+                prev_raw_obs = self.env.process_obs(prev_raw_obs)
+                
+        obs = self.obs_processor.process(raw_obs)
+        if self.max_pool and prev_raw_obs is not None:
+            prev_obs = self.obs_processor.process(prev_raw_obs)
+            for key in self.max_pool_keys:
+                if key in obs and key in prev_obs:
+                    obs[key] = np.maximum(obs[key], prev_obs[key])
+                    
+        return obs
+        
+    def _drain_pipeline(self):
+        """等待并丢弃后台未完成的观测处理"""
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+        
     def render(self, mode='human'):
         """渲染环境"""
         return self.env.render(mode)
         
     def close(self):
         """关闭环境"""
+        self._drain_pipeline()
+        if self._executor is not None:
+            self._executor.shutdown()
         self.env.close() 
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""传感器帧缓冲池"""
+from typing import Tuple
+
+import numpy as np
+
+
+class FramePool:
+    """预分配的连续帧数组, 按环形顺序轮流写入
+
+    回调每帧取下一个槽位直接写入, 不再为每帧分配新数组。取出的数组在之后
+    slots-1帧内不会被覆盖, 需要保留更久的使用方应自行复制。
+    """
+    def __init__(self, shape: Tuple[int, ...], dtype=np.uint8, slots: int = 3):
+        if slots < 2:
+            raise ValueError(f"FramePool needs at least 2 slots, got {slots}")
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.frames = np.empty((slots,) + self.shape, dtype=dtype)
+        self._views = list(self.frames)  # 预先创建各槽位视图, 取用时不再生成新对象
+        self._index = -1
+
+    def next(self) -> np.ndarray:
+        """返回下一个可写槽位"""
+        self._index = (self._index + 1) % self.slots
+        return self._views[self._index]
+
+    def matches(self, shape: Tuple[int, ...], slots: int, dtype=np.uint8) -> bool:
+        """形状、类型和槽位数是否与需求一致"""
+        return self.shape == tuple(shape) and self.frames.dtype == dtype and self.slots >= slots
+
+    @property
+    def nbytes(self) -> int:
+        return self.frames.nbytes
@@ -0,0 +1,84 @@
+"""多传感器融合张量布局"""
+from typing import Dict, Optional, Sequence
+
+import torch
+
+from src.environments.sensors.processor import SensorProcessor
+
+# 融合的模态, 默认按此顺序排列通道
+FUSION_MODALITIES = ('rgb', 'depth', 'semantic', 'lidar')
+
+
+class FusionLayout:
+    """融合张量的固定内存布局
+
+    创建时按传感器配置为每种模态分配(C, H, W)张量中的一段通道: RGB 3通道、深度1通道、
+    语义掩码按semantic_classes、激光雷达BEV按lidar_bev_channels并重采样到相机网格。
+    fuse时各处理函数直接写入自己的通道切片, 不再为拼接分配中间张量。
+    """
+    def __init__(self, processor: SensorProcessor, modalities: Optional[Sequence[str]] = None,
+                 sources: Optional[Dict[str, str]] = None):
+        self.processor = processor
+        self.modalities = tuple(modalities or FUSION_MODALITIES)
+        # 模态 -> 传感器数据中的键, 如 {'rgb': 'rgb_front'}
+        self.sources = {modality: modality for modality in self.modalities}
+        self.sources.update(sources or {})
+
+        channels = {
+            'rgb': 3,
+            'depth': 1,
+            'semantic': len(processor.semantic_names),
+            'lidar': len(processor.bev_channels)
+        }
+        self.slices = {}
+        start = 0
+        for modality in self.modalities:
+            if modality not in channels:
+                raise ValueError(
+                    f"Unknown fusion modality '{modality}', expected one of {FUSION_MODALITIES}")
+            self.slices[modality] = slice(start, start + channels[modality])
+            start += channels[modality]
+
+        width, height = processor.img_size
+        self.shape = (start, height, width)
+        self._writers = {
+            'rgb': processor.process_camera,
+            'depth': processor.process_depth,
+            'semantic': processor.semantic_masks,
+            'lidar': processor.process_lidar
+        }
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'FusionLayout':
+        """由传感器配置创建, fusion_modalities和fusion_sources可选"""
+        return cls(SensorProcessor(config), config.get('fusion_modalities'),
+                   config.get('fusion_sources'))
+
+    @property
+    def channels(self) -> int:
+        return self.shape[0]
+
+    def allocate(self, batch_size: Optional[int] = None) -> torch.Tensor:
+        """分配融合张量, 指定batch_size时为(N, C, H, W)"""
+        shape = self.shape if batch_size is None else (batch_size,) + self.shape
+        return torch.empty(shape, dtype=torch.float32, device=self.processor.device)
+
+    def fuse(self, sensor_data: Dict, out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """各模态写入out的通道切片, 缺失的模态置0; 未指定out时新分配"""
+        if out is None:
+            out = self.allocate()
+        for modality, channels in self.slices.items():
+            data = sensor_data.get(self.sources[modality])
+            if data is None:
+                out[channels].zero_()
+            else:
+                self._writers[modality](data, out=out[channels])
+        return out
+
+    def fuse_batch(self, batch: Sequence[Dict], out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """多个环境的传感器数据写入(N, C, H, W), out可在各步之间复用"""
+        if out is None:
+            out = self.allocate(len(batch))
+        for i, sensor_data in enumerate(batch):
+            self.fuse(sensor_data, out[i])
+        return out
@@ -0,0 +1,345 @@
+"""激光雷达点云编码器
+
+同一帧点云的极坐标变换(水平距离、距离、方位角、俯仰角)由PolarTransform计算一次,
+各编码器共享; 编码器把结果写入预分配的输出缓冲, 返回的数组在下一次编码时被覆盖,
+需要长期持有的使用方应自行复制。
+
+    encoding = LidarEncoding({'voxel': {'type': 'voxel'}, 'range': {'type': 'range_image'}})
+    features = encoding.encode(points)  # {'voxel': (C, Z, Y, X), 'range': (C, H, W)}
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+
+import numpy as np
+
+from src.utils.registry import Registry
+
+LIDAR_ENCODER_REGISTRY = Registry()
+
+
+def register_lidar_encoder(name: str):
+    """激光雷达编码器注册装饰器"""
+    def decorator(cls):
+        LIDAR_ENCODER_REGISTRY.register(name, cls)
+        return cls
+    return decorator
+
+
+class PolarTransform:
+    """一帧点云的共享坐标变换, 各量首次访问时计算并写入按容量复用的缓冲"""
+    def __init__(self, capacity: int = 4096):
+        self._capacity = 0
+        self._reserve(capacity)
+        self.points = np.zeros((0, 4), dtype=np.float32)
+        self.n = 0
+
+    def _reserve(self, capacity: int):
+        if capacity <= self._capacity:
+            return
+        self._capacity = capacity
+        self._buffers = {name: np.empty(capacity, dtype=np.float32)
+                         for name in ('range_xy', 'range', 'azimuth', 'elevation')}
+        self._index = np.empty(capacity, dtype=np.int64)
+
+    def update(self, points: np.ndarray) -> 'PolarTransform':
+        """设置当前帧点云 (N, 3或4), 清空已计算的量"""
+        self.points = points
+        self.n = len(points)
+        if self.n > self._capacity:
+            self._reserve(max(self.n, 2 * self._capacity))
+        self._cache = {}
+        return self
+
+    @property
+    def xyz(self) -> np.ndarray:
+        return self.points[:, :3]
+
+    @property
+    def intensity(self) -> np.ndarray:
+        """无强度列时为None"""
+        return self.points[:, 3] if self.points.shape[1] > 3 else None
+
+    def _get(self, name: str) -> np.ndarray:
+        value = self._cache.get(name)
+        if value is not None:
+            return value
+        out = self._buffers[name][:self.n]
+        x, y, z = self.points[:, 0], self.points[:, 1], self.points[:, 2]
+        if name == 'range_xy':
+            np.hypot(x, y, out=out)
+        elif name == 'range':
+            np.hypot(self.range_xy, z, out=out)
+        elif name == 'azimuth':
+            np.arctan2(y, x, out=out)
+        else:
+            np.arctan2(z, self.range_xy, out=out)
+        self._cache[name] = out
+        return out
+
+    @property
+    def range_xy(self) -> np.ndarray:
+        """水平距离"""
+        return self._get('range_xy')
+
+    @property
+    def range(self) -> np.ndarray:
+        """到雷达的距离"""
+        return self._get('range')
+
+    @property
+    def azimuth(self) -> np.ndarray:
+        """方位角, [-pi, pi]"""
+        return self._get('azimuth')
+
+    @property
+    def elevation(self) -> np.ndarray:
+        """俯仰角"""
+        return self._get('elevation')
+
+    def index_buffer(self) -> np.ndarray:
+        """长度为N的整型临时缓冲, 供编码器计算网格索引"""
+        return self._index[:self.n]
+
+
+class LidarEncoder(ABC):
+    """编码器基类"""
+    def __init__(self, config: Dict):
+        self.config = config
+        self.out = np.zeros(self.output_shape, dtype=np.float32)
+
+    @property
+    @abstractmethod
+    def output_shape(self) -> Tuple[int, ...]:
+        """输出缓冲的形状"""
+        pass
+
+    @abstractmethod
+    def encode(self, polar: PolarTransform) -> np.ndarray:
+        """编码当前帧, 返回self.out"""
+        pass
+
+
+@register_lidar_encoder('points')
+class PointSampleEncoder(LidarEncoder):
+    """距离内的点随机采样或补零到固定点数 (max_points, 4)"""
+    def __init__(self, config: Dict):
+        self.max_points = config.get('max_points', 1000)
+        self.max_range = config.get('max_range', 50.0)
+        self.rng = np.random.default_rng(config.get('seed'))
+        super().__init__(config)
+
+    @property
+    def output_shape(self) -> Tuple[int, ...]:
+        return (self.max_points, 4)
+
+    def encode(self, polar: PolarTransform) -> np.ndarray:
+        keep = np.flatnonzero(polar.range < self.max_range)
+        if len(keep) > self.max_points:
+            keep = self.rng.choice(keep, self.max_points, replace=False)
+        columns = min(polar.points.shape[1], 4)
+        self.out[:len(keep), :columns] = polar.points[keep, :columns]
+        self.out[len(keep):] = 0
+        return self.out
+
+
+@register_lidar_encoder('angle_histogram')
+class AngleHistogramEncoder(LidarEncoder):
+    """按方位角分箱的水平距离和, 除以范围归一化 (bins,)"""
+    def __init__(self, config: Dict):
+        self.bins = config.get('bins', 64)
+        self.max_range = config.get('max_range', 50.0)
+        super().__init__(config)
+
+    @property
+    def output_shape(self) -> Tuple[int, ...]:
+        return (self.bins,)
+
+    def encode(self, polar: PolarTransform) -> np.ndarray:
+        keep = polar.range_xy < self.max_range
+        index = polar.index_buffer()
+        np.floor((polar.azimuth + np.pi) * (self.bins / (2 * np.pi)), out=index, casting='unsafe')
+        np.clip(index, 0, self.bins - 1, out=index)
+        hist = np.bincount(index[keep], weights=polar.range_xy[keep], minlength=self.bins)
+        np.divide(hist, self.max_range, out=self.out, casting='unsafe')
+        return self.out
+
+
+@register_lidar_encoder('voxel')
+class VoxelGridEncoder(LidarEncoder):
+    """体素网格, 每个体素统计点密度、平均/最大高度和平均强度 (C, Z, Y, X)
+
+    高度统计相对于体素底面, 空体素为0。
+    """
+    STATS = ('density', 'mean_height', 'max_height', 'intensity')
+
+    def __init__(self, config: Dict):
+        self.x_range = tuple(config.get('x_range', (-40.0, 40.0)))
+        self.y_range = tuple(config.get('y_range', (-40.0, 40.0)))
+        self.z_range = tuple(config.get('z_range', (-3.0, 1.0)))
+        self.voxel_size = tuple(config.get('voxel_size', (0.5, 0.5, 0.5)))
+        self.stats = config.get('stats', list(self.STATS))
+        for stat in self.stats:
+            if stat not in self.STATS:
+                raise ValueError(f"Unknown voxel statistic '{stat}', expected one of {self.STATS}")
+        self.dims = tuple(int(round((high - low) / size)) for (low, high), size in
+                          zip((self.x_range, self.y_range, self.z_range), self.voxel_size))
+        self.cells = self.dims[0] * self.dims[1] * self.dims[2]
+        super().__init__(config)
+        self._max = np.empty(self.cells, dtype=np.float32)
+
+    @property
+    def output_shape(self) -> Tuple[int, ...]:
+        nx, ny, nz = self.dims
+        return (len(self.stats), nz, ny, nx)
+
+    def encode(self, polar: PolarTransform) -> np.ndarray:
+        nx, ny, nz = self.dims
+        xyz = polar.xyz
+        index = polar.index_buffer()
+        valid = np.ones(polar.n, dtype=bool)
+
+        # 体素索引 z*ny*nx + y*nx + x, 超出范围的点丢弃
+        index[:] = 0
+        axes = ((0, self.x_range, self.voxel_size[0], nx, 1),
+                (1, self.y_range, self.voxel_size[1], ny, nx),
+                (2, self.z_range, self.voxel_size[2], nz, nx * ny))
+        for axis, (low, _), size, count, stride in axes:
+            cell = np.floor((xyz[:, axis] - low) / size).astype(np.int64)
+            valid &= (cell >= 0) & (cell < count)
+            index += cell * stride
+        index = index[valid]
+        heights = xyz[valid, 2] - self.z_range[0]
+        heights -= np.floor(heights / self.voxel_size[2]) * self.voxel_size[2]
+
+        counts = np.bincount(index, minlength=self.cells)
+        occupied = counts > 0
+        for i, stat in enumerate(self.stats):
+            out = self.out[i].reshape(-1)
+            if stat == 'density':
+                np.minimum(np.log1p(counts) / np.log(16), 1.0, out=out, casting='unsafe')
+            elif stat == 'mean_height':
+                sums = np.bincount(index, weights=heights, minlength=self.cells)
+                out[:] = 0
+                np.divide(sums, counts, out=out, where=occupied, casting='unsafe')
+            elif stat == 'max_height':
+                self._max.fill(0)
+                np.maximum.at(self._max, index, heights)
+                out[:] = self._max
+            elif stat == 'intensity':
+                out[:] = 0
+                if polar.intensity is not None:
+                    sums = np.bincount(index, weights=polar.intensity[valid], minlength=self.cells)
+                    np.divide(sums, counts, out=out, where=occupied, casting='unsafe')
+        return self.out
+
+
+@register_lidar_encoder('range_image')
+class RangeImageEncoder(LidarEncoder):
+    """球面距离图像, 行为激光线(按俯仰角), 列为方位角 (C, channels, columns)
+
+    通道为 距离/max_range、强度、占据掩码; 同一像素取最近的点。
+    """
+    def __init__(self, config: Dict):
+        self.channels = config.get('channels', 32)
+        self.columns = config.get('columns', 1024)
+        self.upper_fov = np.radians(config.get('upper_fov', 10.0))
+        self.lower_fov = np.radians(config.get('lower_fov', -30.0))
+        self.max_range = config.get('max_range', 50.0)
+        super().__init__(config)
+        self._range = np.empty(self.channels * self.columns, dtype=np.float32)
+
+    @property
+    def output_shape(self) -> Tuple[int, ...]:
+        return (3, self.channels, self.columns)
+
+    def encode(self, polar: PolarTransform) -> np.ndarray:
+        # 行号: 俯仰角从上视场到下视场线性映射到[0, channels-1]
+        scale = (self.channels - 1) / (self.upper_fov - self.lower_fov)
+        rows = np.rint((self.upper_fov - polar.elevation) * scale).astype(np.int64)
+        np.clip(rows, 0, self.channels - 1, out=rows)
+        pixel = polar.index_buffer()
+        np.floor((np.pi - polar.azimuth) * (self.columns / (2 * np.pi)), out=pixel,
+                 casting='unsafe')
+        np.clip(pixel, 0, self.columns - 1, out=pixel)
+        pixel += rows * self.columns
+
+        # 每个像素保留最近点的距离, 强度取距离等于该最小值的点
+        self._range.fill(np.inf)
+        np.minimum.at(self._range, pixel, polar.range)
+        hit = np.isfinite(self._range)
+        distance, intensity, mask = (self.out[i].reshape(-1) for i in range(3))
+        np.divide(self._range, self.max_range, out=distance)
+        distance[~hit] = 0
+        np.minimum(distance, 1.0, out=distance)
+        intensity[:] = 0
+        if polar.intensity is not None:
+            nearest = polar.range == self._range[pixel]
+            intensity[pixel[nearest]] = polar.intensity[nearest]
+        mask[:] = hit
+        return self.out
+
+
+@register_lidar_encoder('fps')
+class FarthestPointSampler(LidarEncoder):
+    """最远点采样到固定点数 (num_points, 4), 点数不足时补零
+
+    从距离最远的点开始, 每次选取到已选集合距离最大的点, 复杂度O(N*K)。
+    """
+    def __init__(self, config: Dict):
+        self.num_points = config.get('num_points', 512)
+        self.max_range = config.get('max_range', 50.0)
+        super().__init__(config)
+        self._capacity = 0
+
+    @property
+    def output_shape(self) -> Tuple[int, ...]:
+        return (self.num_points, 4)
+
+    def _reserve(self, n: int):
+        if n > self._capacity:
+            self._capacity = max(n, 2 * self._capacity)
+            self._columns = np.empty((3, self._capacity), dtype=np.float32)
+            self._min_dist = np.empty(self._capacity, dtype=np.float32)
+            self._dist = np.empty(self._capacity, dtype=np.float32)
+            self._tmp = np.empty(self._capacity, dtype=np.float32)
+
+    def encode(self, polar: PolarTransform) -> np.ndarray:
+        keep = np.flatnonzero(polar.range < self.max_range)
+        n = len(keep)
+        columns = min(polar.points.shape[1], 4)
+        self.out[:] = 0
+        if n <= self.num_points:
+            self.out[:n, :columns] = polar.points[keep, :columns]
+            return self.out
+
+        # 按坐标分列存放, 逐列计算平方距离比(N, 3)行存储快一个数量级
+        self._reserve(n)
+        xyz = self._columns[:, :n]
+        np.take(polar.xyz.T, keep, axis=1, out=xyz)
+        min_dist, dist, tmp = self._min_dist[:n], self._dist[:n], self._tmp[:n]
+        min_dist.fill(np.inf)
+        selected = int(np.argmax(polar.range[keep]))
+        for i in range(self.num_points):
+            self.out[i, :columns] = polar.points[keep[selected], :columns]
+            np.subtract(xyz[0], xyz[0, selected], out=dist)
+            np.multiply(dist, dist, out=dist)
+            for axis in (1, 2):
+                np.subtract(xyz[axis], xyz[axis, selected], out=tmp)
+                np.multiply(tmp, tmp, out=tmp)
+                dist += tmp
+            np.minimum(min_dist, dist, out=min_dist)
+            selected = int(np.argmax(min_dist))
+        return self.out
+
+
+class LidarEncoding:
+    """一组共享极坐标变换的编码器, config为 输出名 -> {'type': 编码器名, ...参数}"""
+    def __init__(self, config: Dict):
+        self.encoders = {name: LIDAR_ENCODER_REGISTRY.get(params['type'])(params)
+                         for name, params in config.items()}
+        self.polar = PolarTransform()
+
+    def encode(self, points: np.ndarray) -> Dict[str, np.ndarray]:
+        """编码一帧点云, 返回的数组为各编码器的输出缓冲"""
+        polar = self.polar.update(points)
+        return {name: encoder.encode(polar) for name, encoder in self.encoders.items()}
@@ -1,10 +1,131 @@
+import copy
+import logging
+import os
+import threading
+from typing import Dict, Optional, Union
+
+import carla
+import cv2
+import numpy as np
+import yaml
+
+from src.environments.sensors.frame_pool import FramePool
+from src.environments.sensors.processor import SensorProcessor, pack_depth
+from src.utils.timing import stage_timer
+
+logger = logging.getLogger(__name__)
+
+# 默认传感器套件, 环境配置未指定sensors.suite时使用
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_SENSOR_SUITE_PATH = os.path.join(_REPO_ROOT, 'configs', 'env_configs', 'sensors',
+                                         'sensor_suite.yaml')
+
+# 相机蓝图 -> 回调中的解码方式
+CAMERA_KINDS = {
+    'sensor.camera.rgb': 'rgb',
+    'sensor.camera.depth': 'depth',
+    'sensor.camera.semantic_segmentation': 'semantic'
+}
+
+# 激光雷达每个点 (x, y, z, intensity) 的字节数
+LIDAR_POINT_BYTES = 16
+
+
+def load_sensor_suite(source: Union[str, Dict, None] = None) -> Dict:
+    """读取传感器套件: YAML路径、已解析的字典, 或None表示默认套件"""
+    if source is None:
+        source = DEFAULT_SENSOR_SUITE_PATH
+    if isinstance(source, str):
+        with open(source, 'r') as f:
+            return yaml.safe_load(f)
+    return copy.deepcopy(source)
+
+
+def _flatten_sensor_config(config: Dict) -> Dict:
+    """套件格式(position/rotation列表、frame_rate)转为创建传感器用的扁平配置"""
+    flat = {key: value for key, value in config.items() if key not in ('position', 'rotation')}
+    x, y, z = config.get('position', [0.0, 0.0, 0.0])
+    roll, pitch, yaw = config.get('rotation', [0.0, 0.0, 0.0])
+    flat.update(x=x, y=y, z=z, roll=roll, pitch=pitch, yaw=yaw)
+    if 'sensor_tick' not in flat and config.get('frame_rate'):
+        flat['sensor_tick'] = 1.0 / config['frame_rate']
+    return flat
+
+
+def estimate_bandwidth(suite: Dict, delta_seconds: float = 0.05) -> Dict[str, float]:
+    """按套件配置估算启用的相机和激光雷达每个仿真帧传输的字节数
+
+    激光雷达按全部射线命中计算, 是丢点和未命中之前的上限。
+    """
+    estimate = {}
+    for name, config in suite.get('cameras', {}).items():
+        if config.get('enabled', True):
+            tick = _flatten_sensor_config(config).get('sensor_tick', 0.0)
+            rate = min(1.0, delta_seconds / tick) if tick else 1.0
+            estimate[name] = config['width'] * config['height'] * 4 * rate
+    for name, config in suite.get('lidars', {}).items():
+        if config.get('enabled', True):
+            estimate[name] = config['points_per_second'] * delta_seconds * LIDAR_POINT_BYTES
+    return estimate
+
+
 class SensorManager:
     """传感器管理器"""
-    def __init__(self, config: Dict):
+    def __init__(self, config: Dict, delta_seconds: float = 0.05):
         self.config = config
+        self.delta_seconds = delta_seconds  # 仿真步长, 用于判断低频传感器
+        self._config_snapshot = copy.deepcopy(config)
         self.sensors = {}
         self.data_buffers = {}
         self.processor = SensorProcessor(config)
+        self.batch_cameras = config.get('batch_cameras', False)  # 相机批量预处理
+        
+        # 帧同步: 记录每个传感器最新数据对应的帧号
+        self.data_frames = {}
+        self.sync_timeout = config.get('sync_timeout', 2.0)
+        self._sync_sensors = set()
+        self._frame_cond = threading.Condition()
+        
+        # 相机帧缓冲池: 回调直接解码到预分配数组, 每帧不再分配内存
+        self.frame_pool_size = config.get('frame_pool_size', 3)
+        self._frame_pools = {}
+        
+        # 传感器套件: suite为YAML路径或字典, 未指定时使用默认套件
+        self.suite = load_sensor_suite(config.get('suite'))
+        self.render_at_target = config.get('render_at_target',
+                                           self.suite.get('render_at_target', False))
+        self.camera_kinds = {}
+        self.lidar_names = []
+        
+        # 带宽统计: 每个传感器收到的字节数、帧数和首帧帧号
+        self.bytes_received = {}
+        self.frames_received = {}
+        self._first_frame = {}
+        
+        # 更新频率: sensor_rates按传感器名覆盖套件中的frame_rate(Hz)。优先使用服务器端
+        # sensor_tick, 蓝图不支持或client_decimation为True时在回调中按仿真时间抽帧
+        self.sensor_rates = config.get('sensor_rates', {})
+        self.client_decimation = config.get('client_decimation', False)
+        self._min_interval = {}  # 客户端抽帧的传感器 -> 最小间隔(秒)
+        self._next_time = {}
+        
+        # 保持上次值: 传感器没有新数据时直接返回缓存的处理结果, 跳过处理
+        self.hold_last_value = config.get('hold_last_value', True)
+        self._processed = {}  # 传感器 -> (帧号, 处理结果)
+        
+    def reserve_frames(self, slots: int):
+        """保证相机帧在之后slots-1帧内不被覆盖, 供跨帧持有原始观测的使用方调用"""
+        if slots > self.frame_pool_size:
+            self.frame_pool_size = slots
+            self._frame_pools = {}  # 下一帧按新的槽位数重新分配
+            
+    def _frame_pool(self, name: str, shape: tuple, dtype=np.uint8) -> FramePool:
+        """获取传感器的帧缓冲池, 分辨率变化时重新分配"""
+        pool = self._frame_pools.get(name)
+        if pool is None or not pool.matches(shape, self.frame_pool_size, dtype):
+            pool = FramePool(shape, dtype, self.frame_pool_size)
+            self._frame_pools[name] = pool
+        return pool
         
     def setup_sensors(self, world: carla.World, vehicle: carla.Vehicle):
         """设置传感器"""
@@ -20,32 +141,53 @@ class SensorManager:
         # 碰撞和车道传感器
         self._setup_collision_lane(world, vehicle)
         
-    def _setup_cameras(self, world: carla.World, vehicle: carla.Vehicle):
-        """设置相机"""
-        camera_configs = {
-            'rgb_front': {
-                'type': 'sensor.camera.rgb',
-                'x': 2.0, 'y': 0.0, 'z': 1.4,
-                'roll': 0.0, 'pitch': 0.0, 'yaw': 0.0,
-                'width': 800, 'height': 600, 'fov': 90
-            },
-            'depth_front': {
-                'type': 'sensor.camera.depth',
-                'x': 2.0, 'y': 0.0, 'z': 1.4,
-                'roll': 0.0, 'pitch': 0.0, 'yaw': 0.0,
-                'width': 800, 'height': 600, 'fov': 90
-            },
-            'semantic_front': {
-                'type': 'sensor.camera.semantic_segmentation',
-                'x': 2.0, 'y': 0.0, 'z': 1.4,
-                'roll': 0.0, 'pitch': 0.0, 'yaw': 0.0,
-                'width': 800, 'height': 600, 'fov': 90
-            }
-        }
+    def _enabled(self, name: str, config: Dict) -> bool:
+        """套件中的enabled标志, 可被传感器配置中的use_<name>覆盖"""
+        return self.config.get(f'use_{name}', config.get('enabled', True))
+        
+    def _sensor_config(self, name: str, config: Dict) -> Dict:
+        """扁平化套件配置, 并应用sensor_rates中的更新频率"""
+        flat = _flatten_sensor_config(config)
+        if self.sensor_rates.get(name):
+            flat['sensor_tick'] = 1.0 / self.sensor_rates[name]
+        return flat
+        
+    def _apply_sensor_tick(self, name: str, blueprint, config: Dict) -> bool:
+        """设置传感器的更新间隔, 返回step是否需要等待该传感器的数据
+        
+        间隔不超过仿真步长的传感器每帧都有数据, 参与帧同步; 更低频的传感器不参与,
+        观测中保持其最近一次的数据。
+        """
+        tick = config.get('sensor_tick', 0.0)
+        if not tick:
+            return True
+        if not self.client_decimation and blueprint.has_attribute('sensor_tick'):
+            blueprint.set_attribute('sensor_tick', str(tick))
+        else:
+            self._min_interval[name] = tick
+        return tick <= self.delta_seconds * (1 + 1e-6)
+        
+    def _due(self, name: str, timestamp: float) -> bool:
+        """客户端抽帧: 距上次接收不足最小间隔的数据直接丢弃"""
+        interval = self._min_interval.get(name)
+        if interval is None:
+            return True
+        # 留半个步长的余量, 避免仿真时间的浮点误差多丢一帧
+        if timestamp < self._next_time.get(name, -np.inf) - 0.5 * self.delta_seconds:
+            return False
+        self._next_time[name] = timestamp + interval
+        return True
         
-        for name, config in camera_configs.items():
-            if self.config.get(f'use_{name}', True):
-                self._create_camera(name, config, world, vehicle)
+    def _setup_cameras(self, world: carla.World, vehicle: carla.Vehicle):
+        """按套件配置设置相机"""
+        for name, config in self.suite.get('cameras', {}).items():
+            if not self._enabled(name, config):
+                continue
+            config = self._sensor_config(name, config)
+            if config.get('render_at_target', self.render_at_target):
+                # 服务器直接按网络输入尺寸渲染, 省去全分辨率渲染、传输和缩放
+                config['width'], config['height'] = self.processor.img_size
+            self._create_camera(name, config, world, vehicle)
                 
     def _create_camera(self, name: str, config: Dict, 
                       world: carla.World, vehicle: carla.Vehicle):
@@ -55,6 +197,7 @@ class SensorManager:
         blueprint.set_attribute('image_size_x', str(config['width']))
         blueprint.set_attribute('image_size_y', str(config['height']))
         blueprint.set_attribute('fov', str(config['fov']))
+        sync = self._apply_sensor_tick(name, blueprint, config)
         
         # 设置位置
         transform = carla.Transform(
@@ -66,99 +209,143 @@ class SensorManager:
         sensor = world.spawn_actor(blueprint, transform, attach_to=vehicle)
         
         # 设置回调
+        self.camera_kinds[name] = CAMERA_KINDS.get(config['type'], 'rgb')
         sensor.listen(lambda image: self._on_camera_data(name, image))
         
+        self._register_sensor(name, sensor, sync=sync)
+        
+    def _register_sensor(self, name: str, sensor, sync: bool = True):
+        """登记传感器, sync为True时step需等待其数据到达"""
         self.sensors[name] = sensor
         self.data_buffers[name] = None
+        self.data_frames[name] = -1
+        if sync:
+            self._sync_sensors.add(name)
+            
+    def _store(self, name: str, data, frame: int):
+        """写入传感器数据并标记帧号"""
+        with self._frame_cond:
+            # 丢弃晚到的旧帧, 避免覆盖更新的数据
+            if frame < self.data_frames.get(name, -1):
+                return
+            self.data_buffers[name] = data
+            self.data_frames[name] = frame
+            self._frame_cond.notify_all()
+            
+    def wait_for_frame(self, frame: int, timeout: Optional[float] = None) -> bool:
+        """阻塞直到所有同步传感器都送达指定帧的数据"""
+        if timeout is None:
+            timeout = self.sync_timeout
+            
+        with self._frame_cond:
+            synced = self._frame_cond.wait_for(
+                lambda: all(self.data_frames.get(name, -1) >= frame
+                            for name in self._sync_sensors),
+                timeout=timeout
+            )
+            if not synced:
+                missing = [name for name in self._sync_sensors
+                           if self.data_frames.get(name, -1) < frame]
+                
+        if not synced:
+            logger.warning(f"Sensors {missing} did not deliver frame {frame} within {timeout}s")
+        return synced
         
     def _on_camera_data(self, name: str, image):
         """相机数据回调"""
-        # 转换为numpy数组
-        array = np.frombuffer(image.raw_data, dtype=np.uint8)
-        array = array.reshape((image.height, image.width, 4))
-        array = array[:, :, :3]
-        
-        # 处理特殊相机类型
-        if 'depth' in name:
-            array = array[:, :, 0]  # 只使用R通道
-        elif 'semantic' in name:
-            array = array[:, :, 2]  # 只使用B通道
+        # 原始数据为BGRA, 不复制直接包装
+        bgra = np.frombuffer(image.raw_data, dtype=np.uint8)
+        bgra = bgra.reshape((image.height, image.width, 4))
+        
+        self._count_bytes(name, len(image.raw_data), image.frame)
+        if not self._due(name, image.timestamp):
+            return
+        
+        # 一次转换写入帧缓冲池的下一个槽位, 得到连续数组
+        kind = self.camera_kinds[name]
+        if kind == 'depth':
+            # 保留完整的24位深度编码, 由process_depth解码
+            frame = self._frame_pool(name, (image.height, image.width), np.uint32).next()
+            pack_depth(bgra, out=frame)
+        elif kind == 'semantic':
+            frame = self._frame_pool(name, (image.height, image.width)).next()
+            cv2.extractChannel(bgra, 2, dst=frame)  # 语义标签在R通道
+        else:
+            frame = self._frame_pool(name, (image.height, image.width, 3)).next()
+            cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=frame)
             
         # 存储数据
-        self.data_buffers[name] = array 
+        self._store(name, frame, image.frame)
         
     def _setup_lidar(self, world: carla.World, vehicle: carla.Vehicle):
-        """设置激光雷达"""
-        # 创建激光雷达配置
-        lidar_config = {
-            'type': 'sensor.lidar.ray_cast',
-            'x': 0.0, 'y': 0.0, 'z': 2.4,
-            'roll': 0.0, 'pitch': 0.0, 'yaw': 0.0,
-            'range': 50.0,
-            'channels': 32,
-            'points_per_second': 56000,
-            'rotation_frequency': 10,
-            'upper_fov': 10.0,
-            'lower_fov': -30.0
-        }
-        
-        if self.config.get('use_lidar', True):
-            # 创建蓝图
-            blueprint = world.get_blueprint_library().find(lidar_config['type'])
+        """按套件配置设置激光雷达"""
+        for name, config in self.suite.get('lidars', {}).items():
+            if self._enabled(name, config):
+                self._create_lidar(name, self._sensor_config(name, config), world, vehicle)
+        if self.suite.get('radars') and any(self._enabled(name, config)
+                                            for name, config in self.suite['radars'].items()):
+            logger.warning("Radar sensors in the sensor suite are not supported and were skipped")
             
-            # 设置属性
-            blueprint.set_attribute('range', str(lidar_config['range']))
-            blueprint.set_attribute('channels', str(lidar_config['channels']))
-            blueprint.set_attribute('points_per_second', str(lidar_config['points_per_second']))
-            blueprint.set_attribute('rotation_frequency', str(lidar_config['rotation_frequency']))
-            blueprint.set_attribute('upper_fov', str(lidar_config['upper_fov']))
-            blueprint.set_attribute('lower_fov', str(lidar_config['lower_fov']))
-            
-            # 设置位置
-            transform = carla.Transform(
-                carla.Location(x=lidar_config['x'], y=lidar_config['y'], z=lidar_config['z']),
-                carla.Rotation(roll=lidar_config['roll'], pitch=lidar_config['pitch'], yaw=lidar_config['yaw'])
-            )
-            
-            # 创建传感器
-            sensor = world.spawn_actor(blueprint, transform, attach_to=vehicle)
-            
-            # 设置回调
-            sensor.listen(lambda data: self._on_lidar_data('lidar', data))
-            
-            self.sensors['lidar'] = sensor
-            self.data_buffers['lidar'] = None
+    def _create_lidar(self, name: str, config: Dict, world: carla.World, vehicle: carla.Vehicle):
+        """创建激光雷达"""
+        # 创建蓝图
+        blueprint = world.get_blueprint_library().find(config['type'])
+        
+        # 设置属性
+        for key in ('range', 'channels', 'points_per_second', 'rotation_frequency',
+                    'upper_fov', 'lower_fov'):
+            if key in config:
+                blueprint.set_attribute(key, str(config[key]))
+        sync = self._apply_sensor_tick(name, blueprint, config)
+        
+        # 设置位置
+        transform = carla.Transform(
+            carla.Location(x=config['x'], y=config['y'], z=config['z']),
+            carla.Rotation(roll=config['roll'], pitch=config['pitch'], yaw=config['yaw'])
+        )
+        
+        # 创建传感器
+        sensor = world.spawn_actor(blueprint, transform, attach_to=vehicle)
+        
+        # 设置回调
+        if name not in self.lidar_names:
+            self.lidar_names.append(name)
+        sensor.listen(lambda data: self._on_lidar_data(name, data))
+        
+        self._register_sensor(name, sensor, sync=sync)
 
     def _setup_gnss_imu(self, world: carla.World, vehicle: carla.Vehicle):
         """设置GNSS和IMU"""
-        # GNSS配置
-        gnss_config = {
-            'type': 'sensor.other.gnss',
-            'x': 0.0, 'y': 0.0, 'z': 0.0,
-            'noise_alt_bias': 0.0,
-            'noise_lat_bias': 0.0,
-            'noise_lon_bias': 0.0,
-            'noise_alt_stddev': 0.0,
-            'noise_lat_stddev': 0.0,
-            'noise_lon_stddev': 0.0
-        }
-        
-        # IMU配置
-        imu_config = {
-            'type': 'sensor.other.imu',
-            'x': 0.0, 'y': 0.0, 'z': 0.0,
-            'noise_accel_stddev_x': 0.0,
-            'noise_accel_stddev_y': 0.0,
-            'noise_accel_stddev_z': 0.0,
-            'noise_gyro_stddev_x': 0.0,
-            'noise_gyro_stddev_y': 0.0,
-            'noise_gyro_stddev_z': 0.0
-        }
-        
-        if self.config.get('use_gnss', True):
-            self._create_gnss(gnss_config, world, vehicle)
-        if self.config.get('use_imu', True):
-            self._create_imu(imu_config, world, vehicle)
+        for name, create in (('gnss', self._create_gnss), ('imu', self._create_imu)):
+            config = self.suite.get(name)
+            if config and self._enabled(name, config):
+                create(self._sensor_config(name, config), world, vehicle)
+            
+    def _create_gnss(self, config: Dict, world: carla.World, vehicle: carla.Vehicle):
+        """创建GNSS"""
+        blueprint = world.get_blueprint_library().find(config['type'])
+        for key, value in config.items():
+            if key.startswith('noise_'):
+                blueprint.set_attribute(key, str(value))
+        sync = self._apply_sensor_tick('gnss', blueprint, config)
+                
+        transform = carla.Transform(carla.Location(x=config['x'], y=config['y'], z=config['z']))
+        sensor = world.spawn_actor(blueprint, transform, attach_to=vehicle)
+        sensor.listen(lambda data: self._on_gnss_data(data))
+        self._register_sensor('gnss', sensor, sync=sync)
+        
+    def _create_imu(self, config: Dict, world: carla.World, vehicle: carla.Vehicle):
+        """创建IMU"""
+        blueprint = world.get_blueprint_library().find(config['type'])
+        for key, value in config.items():
+            if key.startswith('noise_'):
+                blueprint.set_attribute(key, str(value))
+        sync = self._apply_sensor_tick('imu', blueprint, config)
+                
+        transform = carla.Transform(carla.Location(x=config['x'], y=config['y'], z=config['z']))
+        sensor = world.spawn_actor(blueprint, transform, attach_to=vehicle)
+        sensor.listen(lambda data: self._on_imu_data(data))
+        self._register_sensor('imu', sensor, sync=sync)
 
     def _setup_collision_lane(self, world: carla.World, vehicle: carla.Vehicle):
         """设置碰撞和车道传感器"""
@@ -167,76 +354,175 @@ class SensorManager:
             blueprint = world.get_blueprint_library().find('sensor.other.collision')
             sensor = world.spawn_actor(blueprint, carla.Transform(), attach_to=vehicle)
             sensor.listen(lambda event: self._on_collision(event))
-            self.sensors['collision'] = sensor
+            # 事件型传感器只在事件发生时回调, 不参与帧同步
+            self._register_sensor('collision', sensor, sync=False)
             
         # 车道入侵传感器
         if self.config.get('use_lane_invasion', True):
             blueprint = world.get_blueprint_library().find('sensor.other.lane_invasion')
             sensor = world.spawn_actor(blueprint, carla.Transform(), attach_to=vehicle)
             sensor.listen(lambda event: self._on_lane_invasion(event))
-            self.sensors['lane_invasion'] = sensor
+            self._register_sensor('lane_invasion', sensor, sync=False)
 
     def _on_lidar_data(self, name: str, data):
         """激光雷达数据回调"""
-        # 转换为numpy数组
-        points = np.frombuffer(data.raw_data, dtype=np.float32).reshape([-1, 3])
+        # 转换为numpy数组, 每个点为 (x, y, z, intensity)
+        self._count_bytes(name, len(data.raw_data), data.frame)
+        if not self._due(name, data.timestamp):
+            return
+        points = np.frombuffer(data.raw_data, dtype=np.float32).reshape([-1, 4])
         
         # 存储数据
-        self.data_buffers[name] = points
+        self._store(name, points, data.frame)
 
+    def _count_bytes(self, name: str, nbytes: int, frame: int):
+        """累计传感器收到的字节数"""
+        self.bytes_received[name] = self.bytes_received.get(name, 0) + nbytes
+        self.frames_received[name] = self.frames_received.get(name, 0) + 1
+        self._first_frame.setdefault(name, frame)
+        
+    def bandwidth_report(self) -> Dict[str, Dict]:
+        """各传感器收到的数据量: 每次送达的字节数, 以及按经过的仿真帧平均的字节数"""
+        report = {}
+        for name, total in self.bytes_received.items():
+            frames = self.frames_received[name]
+            ticks = max(self.data_frames.get(name, -1) - self._first_frame[name] + 1, 1)
+            report[name] = {
+                'frames': frames,
+                'bytes_per_frame': total / frames,
+                'bytes_per_tick': total / ticks
+            }
+        return report
+        
+    def reset_bandwidth(self):
+        """清空带宽统计"""
+        self.bytes_received = {}
+        self.frames_received = {}
+        self._first_frame = {}
+        
     def _on_gnss_data(self, data):
         """GNSS数据回调"""
-        self.data_buffers['gnss'] = {
+        if not self._due('gnss', data.timestamp):
+            return
+        self._store('gnss', {
             'latitude': data.latitude,
             'longitude': data.longitude,
             'altitude': data.altitude
-        }
+        }, data.frame)
 
     def _on_imu_data(self, data):
         """IMU数据回调"""
-        self.data_buffers['imu'] = {
+        if not self._due('imu', data.timestamp):
+            return
+        self._store('imu', {
             'accelerometer': [data.accelerometer.x, data.accelerometer.y, data.accelerometer.z],
             'gyroscope': [data.gyroscope.x, data.gyroscope.y, data.gyroscope.z],
             'compass': data.compass
-        }
+        }, data.frame)
 
     def _on_collision(self, event):
         """碰撞事件回调"""
         impulse = event.normal_impulse
         intensity = np.sqrt(impulse.x**2 + impulse.y**2 + impulse.z**2)
-        self.data_buffers['collision'] = {
+        self._store('collision', {
             'intensity': intensity,
             'actor_id': event.other_actor.id
-        }
+        }, event.frame)
 
     def _on_lane_invasion(self, event):
         """车道入侵事件回调"""
-        self.data_buffers['lane_invasion'] = {
+        self._store('lane_invasion', {
             'crossed_lane_markings': [marking.type for marking in event.crossed_lane_markings]
-        }
+        }, event.frame)
 
     def get_sensor_data(self) -> Dict:
         """获取所有传感器数据"""
-        # 处理传感器数据
+        return self.process_sensor_data(self.get_raw_data())
+        
+    def get_raw_data(self) -> Dict:
+        """获取未处理的传感器数据快照
+
+        相机数组来自帧缓冲池, 在之后frame_pool_size-1帧内有效。sensor_frames为各传感器
+        数据对应的帧号, 供process_sensor_data判断哪些传感器没有更新。
+        """
+        # 在锁内取快照, 避免回调线程中途覆盖
+        with self._frame_cond:
+            return {**self.data_buffers, 'sensor_frames': dict(self.data_frames)}
+            
+    def _cached(self, name: str, frames: Dict):
+        """传感器自上次处理后没有新数据时返回缓存的处理结果, 否则返回None"""
+        if not self.hold_last_value or name not in frames:
+            return None
+        frame, result = self._processed.get(name, (None, None))
+        return result if frame == frames[name] else None
+        
+    def process_sensor_data(self, data_buffers: Dict) -> Dict:
+        """处理传感器数据快照, 没有更新的相机和激光雷达沿用上次的处理结果"""
         processed_data = {}
+        frames = data_buffers.get('sensor_frames', {})
         
-        # 处理相机数据
-        for name, data in self.data_buffers.items():
-            if 'rgb' in name or 'depth' in name or 'semantic' in name:
-                if data is not None:
-                    processed_data[name] = self.processor.process_camera(data)
+        # 处理相机数据, 深度图单独解码
+        cameras = {}
+        depths = {}
+        for name, data in data_buffers.items():
+            if name in self.camera_kinds and data is not None:
+                cached = self._cached(name, frames)
+                if cached is not None:
+                    processed_data[name] = cached
+                elif self.camera_kinds[name] == 'depth':
+                    depths[name] = data
+                else:
+                    cameras[name] = data
+        if self.batch_cameras:
+            # 所有相机合并为一次上传和一次设备端预处理
+            if cameras:
+                with stage_timer.span('sensors.camera_batch'):
+                    updated = self.processor.process_cameras(cameras)
+            else:
+                updated = {}
+        else:
+            updated = {}
+            for name, data in cameras.items():
+                with stage_timer.span('sensors.camera'):
+                    updated[name] = self.processor.process_camera(data)
+        for name, data in depths.items():
+            with stage_timer.span('sensors.depth'):
+                updated[name] = self.processor.process_depth(data)
                 
         # 处理激光雷达数据
-        if 'lidar' in self.data_buffers and self.data_buffers['lidar'] is not None:
-            processed_data['lidar'] = self.processor.process_lidar(self.data_buffers['lidar'])
+        for name in self.lidar_names:
+            if data_buffers.get(name) is not None:
+                cached = self._cached(name, frames)
+                if cached is not None:
+                    processed_data[name] = cached
+                    continue
+                with stage_timer.span('sensors.lidar'):
+                    updated[name] = self.processor.process_lidar(data_buffers[name])
+                    
+        # 缓存本次处理的结果
+        for name, result in updated.items():
+            if name in frames:
+                self._processed[name] = (frames[name], result)
+        processed_data.update(updated)
             
         # 处理其他传感器数据
         for name in ['gnss', 'imu', 'collision', 'lane_invasion']:
-            if name in self.data_buffers and self.data_buffers[name] is not None:
-                processed_data[name] = self.data_buffers[name]
+            if data_buffers.get(name) is not None:
+                processed_data[name] = data_buffers[name]
                 
         return processed_data
 
+    def config_changed(self, config: Dict) -> bool:
+        """传感器配置是否与创建时不同"""
+        return config != self._config_snapshot
+        
+    def clear_event_buffers(self):
+        """清空碰撞和车道入侵等事件数据"""
+        with self._frame_cond:
+            for name in ('collision', 'lane_invasion'):
+                if name in self.data_buffers:
+                    self.data_buffers[name] = None
+                    
     def cleanup(self):
         """清理传感器"""
         for sensor in self.sensors.values():
@@ -244,4 +530,13 @@ class SensorManager:
                 sensor.stop()
                 sensor.destroy()
         self.sensors.clear()
-        self.data_buffers.clear()
\ No newline at end of file
+        with self._frame_cond:
+            self.data_buffers.clear()
+            self.data_frames.clear()
+            self._sync_sensors.clear()
+        self._frame_pools = {}
+        self._min_interval.clear()
+        self._next_time.clear()
+        self._processed.clear()
+        self.camera_kinds.clear()
+        self.lidar_names.clear()
\ No newline at end of file
@@ -1,7 +1,47 @@
 import numpy as np
 import cv2
-from typing import Dict, List
+from typing import Dict, List, Optional
 import torch
+import torch.nn.functional as F
+
+# BEV通道: 最大高度、最小高度、点密度、平均强度
+BEV_CHANNELS = ('max_height', 'min_height', 'density', 'intensity')
+
+# ImageNet均值和标准差
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+# 语义分割输出通道 -> CARLA类别id, 一个通道可合并多个类别
+SEMANTIC_CLASSES = {'road': [7], 'vehicle': [10], 'pedestrian': [4], 'traffic_sign': [12]}
+
+# 语义输出方式: masks为CPU上一次查表得到的(C, H, W)掩码; one_hot只查表得到通道下标图,
+# 上传uint8下标后在设备上展开
+SEMANTIC_OUTPUTS = ('masks', 'one_hot')
+
+# CARLA深度编码: (R + G*256 + B*256^2) / (256^3 - 1) * 1000米
+DEPTH_FAR = 1000.0
+DEPTH_SCALE = np.float32(DEPTH_FAR / (256 ** 3 - 1))
+
+# 深度输出: linear为depth/depth_max, log为对数深度, inverse为depth_min/depth, 均在[0, 1]内
+DEPTH_MODES = ('linear', 'log', 'inverse')
+
+# numpy 1.25起ufunc.at有快速路径, 之前的版本逐元素执行, 大点云时排序+reduceat更快
+_FAST_UFUNC_AT = np.lib.NumpyVersion(np.__version__) >= '1.25.0'
+
+
+def pack_depth(bgra: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """BGRA深度图打包为(H, W) uint32的24位编码 B*256^2 + G*256 + R"""
+    if bgra.shape[2] == 4:
+        # 字节重排为RGBA后按小端uint32读取即为 A<<24 | B<<16 | G<<8 | R, 再去掉A; 两步都不分配内存
+        if out is None:
+            out = np.empty(bgra.shape[:2], dtype=np.uint32)
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGBA, dst=out.view(np.uint8).reshape(bgra.shape))
+        return np.bitwise_and(out, 0xFFFFFF, out=out)
+    packed = np.left_shift(bgra[..., 0], 16, dtype=np.uint32, out=out)
+    packed |= bgra[..., 1].astype(np.uint32) << 8
+    packed |= bgra[..., 2]
+    return packed
+
 
 class SensorProcessor:
     """传感器数据处理器"""
@@ -13,32 +53,150 @@ class SensorProcessor:
         self.img_size = config.get('img_size', (224, 224))
         self.normalize = config.get('normalize', True)
         
+        # 批量预处理: 按批形状复用的页锁定暂存区和工作张量, 以及设备上的归一化系数
+        self.pin_memory = str(self.device).startswith('cuda') and torch.cuda.is_available()
+        self._staging = {}
+        self._affine = {}
+        
         # 激光雷达预处理参数
         self.lidar_range = config.get('lidar_range', 50.0)
         self.lidar_bins = config.get('lidar_bins', 32)
+        if config.get('lidar_resolution'):
+            # 按每格边长(米)确定网格数
+            self.lidar_bins = int(round(2 * self.lidar_range / config['lidar_resolution']))
+        self.bev_channels = config.get('lidar_bev_channels', ['max_height'])
+        for channel in self.bev_channels:
+            if channel not in BEV_CHANNELS:
+                raise ValueError(f"Unknown BEV channel '{channel}', expected one of {BEV_CHANNELS}")
+        # 点数不少于该值时改用排序+分段归约
+        self.bev_sort_threshold = config.get('lidar_bev_sort_threshold',
+                                             float('inf') if _FAST_UFUNC_AT else 4096)
         
-    def process_camera(self, image: np.ndarray) -> torch.Tensor:
-        """处理相机图像"""
-        # 调整大小
-        image = cv2.resize(image, self.img_size)
+        # 深度: 输出方式、固定的归一化范围(米), depth_reduced为True时先按输出尺寸最近邻采样再解码
+        self.depth_mode = config.get('depth_mode', 'linear')
+        if self.depth_mode not in DEPTH_MODES:
+            raise ValueError(
+                f"Unknown depth mode '{self.depth_mode}', expected one of {DEPTH_MODES}")
+        self.depth_min = config.get('depth_min', 0.1)
+        self.depth_max = config.get('depth_max', 100.0)
+        self.depth_reduced = config.get('depth_reduced', False)
+        self._depth_samples = {}
+        
+        # 语义分割: 类别分组和查找表
+        self.semantic_classes = config.get('semantic_classes', SEMANTIC_CLASSES)
+        self.semantic_output = config.get('semantic_output', 'masks')
+        self._build_semantic_lut()
+        self._fusion = None  # fuse_sensors使用的融合布局, 首次调用时创建
         
-        # 标准化
+    def process_camera(self, image: np.ndarray, out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """处理相机图像, 指定out(C, H, W)时结果直接写入out, 如融合张量的通道切片"""
+        # 调整大小, 服务器已按目标尺寸渲染时跳过
+        if image.shape[1::-1] != tuple(self.img_size):
+            image = cv2.resize(image, self.img_size)
+        if image.ndim == 2:
+            image = image[:, :, None]  # 深度/语义等单通道图像
+            
+        if out is not None:
+            # 上传uint8, 类型转换和归一化合并为一次乘加写入out
+            image = torch.from_numpy(np.ascontiguousarray(image)).to(out.device).permute(2, 0, 1)
+            scale, bias = self._normalization(image.shape[0])
+            return torch.addcmul(bias[0], image, scale[0], out=out)
+            
+        # 标准化, ImageNet均值方差只用于三通道图像
         if self.normalize:
             image = image.astype(np.float32) / 255.0
-            image = (image - [0.485, 0.456, 0.406]) / [0.229, 0.224, 0.225]
+            if image.shape[2] == 3:
+                image = (image - IMAGENET_MEAN) / IMAGENET_STD
             
         # 转换为tensor
         image = torch.from_numpy(image).permute(2, 0, 1)
         return image.to(self.device)
         
-    def process_lidar(self, points: np.ndarray) -> torch.Tensor:
-        """处理激光雷达点云"""
+    def process_camera_batch(self, images: List[np.ndarray]) -> torch.Tensor:
+        """批量处理同尺寸的uint8相机图像(可来自多个相机和环境), 返回(B, C, H, W)
+
+        图像先写入页锁定的暂存张量, 一次non_blocking上传, 之后在设备上完成
+        类型转换、通道重排、双线性缩放和归一化(缩放与归一化合并为一次乘加)。
+        device为cpu时执行同样的计算, 两者输出一致。
+        """
+        staging, work, event = self._batch_buffers(images)
+        if event is not None:
+            event.synchronize()  # 上一次从该暂存区的异步拷贝完成后才能覆盖
+        np.stack(images, out=staging.numpy().reshape((len(images),) + images[0].shape))
+        work.copy_(staging.to(self.device, non_blocking=True))
+        if self.pin_memory:
+            event = torch.cuda.Event()
+            event.record()
+            self._staging[staging.shape] = (staging, work, event)
+            
+        # (B, H, W, C) -> (B, C, H, W), 与cv2.resize的INTER_LINEAR一样按像素中心对齐
+        batch = work.permute(0, 3, 1, 2)
+        width, height = self.img_size
+        if batch.shape[2:] != (height, width):
+            batch = F.interpolate(batch, size=(height, width), mode='bilinear', align_corners=False)
+            
+        scale, bias = self._normalization(batch.shape[1])
+        return torch.addcmul(bias, batch, scale)
+        
+    def process_cameras(self, images: Dict[str, np.ndarray]) -> Dict[str, torch.Tensor]:
+        """按尺寸分组批量处理多路相机, 返回各相机的(C, H, W)"""
+        groups = {}
+        for name, image in images.items():
+            groups.setdefault(image.shape, []).append(name)
+            
+        processed = {}
+        for names in groups.values():
+            batch = self.process_camera_batch([images[name] for name in names])
+            processed.update(zip(names, batch))
+        return processed
+        
+    def _batch_buffers(self, images: List[np.ndarray]):
+        """返回(uint8暂存张量, 设备上的float32工作张量, 上次上传的事件), 形状均为(B, H, W, C)"""
+        shape = images[0].shape
+        channels = shape[2] if len(shape) == 3 else 1
+        key = torch.Size((len(images), shape[0], shape[1], channels))
+        if key not in self._staging:
+            self._staging[key] = (torch.empty(key, dtype=torch.uint8, pin_memory=self.pin_memory),
+                                  torch.empty(key, dtype=torch.float32, device=self.device), None)
+        return self._staging[key]
+        
+    def _normalization(self, channels: int):
+        """x * scale + bias 形式的归一化系数, 形状(1, C, 1, 1), 缓存在设备上"""
+        if channels not in self._affine:
+            scale = np.full(channels, 1.0, dtype=np.float32)
+            bias = np.zeros(channels, dtype=np.float32)
+            if self.normalize:
+                scale[:] = 1.0 / 255.0
+                if channels == 3:
+                    scale /= IMAGENET_STD
+                    bias = -IMAGENET_MEAN / IMAGENET_STD
+            self._affine[channels] = tuple(
+                torch.from_numpy(value).view(1, channels, 1, 1).to(self.device)
+                for value in (scale, bias))
+        return self._affine[channels]
+        
+    def process_lidar(self, points: np.ndarray, out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """处理激光雷达点云
+        
+        指定out(C, H, W)时BEV按最近邻重采样到out的网格(如相机分辨率)并直接写入。
+        """
         # 过滤点云
         mask = np.linalg.norm(points[:, :2], axis=1) <= self.lidar_range
         points = points[mask]
         
-        # 生成BEV图像
+        # 生成BEV图像, 单通道时保持原来的(H, W)形状
         bev = self._points_to_bev(points)
+        if out is not None:
+            on_cpu = out.device.type == 'cpu'
+            target = out.numpy() if on_cpu else np.empty(tuple(out.shape), np.float32)
+            for i in range(len(bev)):
+                cv2.resize(bev[i], target.shape[:0:-1], dst=target[i],
+                           interpolation=cv2.INTER_NEAREST)
+            if not on_cpu:
+                out.copy_(torch.from_numpy(target))
+            return out
+        if bev.shape[0] == 1:
+            bev = bev[0]
         
         # 转换为tensor
         bev = torch.from_numpy(bev).float()
@@ -66,87 +224,172 @@ class SensorProcessor:
         return processed
         
     def _points_to_bev(self, points: np.ndarray) -> np.ndarray:
-        """点云转BEV图像"""
-        # 创建高度图
-        height_map = np.zeros((self.lidar_bins, self.lidar_bins))
+        """点云转多通道BEV图像, 返回(C, H, W), 通道顺序同lidar_bev_channels"""
+        bins = self.lidar_bins
+        cells = bins * bins
+        bev = np.zeros((len(self.bev_channels), bins, bins), dtype=np.float32)
+        if len(points) == 0:
+            return bev
+            
+        # 计算网格索引并限制范围
+        scale = bins / (2 * self.lidar_range)
+        x_bins = np.clip(((points[:, 0] + self.lidar_range) * scale).astype(np.int32), 0, bins - 1)
+        y_bins = np.clip(((points[:, 1] + self.lidar_range) * scale).astype(np.int32), 0, bins - 1)
+        index = y_bins * bins + x_bins
+        heights = points[:, 2].astype(np.float32, copy=False)
         
-        # 计算网格索引
-        x_bins = np.int32((points[:, 0] + self.lidar_range) * 
-                         self.lidar_bins / (2 * self.lidar_range))
-        y_bins = np.int32((points[:, 1] + self.lidar_range) * 
-                         self.lidar_bins / (2 * self.lidar_range))
+        counts = np.bincount(index, minlength=cells)
+        occupied = counts > 0
         
-        # 限制索引范围
-        x_bins = np.clip(x_bins, 0, self.lidar_bins - 1)
-        y_bins = np.clip(y_bins, 0, self.lidar_bins - 1)
+        # 高度极值: 点数少时直接ufunc.at散射, 点数多时按网格排序后分段归约
+        max_height = min_height = None
+        if 'max_height' in self.bev_channels or 'min_height' in self.bev_channels:
+            if len(points) < self.bev_sort_threshold:
+                max_height = np.full(cells, -np.inf, dtype=np.float32)
+                min_height = np.full(cells, np.inf, dtype=np.float32)
+                np.maximum.at(max_height, index, heights)
+                np.minimum.at(min_height, index, heights)
+            else:
+                order = np.argsort(index, kind='stable')
+                sorted_heights = heights[order]
+                starts = np.concatenate(([0], np.cumsum(counts[occupied])[:-1]))
+                max_height = np.zeros(cells, dtype=np.float32)
+                min_height = np.zeros(cells, dtype=np.float32)
+                max_height[occupied] = np.maximum.reduceat(sorted_heights, starts)
+                min_height[occupied] = np.minimum.reduceat(sorted_heights, starts)
+                
+        for i, channel in enumerate(self.bev_channels):
+            out = bev[i].reshape(-1)
+            if channel == 'max_height':
+                # 与原实现一致: 空网格为0, 高度不低于0
+                np.maximum(max_height, 0, out=out, where=occupied)
+            elif channel == 'min_height':
+                out[occupied] = min_height[occupied]
+            elif channel == 'density':
+                # 对数归一化的点数, 64个点及以上为1
+                np.minimum(np.log1p(counts) / np.log(64), 1.0, out=out, casting='unsafe')
+            elif channel == 'intensity' and points.shape[1] > 3:
+                sums = np.bincount(index, weights=points[:, 3], minlength=cells)
+                np.divide(sums, counts, out=out, where=occupied, casting='unsafe')
+                
+        return bev
         
-        # 更新高度图
-        for x, y, z in zip(x_bins, y_bins, points[:, 2]):
-            height_map[y, x] = max(height_map[y, x], z)
+    def _build_semantic_lut(self):
+        """由类别分组生成查找表: (C, 256)的掩码表, 以及类别id -> 通道下标的表(不属于任何通道为C)"""
+        if self.semantic_output not in SEMANTIC_OUTPUTS:
+            raise ValueError(f"Unknown semantic output '{self.semantic_output}', "
+                             f"expected one of {SEMANTIC_OUTPUTS}")
+        self.semantic_names = list(self.semantic_classes)
+        channels = len(self.semantic_names)
+        if channels >= 255:
+            raise ValueError(f"Too many semantic channels: {channels}")
             
-        return height_map 
-
-    def process_semantic(self, semantic_image: np.ndarray) -> Dict[str, torch.Tensor]:
-        """处理语义分割图像"""
-        # 调整大小
-        semantic = cv2.resize(semantic_image, self.img_size, 
-                             interpolation=cv2.INTER_NEAREST)
+        self._semantic_table = np.zeros((channels, 256), dtype=np.uint8)
+        self._semantic_index = np.full(256, channels, dtype=np.uint8)
+        for i, name in enumerate(self.semantic_names):
+            ids = self.semantic_classes[name]
+            ids = [ids] if isinstance(ids, int) else list(ids)
+            if self.semantic_output == 'one_hot' and (self._semantic_index[ids] != channels).any():
+                raise ValueError(f"Semantic class '{name}' overlaps another group, "
+                                 f"one_hot output needs disjoint groups")
+            self._semantic_table[i, ids] = 1
+            self._semantic_index[ids] = i
+        self._semantic_buffer = None
         
-        # 提取不同类别的掩码
-        masks = {}
-        masks['road'] = (semantic == 7).astype(np.float32)
-        masks['vehicle'] = (semantic == 10).astype(np.float32)
-        masks['pedestrian'] = (semantic == 4).astype(np.float32)
-        masks['traffic_sign'] = (semantic == 12).astype(np.float32)
+    def semantic_masks(self, semantic_image: np.ndarray,
+                       out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """语义标签图转为(C, H, W)的float32掩码, 通道顺序同semantic_classes
         
-        # 转换为tensor
-        for k, v in masks.items():
-            masks[k] = torch.from_numpy(v).to(self.device)
+        每帧只做一次查表, 不随通道数增加遍历次数。指定out时结果直接写入out。
+        """
+        # 调整大小, 标签用最近邻插值
+        semantic = semantic_image
+        if semantic.shape[1::-1] != tuple(self.img_size):
+            semantic = cv2.resize(semantic, self.img_size, interpolation=cv2.INTER_NEAREST)
             
-        return masks
-
-    def process_depth(self, depth_image: np.ndarray) -> torch.Tensor:
-        """处理深度图像"""
-        # 调整大小
-        depth = cv2.resize(depth_image, self.img_size)
-        
-        # 转换为实际深度值
-        depth = depth.astype(np.float32)
-        depth = 1000 * depth  # 转换为米
+        if self.semantic_output == 'one_hot':
+            # 上传uint8通道下标图, 在设备上散射为one-hot; 未分组的类别写入0
+            channels = len(self.semantic_names)
+            index = torch.from_numpy(np.take(self._semantic_index, semantic, mode='clip'))
+            index = index.to(self.device).long().unsqueeze(0)
+            if out is None:
+                out = torch.empty((channels,) + semantic.shape, device=self.device)
+            out.zero_()
+            return out.scatter_(0, index.clamp(max=channels - 1), (index < channels).to(out.dtype))
+            
+        # 一次gather写入预分配的(C, H, W) uint8缓冲区; uint8标签不会越界, mode='clip'免去越界检查和输出缓冲
+        shape = (len(self.semantic_names),) + semantic.shape
+        if self._semantic_buffer is None or self._semantic_buffer.shape != shape:
+            self._semantic_buffer = np.empty(shape, dtype=np.uint8)
+        np.take(self._semantic_table, semantic, axis=1, out=self._semantic_buffer, mode='clip')
+        if out is not None:
+            return out.copy_(torch.from_numpy(self._semantic_buffer))
+        return torch.from_numpy(self._semantic_buffer).to(self.device).float()
         
-        # 裁剪范围
-        depth = np.clip(depth, 0, 100.0)
+    def process_semantic(self, semantic_image: np.ndarray) -> Dict[str, torch.Tensor]:
+        """处理语义分割图像, 返回各类别分组的(H, W)掩码"""
+        masks = self.semantic_masks(semantic_image)
+        return dict(zip(self.semantic_names, masks))
+
+    def process_depth(self, depth_image: np.ndarray,
+                      out: Optional[torch.Tensor] = None) -> torch.Tensor:
+        """处理深度图像, 返回(1, H, W)
         
-        # 标准化
-        depth = (depth - depth.mean()) / (depth.std() + 1e-7)
+        输入可以是BGRA/BGR编码图、pack_depth得到的uint32编码(H, W), 或以米为单位的float32(H, W)。
+        指定out时结果直接写入out, CPU上的out在解码和缩放时就作为输出缓冲区。
+        """
+        target = out.numpy()[0] if out is not None and out.device.type == 'cpu' else None
+        if depth_image.dtype == np.uint8:
+            depth_image = pack_depth(depth_image)
+            
+        if self.depth_reduced and depth_image.shape[1::-1] != tuple(self.img_size):
+            # 先按输出尺寸采样编码值, 只解码输出分辨率的像素
+            rows, cols = self._depth_sample_index(depth_image.shape)
+            depth_image = depth_image[rows, cols]
+            
+        # 编码值 -> 米, 乘法时直接转换为float32
+        resize = depth_image.shape[1::-1] != tuple(self.img_size)
+        depth = np.multiply(depth_image, DEPTH_SCALE if depth_image.dtype == np.uint32 else 1.0,
+                            dtype=np.float32, out=None if resize else target)
         
+        # 调整大小
+        if resize:
+            depth = cv2.resize(depth, self.img_size, dst=target)
+            
+        # 裁剪范围并按固定常数归一化
+        if self.depth_mode == 'linear':
+            np.clip(depth, 0.0, self.depth_max, out=depth)
+            depth *= np.float32(1.0 / self.depth_max)
+        elif self.depth_mode == 'log':
+            np.clip(depth, self.depth_min, self.depth_max, out=depth)
+            np.log(depth, out=depth)
+            depth -= np.float32(np.log(self.depth_min))
+            depth *= np.float32(1.0 / np.log(self.depth_max / self.depth_min))
+        else:
+            np.clip(depth, self.depth_min, self.depth_max, out=depth)
+            np.divide(np.float32(self.depth_min), depth, out=depth)
+            
         # 转换为tensor
         depth = torch.from_numpy(depth).unsqueeze(0)
+        if out is not None:
+            return out if target is not None else out.copy_(depth)
         return depth.to(self.device)
+        
+    def _depth_sample_index(self, shape: tuple):
+        """输出尺寸的最近邻采样下标, 与cv2.INTER_NEAREST一致"""
+        if shape not in self._depth_samples:
+            width, height = self.img_size
+            # 与cv2相同的浮点计算 floor(i * (1 / (dst / src)))
+            rows = np.minimum(np.floor(np.arange(height) * (1.0 / (height / shape[0]))),
+                              shape[0] - 1)
+            cols = np.minimum(np.floor(np.arange(width) * (1.0 / (width / shape[1]))), shape[1] - 1)
+            rows, cols = rows.astype(np.intp), cols.astype(np.intp)
+            self._depth_samples[shape] = (rows[:, None], cols)
+        return self._depth_samples[shape]
 
     def fuse_sensors(self, sensor_data: Dict) -> torch.Tensor:
-        """融合多个传感器数据"""
-        features = []
-        
-        # 处理RGB图像
-        if 'rgb' in sensor_data:
-            rgb_features = self.process_camera(sensor_data['rgb'])
-            features.append(rgb_features)
-            
-        # 处理深度图像
-        if 'depth' in sensor_data:
-            depth_features = self.process_depth(sensor_data['depth'])
-            features.append(depth_features)
-            
-        # 处理语义分割
-        if 'semantic' in sensor_data:
-            semantic_features = self.process_semantic(sensor_data['semantic'])
-            features.extend(semantic_features.values())
-            
-        # 处理激光雷达
-        if 'lidar' in sensor_data:
-            lidar_features = self.process_lidar(sensor_data['lidar'])
-            features.append(lidar_features)
-            
-        # 拼接特征
-        return torch.cat(features, dim=1)
\ No newline at end of file
+        """融合多个传感器数据, 返回按FusionLayout排列的(C, H, W), 缺失的模态为0"""
+        if self._fusion is None:
+            from src.environments.sensors.fusion import FusionLayout
+            self._fusion = FusionLayout(self, self.config.get('fusion_modalities'))
+        return self._fusion.fuse(sensor_data)
@@ -0,0 +1,128 @@
+"""有界传感器数据队列"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# 队列满时的处理方式
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class RingQueue:
+    """固定容量的环形队列, 元素为(帧号, 数据)
+
+    回调线程put, 消费方get或get_latest。队列满时按policy丢弃最旧的数据、丢弃新数据,
+    或阻塞回调线程直到有空位(超时后丢弃新数据)。容量固定, 消费方处理变慢时内存不会增长。
+    """
+    def __init__(self, capacity: int = 4, policy: str = 'drop_oldest',
+                 block_timeout: Optional[float] = 1.0):
+        if capacity < 1:
+            raise ValueError(f"RingQueue needs capacity >= 1, got {capacity}")
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{policy}', expected one of {OVERFLOW_POLICIES}")
+        self.capacity = capacity
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self._frames = [-1] * capacity
+        self._items = [None] * capacity
+        self._head = 0  # 最旧元素的位置
+        self._size = 0
+        self._cond = threading.Condition()
+
+        # 统计: 写入、丢弃(溢出)、跳过(get_latest越过的旧帧)、消费的数量和帧号
+        self.produced = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.consumed = 0
+        self.latest_frame = -1
+        self.consumed_frame = -1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, frame: int, item: Any) -> bool:
+        """写入一帧数据, 因溢出被丢弃时返回False"""
+        with self._cond:
+            self.produced += 1
+            if self._size == self.capacity:
+                if self.policy == 'drop_newest':
+                    self.dropped += 1
+                    return False
+                if self.policy == 'block':
+                    has_room = self._cond.wait_for(lambda: self._size < self.capacity,
+                                                   self.block_timeout)
+                    if not has_room:
+                        self.dropped += 1
+                        return False
+                else:
+                    self._pop()
+                    self.dropped += 1
+            tail = (self._head + self._size) % self.capacity
+            self._frames[tail] = frame
+            self._items[tail] = item
+            self._size += 1
+            self.latest_frame = max(self.latest_frame, frame)
+            self._cond.notify_all()
+            return True
+
+    def _pop(self) -> Tuple[int, Any]:
+        """取出最旧的元素, 调用方持有锁"""
+        frame, item = self._frames[self._head], self._items[self._head]
+        self._items[self._head] = None  # 释放引用
+        self._head = (self._head + 1) % self.capacity
+        self._size -= 1
+        return frame, item
+
+    def _consume(self, entry: Tuple[int, Any]) -> Tuple[int, Any]:
+        """记录消费的帧, 唤醒阻塞的写入方, 调用方持有锁"""
+        self.consumed += 1
+        self.consumed_frame = max(self.consumed_frame, entry[0])
+        self._cond.notify_all()
+        return entry
+
+    def get(self) -> Optional[Tuple[int, Any]]:
+        """按顺序取出最旧的一帧, 队列为空时返回None"""
+        with self._cond:
+            if self._size == 0:
+                return None
+            return self._consume(self._pop())
+
+    def get_latest(self, frame: Optional[int] = None,
+                   timeout: float = 0.0) -> Optional[Tuple[int, Any]]:
+        """取出不晚于frame的最新一帧, 更旧的帧被跳过, 更新的帧留在队列中
+
+        frame为None时取出队列中最新的一帧并清空队列。队列中还没有到达frame的数据时
+        最多等待timeout秒, 之后返回已有的最新一帧; 没有任何数据时返回None。
+        """
+        with self._cond:
+            if frame is not None and timeout > 0:
+                self._cond.wait_for(lambda: self.latest_frame >= frame, timeout)
+            latest = None
+            while self._size and (frame is None or self._frames[self._head] <= frame):
+                if latest is not None:
+                    self.skipped += 1
+                latest = self._pop()
+            return None if latest is None else self._consume(latest)
+
+    def clear(self):
+        """清空队列, 保留统计"""
+        with self._cond:
+            while self._size:
+                self._pop()
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """队列长度、丢弃/跳过数量, 以及最新帧与已消费帧之间的帧数差"""
+        with self._cond:
+            consumed = self.consumed_frame >= 0
+            lag = self.latest_frame - self.consumed_frame if consumed else self._size
+            return {
+                'size': self._size,
+                'capacity': self.capacity,
+                'produced': self.produced,
+                'dropped': self.dropped,
+                'skipped': self.skipped,
+                'consumed': self.consumed,
+                'latest_frame': self.latest_frame,
+                'consumed_frame': self.consumed_frame,
+                'lag': lag
+            }
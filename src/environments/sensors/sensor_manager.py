@@ -1,10 +1,11 @@
 import carla
 import numpy as np
-from typing import Dict, Any
-import queue
+from typing import Dict, Optional
 import weakref
 import cv2
 
+from src.environments.sensors.ring_queue import RingQueue
+
 
 class SensorManager:
     """传感器管理器"""
@@ -13,6 +14,11 @@ class SensorManager:
         self.sensors = {}
         self.sensor_queues = {}
         
+        # 有界队列: 容量和溢出策略(drop_oldest/drop_newest/block), 可在单个传感器配置中覆盖
+        self.queue_size = config.get('queue_size', 4)
+        self.queue_policy = config.get('queue_policy', 'drop_oldest')
+        self.sync_timeout = config.get('sync_timeout', 2.0)
+        
     def setup_sensors(self, world: carla.World, vehicle: carla.Vehicle):
         """设置传感器"""
         # 清理现有传感器
@@ -37,18 +43,42 @@ class SensorManager:
             self._setup_lane_sensor(world, vehicle)
             
     def get_sensor_data(self) -> Dict:
-        """获取传感器数据"""
-        sensor_data = {}
+        """获取各传感器最新的数据, 队列中更旧的数据被跳过"""
+        return self.get_latest()
+        
+    def get_latest(self, frame: Optional[int] = None, timeout: Optional[float] = None) -> Dict:
+        """取出各传感器不晚于frame的最新数据
         
-        # 获取相机数据
-        for name, queue in self.sensor_queues.items():
-            if not queue.empty():
-                sensor_data[name] = queue.get()
+        frame为None时取队列中最新的数据。指定frame时相机和激光雷达最多等待timeout秒
+        (默认sync_timeout), 碰撞和车道等事件传感器不等待; 晚于frame的数据留在队列中。
+        """
+        if timeout is None:
+            timeout = self.sync_timeout
+            
+        sensor_data = {}
+        for name, sensor_queue in self.sensor_queues.items():
+            wait = timeout if frame is not None and name not in ('collision', 'lane') else 0.0
+            entry = sensor_queue.get_latest(frame, wait)
+            if entry is not None:
+                sensor_data[name] = entry[1]
                 
         return sensor_data
         
+    def queue_stats(self) -> Dict[str, Dict]:
+        """各传感器队列的丢弃数量和帧延迟"""
+        return {name: sensor_queue.stats() for name, sensor_queue in self.sensor_queues.items()}
+        
+    def _make_queue(self, config: Optional[Dict] = None) -> RingQueue:
+        """创建传感器的有界队列"""
+        config = config or {}
+        return RingQueue(config.get('queue_size', self.queue_size),
+                         config.get('queue_policy', self.queue_policy))
+        
     def cleanup(self):
         """清理传感器"""
+        # 先清空队列, 唤醒block策略下等待空位的回调
+        for sensor_queue in self.sensor_queues.values():
+            sensor_queue.clear()
         for sensor in self.sensors.values():
             if sensor is not None and sensor.is_alive:
                 sensor.destroy()
@@ -73,11 +103,11 @@ class SensorManager:
         camera = world.spawn_actor(blueprint, transform, attach_to=vehicle)
         
         # 设置回调
-        queue = queue.Queue()
-        camera.listen(lambda image: self._camera_callback(image, queue))
+        sensor_queue = self._make_queue(config)
+        camera.listen(lambda image: self._camera_callback(image, sensor_queue))
         
         self.sensors[name] = camera
-        self.sensor_queues[name] = queue
+        self.sensor_queues[name] = sensor_queue
         
     def _setup_lidar(self, world: carla.World, vehicle: carla.Vehicle, name: str, config: Dict):
         """设置激光雷达"""
@@ -100,52 +130,52 @@ class SensorManager:
         lidar = world.spawn_actor(blueprint, transform, attach_to=vehicle)
         
         # 设置回调
-        queue = queue.Queue()
-        lidar.listen(lambda data: self._lidar_callback(data, queue))
+        sensor_queue = self._make_queue(config)
+        lidar.listen(lambda data: self._lidar_callback(data, sensor_queue))
         
         self.sensors[name] = lidar
-        self.sensor_queues[name] = queue
+        self.sensor_queues[name] = sensor_queue
         
     def _setup_collision_sensor(self, world: carla.World, vehicle: carla.Vehicle):
         """设置碰撞传感器"""
         blueprint = world.get_blueprint_library().find('sensor.other.collision')
         sensor = world.spawn_actor(blueprint, carla.Transform(), attach_to=vehicle)
         
-        queue = queue.Queue()
-        sensor.listen(lambda event: self._collision_callback(event, queue))
+        sensor_queue = self._make_queue()
+        sensor.listen(lambda event: self._collision_callback(event, sensor_queue))
         
         self.sensors['collision'] = sensor
-        self.sensor_queues['collision'] = queue
+        self.sensor_queues['collision'] = sensor_queue
         
     def _setup_lane_sensor(self, world: carla.World, vehicle: carla.Vehicle):
         """设置车道传感器"""
         blueprint = world.get_blueprint_library().find('sensor.other.lane_invasion')
         sensor = world.spawn_actor(blueprint, carla.Transform(), attach_to=vehicle)
         
-        queue = queue.Queue()
-        sensor.listen(lambda event: self._lane_callback(event, queue))
+        sensor_queue = self._make_queue()
+        sensor.listen(lambda event: self._lane_callback(event, sensor_queue))
         
         self.sensors['lane'] = sensor
-        self.sensor_queues['lane'] = queue
+        self.sensor_queues['lane'] = sensor_queue
         
     def _camera_callback(self, image, sensor_queue):
         """相机回调"""
         array = np.frombuffer(image.raw_data, dtype=np.uint8)
         array = array.reshape((image.height, image.width, 4))
         array = array[:, :, :3]  # 去除alpha通道
-        sensor_queue.put(array)
+        sensor_queue.put(image.frame, array)
         
     def _lidar_callback(self, data, sensor_queue):
         """激光雷达回调"""
         points = np.frombuffer(data.raw_data, dtype=np.float32).reshape([-1, 4])
-        sensor_queue.put(points)
+        sensor_queue.put(data.frame, points)
         
     def _collision_callback(self, event, sensor_queue):
         """碰撞回调"""
         impulse = event.normal_impulse
         intensity = np.sqrt(impulse.x**2 + impulse.y**2 + impulse.z**2)
-        sensor_queue.put(intensity)
+        sensor_queue.put(event.frame, intensity)
         
     def _lane_callback(self, event, sensor_queue):
         """车道偏离回调"""
-        sensor_queue.put(True) 
\ No newline at end of file
+        sensor_queue.put(event.frame, True) 
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""共享内存观测缓冲: 工作进程原地写入, 主进程零拷贝读取"""
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from gym import spaces
+
+
+def space_to_spec(observation_space: spaces.Space) -> Dict[Optional[str], Tuple[tuple, np.dtype]]:
+    """由观测空间得到每个观测键的(shape, dtype)"""
+    if isinstance(observation_space, spaces.Dict):
+        return {
+            key: (tuple(space.shape), np.dtype(space.dtype))
+            for key, space in observation_space.spaces.items()
+        }
+    return {None: (tuple(observation_space.shape), np.dtype(observation_space.dtype))}
+
+
+def copy_obs(obs):
+    """复制观测, 用于需要保留超过一个环形周期的共享内存视图"""
+    if isinstance(obs, dict):
+        return {key: np.array(value) for key, value in obs.items()}
+    return np.array(obs)
+
+
+class SharedObservationBuffer:
+    """共享内存观测环形缓冲
+
+    每个观测键对应一块形状为 (n_slots, num_envs, *shape) 的共享内存,
+    第s个槽位 arrays[key][s] 就是按环境维度堆叠好的连续批量观测。
+    主进程轮转使用槽位, 返回的视图在之后 n_slots - 1 次step内保持有效。
+    """
+    def __init__(self, spec: Dict, num_envs: int, n_slots: int = 2,
+                 names: Optional[Dict] = None):
+        self.spec = spec
+        self.num_envs = num_envs
+        self.n_slots = n_slots
+        self._owner = names is None
+
+        self._shms = {}
+        self.arrays = {}
+        for key, (shape, dtype) in spec.items():
+            full_shape = (n_slots, num_envs) + tuple(shape)
+            nbytes = int(np.prod(full_shape)) * np.dtype(dtype).itemsize
+            if self._owner:
+                shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+            else:
+                shm = shared_memory.SharedMemory(name=names[key])
+            self._shms[key] = shm
+            self.arrays[key] = np.ndarray(full_shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def from_space(cls, observation_space: spaces.Space, num_envs: int,
+                   n_slots: int = 2) -> 'SharedObservationBuffer':
+        """按观测空间分配共享内存"""
+        return cls(space_to_spec(observation_space), num_envs, n_slots)
+
+    @property
+    def names(self) -> Dict:
+        """共享内存名称, 供工作进程挂载"""
+        return {key: shm.name for key, shm in self._shms.items()}
+
+    @property
+    def nbytes(self) -> int:
+        """共享内存总字节数"""
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def write(self, slot: int, env_idx: int, obs):
+        """将单个环境的观测写入槽位, 形状或类型与观测空间不符时抛出ValueError"""
+        if None in self.arrays:
+            self._copy(None, self.arrays[None][slot, env_idx], obs)
+            return
+        for key, array in self.arrays.items():
+            if key not in obs:
+                raise ValueError(f"Observation is missing key '{key}'")
+            self._copy(key, array[slot, env_idx], obs[key])
+
+    @staticmethod
+    def _copy(key, target: np.ndarray, value):
+        """不做广播, 只允许同类数值间的转换(如float64 -> float32)"""
+        value = np.asarray(value)
+        if value.shape != target.shape:
+            raise ValueError(f"Observation '{key}' has shape {value.shape}, "
+                             f"expected {target.shape}")
+        if not np.can_cast(value.dtype, target.dtype, casting='same_kind'):
+            raise ValueError(f"Observation '{key}' has dtype {value.dtype}, "
+                             f"expected {target.dtype}")
+        np.copyto(target, value, casting='same_kind')
+
+    def view(self, slot: int):
+        """获取槽位的批量观测视图(零拷贝)"""
+        if None in self.arrays:
+            return self.arrays[None][slot]
+        return {key: array[slot] for key, array in self.arrays.items()}
+
+    def close(self):
+        """释放共享内存, 创建者负责unlink"""
+        self.arrays.clear()
+        for shm in self._shms.values():
+            shm.close()
+            if self._owner:
+                shm.unlink()
+        self._shms.clear()
@@ -0,0 +1,74 @@
+"""纯Python桩环境, 用于无CARLA服务器时的测试与基准"""
+import time
+from typing import Dict, Tuple
+
+import gym
+import numpy as np
+from gym import spaces
+
+
+class StubEnv(gym.Env):
+    """桩环境
+
+    观测/动作空间与RLEnv一致, 观测内容由步数确定性生成,
+    step_delay用于模拟一次仿真服务器往返的耗时。
+    """
+    def __init__(self, config: Dict):
+        super().__init__()
+        self.step_delay = config.get('step_delay', 0.0)
+        self.episode_length = config.get('episode_length', 100)
+        self.seed_offset = config.get('seed', 0)
+
+        # 与RLEnv相同的动作空间
+        self.action_space = spaces.Box(
+            low=np.array([-1.0, -1.0, 0.0]),
+            high=np.array([1.0, 1.0, 1.0]),
+            dtype=np.float32
+        )
+
+        # 与RLEnv默认配置相同的观测空间, 相机为归一化的float32
+        camera_dtype = np.dtype(config.get('camera_dtype', np.float32))
+        camera_high = 255 if camera_dtype == np.uint8 else 1.0
+        self.observation_space = spaces.Dict({
+            'camera': spaces.Box(0, camera_high, tuple(config.get('camera_shape', (3, 84, 84))),
+                                 dtype=camera_dtype),
+            'lidar': spaces.Box(-np.inf, np.inf, tuple(config.get('lidar_shape', (1000, 4))),
+                                dtype=np.float32),
+            'state': spaces.Box(-np.inf, np.inf, (10,), dtype=np.float32)
+        })
+
+        self.current_step = 0
+
+    def reset(self) -> Dict[str, np.ndarray]:
+        """重置环境"""
+        self.current_step = 0
+        return self._get_obs()
+
+    def step(self, action: np.ndarray) -> Tuple[Dict[str, np.ndarray], float, bool, Dict]:
+        """环境步进"""
+        if self.step_delay > 0:
+            time.sleep(self.step_delay)
+
+        self.current_step += 1
+        obs = self._get_obs()
+        reward = float(-np.abs(action).sum())
+        done = self.current_step >= self.episode_length
+        info = {'step': self.current_step, 'speed': float(self.current_step % 30)}
+
+        return obs, reward, done, info
+
+    def _get_obs(self) -> Dict[str, np.ndarray]:
+        """生成确定性观测"""
+        value = self.current_step + self.seed_offset
+        return {
+            key: np.full(space.shape, value % 256, dtype=space.dtype)
+            for key, space in self.observation_space.spaces.items()
+        }
+
+    def render(self, mode='human'):
+        """渲染环境"""
+        return None
+
+    def close(self):
+        """关闭环境"""
+        pass
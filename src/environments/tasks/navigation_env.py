@@ -1,4 +1,5 @@
 from typing import Dict, Tuple
+import carla
 import numpy as np
 import gym
 from gym import spaces
@@ -22,6 +23,7 @@ class NavigationEnv(CarlaEnv):
         
         # 任务相关参数
         self.target_location = None
+        self._target_position = None  # 目标点坐标的numpy形式
         self.start_location = None
         self.min_distance = config.get('min_distance', 5.0)
         self.time_limit = config.get('time_limit', 1000)
@@ -36,19 +38,26 @@ class NavigationEnv(CarlaEnv):
         self.steps = 0
         self.start_location = self.vehicle.get_location()
         self.target_location = self._get_random_target()
+        self._target_position = np.array([
+            self.target_location.x, self.target_location.y, self.target_location.z
+        ], dtype=np.float32)
         
         # 处理观测
         processed_obs = self.obs_processor.process(obs)
         
         return processed_obs
         
-    def step(self, action: np.ndarray) -> Tuple[Dict, float, bool, Dict]:
-        """环境步进"""
+    def step(self, action: np.ndarray, compute_obs: bool = True,
+             process_obs: bool = True) -> Tuple[Dict, float, bool, Dict]:
+        """环境步进
+
+        process_obs为False时返回未处理的原始观测, 之后调用process_obs处理。
+        """
         # 调用父类的step
-        obs, _, done, info = super().step(action)
+        obs, _, done, info = super().step(action, compute_obs, process_obs)
         
         # 处理观测
-        processed_obs = self.obs_processor.process(obs)
+        processed_obs = self.obs_processor.process(obs) if compute_obs and process_obs else obs
         
         # 计算奖励
         reward = self._compute_reward(processed_obs, action, info)
@@ -67,6 +76,12 @@ class NavigationEnv(CarlaEnv):
         
         return processed_obs, reward, done, info
         
+    def process_obs(self, raw_obs: Dict) -> Dict:
+        """处理process_obs=False时得到的原始观测"""
+        if not raw_obs:
+            return raw_obs
+        return self.obs_processor.process(super().process_obs(raw_obs))
+        
     def _create_observation_space(self) -> gym.Space:
         """创建观察空间"""
         camera_shape = self.config['sensors']['camera_rgb']['shape']
@@ -174,8 +189,9 @@ class NavigationEnv(CarlaEnv):
         if self.target_location is None or self.vehicle is None:
             return float('inf')
             
-        current_location = self.vehicle.get_location()
-        return current_location.distance(self.target_location)
+        # 读取本帧车辆状态快照, 不再单独查询位置
+        position = self._get_vehicle_state()['position']
+        return float(np.linalg.norm(position - self._target_position))
         
     def _check_success(self) -> bool:
         """检查是否完成任务"""
@@ -183,6 +199,5 @@ class NavigationEnv(CarlaEnv):
         
     def _get_random_target(self) -> carla.Location:
         """获取随机目标点"""
-        spawn_points = self.world.get_map().get_spawn_points()
-        target_transform = np.random.choice(spawn_points)
+        target_transform = np.random.choice(self._get_spawn_points())
         return target_transform.location 
\ No newline at end of file
@@ -0,0 +1,241 @@
+"""向量化环境: 在子进程中并行运行多个环境"""
+import multiprocessing as mp
+import traceback
+from multiprocessing import resource_tracker
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.environments.shared_obs import SharedObservationBuffer
+
+
+def _worker(remote, parent_remote, env_fn: Callable, env_idx: int):
+    """工作进程: 持有一个环境实例并响应主进程命令
+
+    每条回复为 ('ok', 结果) 或 ('error', 异常堆栈); 出错后工作进程退出。
+    """
+    parent_remote.close()
+    env = None
+    shm_buffer = None
+    try:
+        env = env_fn()
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'step':
+                action, slot = data
+                obs, reward, done, info = env.step(action)
+                if done:
+                    # 自动重置, 终止观测放入info
+                    info['terminal_observation'] = obs
+                    obs = env.reset()
+                if shm_buffer is not None:
+                    # 观测写入共享内存槽位, 管道只传索引和小数据
+                    shm_buffer.write(slot, env_idx, obs)
+                    obs = None
+                remote.send(('ok', (obs, reward, done, info)))
+            elif cmd == 'reset':
+                obs = env.reset()
+                if shm_buffer is not None:
+                    shm_buffer.write(data, env_idx, obs)
+                    obs = None
+                remote.send(('ok', obs))
+            elif cmd == 'get_spaces':
+                remote.send(('ok', (env.observation_space, env.action_space)))
+            elif cmd == 'attach_shm':
+                spec, names, num_envs, n_slots = data
+                shm_buffer = SharedObservationBuffer(spec, num_envs, n_slots, names)
+                remote.send(('ok', True))
+            elif cmd == 'close':
+                remote.close()
+                break
+            else:
+                raise NotImplementedError(f"Unknown command {cmd}")
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        # 把异常堆栈交给主进程, 由它在recv时重新抛出
+        try:
+            remote.send(('error', f"worker {env_idx}:\n{traceback.format_exc()}"))
+        except (BrokenPipeError, OSError):
+            pass
+    finally:
+        if shm_buffer is not None:
+            shm_buffer.close()
+        if env is not None:
+            env.close()
+
+
+def _receive(remote):
+    """接收工作进程的回复, 工作进程出错或已退出时抛出RuntimeError"""
+    try:
+        status, result = remote.recv()
+    except (EOFError, ConnectionError) as e:
+        raise RuntimeError("Vectorized environment worker exited unexpectedly") from e
+    if status == 'error':
+        raise RuntimeError(f"Vectorized environment worker raised an exception in {result}")
+    return result
+
+
+class VecCarlaEnv:
+    """多进程向量化环境
+
+    每个环境运行在独立的子进程中, reset/step返回按环境维度堆叠的观测数组。
+    env_fns中的工厂函数需可被pickle (例如functools.partial(RLEnv, config))。
+
+    shared_memory=True时观测经由共享内存环形槽位传输, 返回的是零拷贝视图,
+    在之后 n_slots - 1 次reset/step内有效; 需要更久保留时请用copy_obs复制。
+    """
+    def __init__(self, env_fns: Sequence[Callable], start_method: Optional[str] = None,
+                 shared_memory: bool = False, n_slots: int = 2):
+        self.num_envs = len(env_fns)
+        self.waiting = False
+        self.closed = False
+        self.shared_memory = shared_memory
+        self.n_slots = n_slots
+        self.shm_buffer = None
+        self._slot = 0
+
+        # CARLA客户端不是fork安全的, 默认使用forkserver/spawn
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn'
+        ctx = mp.get_context(start_method)
+
+        # 先启动resource_tracker, 让工作进程共享同一跟踪器, 避免子进程退出时误删共享内存
+        if self.shared_memory:
+            resource_tracker.ensure_running()
+
+        # 创建工作进程
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(self.num_envs)])
+        self.processes = []
+        for env_idx, (work_remote, remote, env_fn) in enumerate(
+                zip(self.work_remotes, self.remotes, env_fns)):
+            process = ctx.Process(target=_worker, args=(work_remote, remote, env_fn, env_idx),
+                                  daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        # 获取观测和动作空间
+        self.remotes[0].send(('get_spaces', None))
+        self.observation_space, self.action_space = _receive(self.remotes[0])
+
+        # 按观测空间分配共享内存并让工作进程挂载
+        if self.shared_memory:
+            self.shm_buffer = SharedObservationBuffer.from_space(
+                self.observation_space, self.num_envs, self.n_slots)
+            for remote in self.remotes:
+                remote.send(('attach_shm', (self.shm_buffer.spec, self.shm_buffer.names,
+                                            self.num_envs, self.n_slots)))
+            self._receive_all()
+
+    def reset(self) -> Dict[str, np.ndarray]:
+        """重置所有环境"""
+        slot = self._next_slot()
+        for remote in self.remotes:
+            remote.send(('reset', slot))
+        obs = self._receive_all()
+        if self.shm_buffer is not None:
+            return self.shm_buffer.view(slot)
+        return self._stack_obs(obs)
+
+    def step_async(self, actions: np.ndarray):
+        """异步下发动作"""
+        slot = self._next_slot()
+        for remote, action in zip(self.remotes, actions):
+            remote.send(('step', (action, slot)))
+        self.waiting = True
+
+    def step_wait(self) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray, List[Dict]]:
+        """等待所有环境完成步进"""
+        self.waiting = False
+        results = self._receive_all()
+        obs, rewards, dones, infos = zip(*results)
+        if self.shm_buffer is not None:
+            obs = self.shm_buffer.view(self._slot)
+        else:
+            obs = self._stack_obs(obs)
+        return (
+            obs,
+            np.array(rewards, dtype=np.float32),
+            np.array(dones, dtype=bool),
+            list(infos)
+        )
+
+    def step(self, actions: np.ndarray
+             ) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray, List[Dict]]:
+        """同步步进所有环境"""
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        """关闭所有工作进程"""
+        if self.closed:
+            return
+        # 已退出的工作进程(出错或被杀死)的管道会抛出EOFError/BrokenPipeError, 跳过即可
+        for remote in self.remotes:
+            try:
+                if self.waiting:
+                    remote.recv()
+                remote.send(('close', None))
+            except (EOFError, OSError):
+                pass
+        self.waiting = False
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        if self.shm_buffer is not None:
+            self.shm_buffer.close()
+        self.closed = True
+
+    def _receive_all(self) -> List:
+        """接收所有工作进程的回复; 先全部收完再抛出第一个错误, 避免管道中残留回复"""
+        results = []
+        error = None
+        for remote in self.remotes:
+            try:
+                results.append(_receive(remote))
+            except RuntimeError as e:
+                error = error or e
+        if error is not None:
+            raise error
+        return results
+
+    def _next_slot(self) -> int:
+        """轮转到下一个共享内存槽位"""
+        self._slot = (self._slot + 1) % self.n_slots
+        return self._slot
+
+    def _stack_obs(self, obs_list: Sequence) -> Dict[str, np.ndarray]:
+        """按环境维度堆叠观测"""
+        if isinstance(obs_list[0], dict):
+            return {key: np.stack([obs[key] for obs in obs_list]) for key in obs_list[0].keys()}
+        return np.stack(obs_list)
+
+    def __len__(self) -> int:
+        return self.num_envs
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()
+
+
+def make_vec_env(env_class: Callable, config: Dict, num_envs: int,
+                 start_method: Optional[str] = None, shared_memory: bool = False) -> VecCarlaEnv:
+    """按配置创建向量化环境
+
+    每个环境连接到独立的CARLA服务器, 端口按port_stride递增。
+    """
+    base_port = config.get('port', 2000)
+    port_stride = config.get('port_stride', 2)
+
+    env_fns = []
+    for i in range(num_envs):
+        env_config = dict(config)
+        env_config['port'] = base_port + i * port_stride
+        env_config['seed'] = config.get('seed', 0) + i
+        env_fns.append(partial(env_class, env_config))
+
+    return VecCarlaEnv(env_fns, start_method, shared_memory=shared_memory)
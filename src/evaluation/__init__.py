@@ -1,11 +1,13 @@
 """评估模块"""
-from src.utils.evaluator import ModelEvaluator
-from .distributed_evaluator import DistributedEvaluator
-# from .metrics import MetricCalculator
-from src.evaluation.distributed_evaluator import EvaluationWorker
+from src.utils.lazy import lazy_module
 
-__all__ = [
-    'ModelEvaluator',
-    'DistributedEvaluator',
-    'EvaluationWorker'
-] 
\ No newline at end of file
+# 导出名称 -> 所在模块, 访问时才导入, 避免加载包时引入重依赖
+_LAZY_IMPORTS = {
+    'ModelEvaluator': 'src.utils.evaluator',
+    'DistributedEvaluator': 'src.evaluation.distributed_evaluator',
+    'EvaluationWorker': 'src.evaluation.distributed_evaluator'
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
@@ -1,11 +1,16 @@
 """训练模块"""
-from .train_manager import TrainManager
-from .parallel_trainer import ParallelTrainer
-from src.training.utils.replay_buffer import ReplayBuffer #, Trajectory
+from src.utils.lazy import lazy_module
 
-__all__ = [
-    'TrainManager',
-    'ParallelTrainer',
-    'ReplayBuffer',
-    #'Trajectory'
-] 
\ No newline at end of file
+# 导出名称 -> 所在模块, 访问时才导入, 避免加载包时引入重依赖
+_LAZY_IMPORTS = {
+    'TrainManager': 'src.training.train_manager',
+    'ParallelTrainer': 'src.training.parallel_trainer',
+    'ReplayBuffer': 'src.training.utils.replay_buffer',
+    'ArrayReplayBuffer': 'src.training.utils.replay_buffer',
+    'PrioritizedReplayBuffer': 'src.training.utils.replay_buffer',
+    'MemmapReplayBuffer': 'src.training.utils.memmap_replay_buffer'
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
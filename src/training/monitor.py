@@ -1,9 +1,13 @@
+import csv
+import json
 import time
 import numpy as np
 from typing import Dict, List
 import matplotlib.pyplot as plt
 from collections import deque
 
+from src.utils.timing import StageTimer, stage_timer
+
 class TrainingMonitor:
     """训练监控器"""
     def __init__(self, config: Dict):
@@ -27,6 +31,9 @@ class TrainingMonitor:
         self.start_time = time.time()
         self.step_times = deque(maxlen=100)
         
+        # 分阶段耗时分位数, 阶段名 -> {count, mean_ms, p50_ms, p95_ms, p99_ms, ...}
+        self.stage_latency = {}
+        
     def update(self, stats: Dict):
         """更新统计信息"""
         # 更新性能指标
@@ -54,6 +61,28 @@ class TrainingMonitor:
         # 更新时间
         if 'step_time' in stats:
             self.step_times.append(stats['step_time'])
+        if 'stage_latency' in stats:
+            self.stage_latency.update(stats['stage_latency'])
+            
+    def ingest_stage_timings(self, timer: StageTimer = None) -> Dict:
+        """从分阶段计时器读取最新的分位数统计"""
+        timer = timer or stage_timer
+        self.stage_latency.update(timer.summary())
+        return self.stage_latency
+        
+    def export_stage_latency(self, save_path: str):
+        """导出分阶段耗时, 按后缀写为json或csv"""
+        if save_path.endswith('.csv'):
+            fields = ['stage', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms',
+                      'total_s']
+            with open(save_path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+                writer.writeheader()
+                for stage, stats in sorted(self.stage_latency.items()):
+                    writer.writerow({'stage': stage, **stats})
+        else:
+            with open(save_path, 'w') as f:
+                json.dump(self.stage_latency, f, indent=2)
             
     def get_summary(self) -> Dict:
         """获取统计摘要"""
@@ -65,6 +94,7 @@ class TrainingMonitor:
             'avg_policy_loss': np.mean(self.policy_losses),
             'avg_entropy': np.mean(self.entropies),
             'avg_step_time': np.mean(self.step_times),
+            'stage_latency': dict(self.stage_latency),
             'total_time': time.time() - self.start_time
         } 
     
@@ -261,6 +291,18 @@ class TrainingMonitor:
         report.append(f"- 内存平均使用率: {results['resources']['memory_usage']['average']:.1f}%")
         report.append(f"- 训练速度: {results['resources']['training_speed']['steps_per_second']:.1f} steps/s\n")
         
+        # 添加分阶段耗时
+        if self.stage_latency:
+            report.append("## 阶段耗时")
+            report.append("| 阶段 | 次数 | p50 (ms) | p95 (ms) | p99 (ms) |")
+            report.append("|---|---|---|---|---|")
+            for stage, stats in sorted(self.stage_latency.items()):
+                if stats.get('count', 0) == 0:
+                    continue
+                report.append(f"| {stage} | {stats['count']} | {stats['p50_ms']:.3f} | "
+                              f"{stats['p95_ms']:.3f} | {stats['p99_ms']:.3f} |")
+            report.append("")
+        
         # 保存报告
         with open(save_path, 'w') as f:
             f.write('\n'.join(report))
\ No newline at end of file
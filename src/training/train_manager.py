@@ -8,6 +8,7 @@ from src.environments.rl_env import RLEnv
 from src.algorithms.registry import ALGORITHM_REGISTRY
 from src.utils.logger import Logger
 from src.utils.evaluator import ModelEvaluator
+from src.utils.timing import stage_timer
 from src.visualization.dashboard.dashboard_app import DashboardApp
 
 
@@ -89,7 +90,8 @@ class TrainManager:
         
         while True:
             # 选择动作
-            action = self.agent.predict(state)
+            with stage_timer.span('agent.predict'):
+                action = self.agent.predict(state)
             
             # 执行动作
             next_state, reward, done, info = self.env.step(action)
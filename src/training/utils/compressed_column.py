@@ -0,0 +1,146 @@
+"""按块压缩的观测列, 用于经验回放中的图像观测"""
+import zlib
+from typing import Dict, Optional
+
+import cv2
+import numpy as np
+
+# 压缩方式: zlib和png总是可用, zstd和lz4需要安装zstandard/lz4
+CODECS = ('zlib', 'png', 'zstd', 'lz4')
+
+# 各压缩方式的默认等级
+DEFAULT_LEVELS = {'zlib': 1, 'png': 1, 'zstd': 3, 'lz4': 0}
+
+
+def make_codec(codec: str, level: Optional[int] = None, dtype=np.uint8):
+    """返回 (encode, decode): encode把(n, ...)数组压缩为bytes, decode还原为一维数组"""
+    if codec not in CODECS:
+        raise ValueError(f"Unknown codec '{codec}', expected one of {CODECS}")
+    level = DEFAULT_LEVELS[codec] if level is None else level
+    dtype = np.dtype(dtype)
+
+    if codec == 'zlib':
+        return (lambda frames: zlib.compress(frames.tobytes(), level),
+                lambda data: np.frombuffer(zlib.decompress(data), dtype=dtype))
+
+    if codec == 'png':
+        if dtype not in (np.uint8, np.uint16):
+            raise ValueError(f"png codec needs uint8 or uint16 frames, got {dtype}")
+
+        # 按最后一维为宽度展开成单通道图像, PNG的行滤波仍作用在原图的行上
+        def encode(frames):
+            _, data = cv2.imencode('.png', frames.reshape(-1, frames.shape[-1]),
+                                   [cv2.IMWRITE_PNG_COMPRESSION, level])
+            return data.tobytes()
+
+        def decode(data):
+            return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_UNCHANGED).ravel()
+        return encode, decode
+
+    try:
+        if codec == 'zstd':
+            import zstandard
+            compressor = zstandard.ZstdCompressor(level=level)
+            # 解压器对象不能跨线程共享, 每次新建
+            return (lambda frames: compressor.compress(frames.tobytes()),
+                    lambda data: np.frombuffer(zstandard.ZstdDecompressor().decompress(data),
+                                               dtype=dtype))
+        import lz4.frame
+        return (lambda frames: lz4.frame.compress(frames.tobytes(), compression_level=level),
+                lambda data: np.frombuffer(lz4.frame.decompress(data), dtype=dtype))
+    except ImportError:
+        package = 'zstandard' if codec == 'zstd' else 'lz4'
+        raise ValueError(f"codec '{codec}' needs the {package} package")
+
+
+class CompressedColumn:
+    """(capacity, ...)观测列, 每chunk_size个连续槽压缩为一块
+
+    写入时块先以原始数组保存, 写到块的最后一个槽时压缩; 覆盖已压缩的块时先解压回原始数组,
+    未覆盖的槽在此期间仍可读取。读取时每块只解压一次, 给定executor时各块并行解压
+    (zlib、cv2等在解压时释放GIL)。chunk_size越大压缩率越高, 但随机采样一条要解压整块。
+    """
+    def __init__(self, capacity: int, frame_shape: tuple, dtype, codec: str = 'zlib',
+                 level: Optional[int] = None, chunk_size: int = 1, executor=None):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be >= 1, got {chunk_size}")
+        self.capacity = capacity
+        self.frame_shape = tuple(frame_shape)
+        self.shape = (capacity,) + self.frame_shape
+        self.dtype = np.dtype(dtype)
+        self.codec = codec
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self._encode, self._decode = make_codec(codec, level, self.dtype)
+
+        self._chunks: Dict[int, bytes] = {}
+        self._open: Dict[int, np.ndarray] = {}
+        self._compressed_bytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """压缩块与未压缩块占用的字节数"""
+        return self._compressed_bytes + sum(frames.nbytes for frames in list(self._open.values()))
+
+    @property
+    def raw_nbytes(self) -> int:
+        """不压缩时整列的字节数"""
+        return self.capacity * int(np.prod(self.frame_shape)) * self.dtype.itemsize
+
+    def _chunk_length(self, chunk: int) -> int:
+        return min(self.chunk_size, self.capacity - chunk * self.chunk_size)
+
+    def _load_chunk(self, chunk: int) -> np.ndarray:
+        """块的原始数组; 未写入过的块为0"""
+        frames = self._open.get(chunk)
+        if frames is not None:
+            return frames
+        # 压缩时先写_chunks再移出_open, 所以这里总能读到其中之一
+        data = self._chunks.get(chunk)
+        if data is None:
+            return np.zeros((self._chunk_length(chunk),) + self.frame_shape, dtype=self.dtype)
+        return self._decode(data).reshape((-1,) + self.frame_shape)
+
+    def __setitem__(self, indices, values):
+        indices = np.atleast_1d(indices)
+        values = np.asarray(values, dtype=self.dtype).reshape((len(indices),) + self.frame_shape)
+        for index, value in zip(indices, values):
+            chunk, offset = divmod(int(index), self.chunk_size)
+            frames = self._open.get(chunk)
+            if frames is None:
+                frames = self._load_chunk(chunk).copy()
+                self._open[chunk] = frames
+            frames[offset] = value
+            if offset == self._chunk_length(chunk) - 1:
+                self._seal(chunk, frames)
+
+    def _seal(self, chunk: int, frames: np.ndarray):
+        """压缩写满的块"""
+        data = self._encode(frames)
+        self._compressed_bytes += len(data) - len(self._chunks.get(chunk, b''))
+        self._chunks[chunk] = data
+        del self._open[chunk]
+
+    def take(self, indices: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """按任意形状的下标取帧, 结果为 indices.shape + frame_shape"""
+        indices = np.asarray(indices)
+        if out is None:
+            out = np.empty(indices.shape + self.frame_shape, dtype=self.dtype)
+        target = out.reshape((-1,) + self.frame_shape)
+        flat = indices.ravel()
+        chunks, inverse = np.unique(flat // self.chunk_size, return_inverse=True)
+        if self.executor is not None and len(chunks) > 1:
+            frames = list(self.executor.map(self._load_chunk, chunks.tolist()))
+        else:
+            frames = [self._load_chunk(chunk) for chunk in chunks.tolist()]
+        for i, (k, offset) in enumerate(zip(inverse.tolist(), (flat % self.chunk_size).tolist())):
+            target[i] = frames[k][offset]
+        return out
+
+    def __getitem__(self, indices) -> np.ndarray:
+        if np.isscalar(indices):
+            return self.take(np.array([indices]))[0]
+        return self.take(indices)
+
+    def __len__(self) -> int:
+        return self.capacity
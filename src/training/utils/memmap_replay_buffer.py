@@ -0,0 +1,214 @@
+"""基于内存映射文件的经验回放缓冲区, 容量可以超过内存"""
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.training.utils.replay_buffer import PrioritizedReplayBuffer
+
+logger = logging.getLogger(__name__)
+
+# 元数据最后写入, 它的存在表示一次完整的flush。索引文件按flush的代数命名, 元数据记录
+# 对应的文件名, 写入新索引后、替换元数据前退出时, 元数据仍指向完整的上一代索引
+META_FILE = 'meta.json'
+INDEX_FILE = 'index.{generation}.npz'
+
+
+class MemmapReplayBuffer(PrioritizedReplayBuffer):
+    """观测、动作、奖励和done存放在directory下的.npy内存映射文件中, 由操作系统按页缓存
+
+    优先级(求和树/最小值树)和每个槽在回合中的步数(回合边界索引)保存在内存中, flush时与
+    写入位置等元数据一起落盘; 之后以同一目录创建时直接映射已有文件并恢复索引, 不读取数据。
+    上一次flush之后的写入在进程退出后不保证可见。alpha=0时为均匀采样; 树中保存的是
+    priority^alpha, 重新打开时alpha以元数据为准。
+
+    采样按局部性: 先按优先级抽取batch_size / run_length个起点, 每个起点取同一回合内连续的
+    run_length个槽, 整批按下标排序后读取, 使读取集中在少数连续的页上。连续段中起点以外的
+    槽不是按优先级抽取的, 重要性采样权重为近似值。
+    """
+    def __init__(self, directory, capacity: Optional[int] = None, batch_size: int = 256,
+                 obs_spec: Optional[Dict[str, Tuple[tuple, np.dtype]]] = None,
+                 action_spec: Optional[Tuple[tuple, np.dtype]] = None, run_length: int = 8,
+                 **kwargs):
+        if kwargs.get('compression') is not None:
+            raise ValueError("MemmapReplayBuffer does not support compressed columns")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.run_length = max(1, run_length)
+
+        # 已有缓冲区: 存储布局以元数据为准
+        meta = self._read_meta()
+        if meta is not None:
+            if capacity is not None and capacity != meta['capacity']:
+                raise ValueError(f"{self.directory} holds a buffer of capacity "
+                                 f"{meta['capacity']}, got {capacity}")
+            alpha = kwargs.setdefault('alpha', meta['alpha'])
+            if alpha != meta['alpha']:
+                raise ValueError(f"{self.directory} holds priorities for alpha={meta['alpha']}, "
+                                 f"got alpha={alpha}")
+            capacity = meta['capacity']
+            kwargs['dedup_frames'] = meta['dedup_frames']
+            obs_spec = {key: (tuple(shape), np.dtype(dtype))
+                        for key, (shape, dtype) in meta['obs_spec'].items()}
+            if meta['action_spec'] is not None:
+                action_spec = (tuple(meta['action_spec'][0]), np.dtype(meta['action_spec'][1]))
+        elif capacity is None:
+            raise ValueError(f"capacity is required to create a new buffer in {self.directory}")
+
+        super().__init__(capacity, batch_size, obs_spec=obs_spec, action_spec=action_spec, **kwargs)
+        # 基类在内存中分配的奖励和done换成文件
+        self.rewards = self._open_column('rewards', (), np.float32)
+        self.dones = self._open_column('dones', (), bool)
+        if not self.dedup_frames:
+            self.steps = np.zeros(capacity, dtype=np.int64)
+        self._episode_step = 0
+        self.generation = 0  # 已完成的flush次数
+
+        if meta is not None:
+            self._restore(meta)
+
+    def _read_meta(self) -> Optional[Dict]:
+        path = self.directory / META_FILE
+        if not path.exists():
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _open_column(self, name: str, shape: tuple, dtype) -> np.memmap:
+        """映射已有的列文件, 不存在时创建(稀疏文件, 写入时才占用磁盘)"""
+        path = self.directory / f'{name}.npy'
+        shape = (self.capacity,) + tuple(shape)
+        if path.exists():
+            column = np.load(path, mmap_mode='r+')
+            if column.shape != shape or column.dtype != np.dtype(dtype):
+                raise ValueError(f"{path} has shape {column.shape} {column.dtype}, "
+                                 f"expected {shape} {np.dtype(dtype)}")
+            return column
+        return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+    def _allocate_obs(self, obs_spec: Dict[str, Tuple[tuple, np.dtype]]):
+        """观测列映射到obs.<键>.npy和next_obs.<键>.npy"""
+        for key, (shape, dtype) in obs_spec.items():
+            self.obs[key] = self._open_column(f'obs.{key}', shape, dtype)
+            if not self.dedup_frames:
+                self.next_obs[key] = self._open_column(f'next_obs.{key}', shape, dtype)
+
+    def _allocate_actions(self, shape: tuple, dtype: np.dtype):
+        self.actions = self._open_column('actions', shape, dtype)
+
+    def push(self, state: Dict, action: np.ndarray, reward: float,
+             next_state: Dict, done: bool, info: Optional[Dict] = None):
+        """添加一条经验, 并记录它在回合中的步数"""
+        index = self.next_start
+        super().push(state, action, reward, next_state, done, info)
+        if not self.dedup_frames:
+            self.steps[index] = self._episode_step
+            self._episode_step = 0 if done else self._episode_step + 1
+
+    def push_batch(self, states: Dict, actions: np.ndarray, rewards: np.ndarray,
+                   next_states: Dict, dones: np.ndarray):
+        """添加一批经验; 各环境交错写入, 每条单独作为一段, 不参与连续段采样"""
+        indices = (self.position + np.arange(len(rewards))) % self.capacity
+        super().push_batch(states, actions, rewards, next_states, dones)
+        self.steps[indices] = 0
+
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """按优先级抽取起点并扩展为回合内的连续段, 不足时补充单独抽取的槽, 按下标排序"""
+        runs = -(-batch_size // self.run_length)
+        anchors = super().sample_indices(runs)
+        offsets = np.arange(self.run_length)
+        indices = (anchors[:, None] + offsets) % self.capacity
+        keep = self.steps[indices] == self.steps[anchors][:, None] + offsets
+        if self.dedup_frames:
+            keep &= self.valid[indices]
+        if self.size < self.capacity:
+            keep &= indices < self.size
+        indices = indices[keep][:batch_size]
+        if len(indices) < batch_size:
+            indices = np.concatenate([indices, super().sample_indices(batch_size - len(indices))])
+        return np.sort(indices)
+
+    def flush(self):
+        """把数据写回文件并保存索引和元数据, 之后可在新进程中以同一目录重新打开"""
+        columns = (*self.obs.values(), *self.next_obs.values(), self.actions, self.rewards,
+                   self.dones)
+        for column in columns:
+            if column is not None:
+                column.flush()
+
+        # 新一代索引写入新文件, 不覆盖元数据当前指向的索引
+        self.generation += 1
+        index_file = INDEX_FILE.format(generation=self.generation)
+        index = {'priorities': self.sum_tree.values(), 'steps': self.steps,
+                 'generation': self.generation}
+        if self.dedup_frames:
+            index['valid'] = self.valid
+        self._write_atomic(index_file, lambda f: np.savez(f, **index), 'wb')
+
+        meta = {
+            'capacity': self.capacity,
+            'position': self.position,
+            'size': self.size,
+            'dedup_frames': self.dedup_frames,
+            'episode_open': bool(getattr(self, '_episode_open', False)),
+            'episode_step': self._episode_step,
+            'valid_count': getattr(self, '_valid_count', 0),
+            'max_priority': self.max_priority,
+            'alpha': self.alpha,
+            'beta': self.beta,
+            'generation': self.generation,
+            'index_file': index_file,
+            'obs_spec': {key: [list(column.shape[1:]), column.dtype.str]
+                         for key, column in self.obs.items()},
+            'action_spec': None if self.actions is None else [list(self.actions.shape[1:]),
+                                                              self.actions.dtype.str]
+        }
+        self._write_atomic(META_FILE, lambda f: json.dump(meta, f, indent=4), 'w')
+
+        # 元数据已指向新索引, 删除之前各代的索引
+        for path in self.directory.glob(INDEX_FILE.format(generation='*')):
+            if path.name != index_file:
+                path.unlink()
+
+    def _write_atomic(self, name: str, write, mode: str):
+        """先写临时文件再替换, 中途退出时保留上一次的版本"""
+        path = self.directory / name
+        temp = path.with_name(path.name + '.tmp')
+        with open(temp, mode) as f:
+            write(f)
+        os.replace(temp, path)
+
+    def _restore(self, meta: Dict):
+        """恢复写入位置和内存中的索引, 索引文件须与元数据属于同一次flush"""
+        path = self.directory / meta['index_file']
+        if not path.exists():
+            raise ValueError(f"{path} referenced by {META_FILE} is missing")
+        with np.load(path) as index:
+            if int(index['generation']) != meta['generation']:
+                raise ValueError(f"{path} is from flush {int(index['generation'])}, "
+                                 f"{META_FILE} is from flush {meta['generation']}")
+            priorities = index['priorities']
+            self.steps[:] = index['steps']
+            if self.dedup_frames:
+                self.valid[:] = index['valid']
+        self.sum_tree.assign(priorities)
+        self.min_tree.assign(np.where(priorities > 0, priorities, np.inf))
+
+        self.position = meta['position']
+        self.size = meta['size']
+        self._episode_step = meta['episode_step']
+        if self.dedup_frames:
+            self._episode_open = meta['episode_open']
+            self._valid_count = meta['valid_count']
+        self.max_priority = meta['max_priority']
+        self.beta = meta['beta']
+        self.generation = meta['generation']
+        logger.info(f"Reopened replay buffer {self.directory}: {self.size}/{self.capacity} slots")
+
+    def close(self):
+        """保存后停止后台线程"""
+        self.flush()
+        super().close()
@@ -1,6 +1,10 @@
 import numpy as np
-from typing import Dict, List, Tuple
-from collections import deque
+import torch
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+
+from src.training.utils.compressed_column import CompressedColumn, make_codec
+from src.training.utils.segment_tree import MinTree, SumTree
 
 
 class ReplayBuffer:
@@ -8,8 +12,8 @@ class ReplayBuffer:
     def __init__(self, capacity: int, batch_size: int):
         self.capacity = capacity
         self.batch_size = batch_size
-        self.buffer = deque(maxlen=capacity)
-        self.priorities = deque(maxlen=capacity)
+        self.buffer = []  # 环形列表, 按下标访问为O(1)
+        self.priorities = SumTree(capacity)  # 求和树, 按优先级采样为O(log n)
         self.position = 0
         
     def push(self, state: Dict, action: np.ndarray, reward: float, 
@@ -19,10 +23,9 @@ class ReplayBuffer:
         
         if len(self.buffer) < self.capacity:
             self.buffer.append(experience)
-            self.priorities.append(1.0)  # 新经验的优先级最高
         else:
             self.buffer[self.position] = experience
-            self.priorities[self.position] = 1.0
+        self.priorities.update([self.position], 1.0)  # 新经验的优先级最高
             
         self.position = (self.position + 1) % self.capacity
         
@@ -32,8 +35,8 @@ class ReplayBuffer:
             batch_size = self.batch_size
             
         # 根据优先级采样
-        probs = np.array(self.priorities) / sum(self.priorities)
-        indices = np.random.choice(len(self.buffer), batch_size, p=probs)
+        prefixes = np.random.random(batch_size) * self.priorities.total()
+        indices = np.minimum(self.priorities.find_prefixsum(prefixes), len(self.buffer) - 1)
         
         # 获取经验
         states = []
@@ -64,8 +67,379 @@ class ReplayBuffer:
         
     def update_priorities(self, indices: List[int], priorities: List[float]):
         """更新优先级"""
-        for idx, priority in zip(indices, priorities):
-            self.priorities[idx] = priority + 1e-6  # 避免优先级为0
+        self.priorities.update(indices, np.asarray(priorities) + 1e-6)  # 避免优先级为0
             
     def __len__(self) -> int:
-        return len(self.buffer) 
\ No newline at end of file
+        return len(self.buffer) 
+
+
+class ArrayReplayBuffer:
+    """列式经验回放缓冲区
+    
+    每个观测键、动作、奖励和done各自预分配(capacity, ...)数组, 按环形下标O(1)写入;
+    采样用花式索引一次取出整批连续数组, 不再逐条拼装。info不保存。
+    
+    dedup_frames为True时每个观测只在帧环中存一次: 槽i的next_obs就是槽i+1的帧, 回合结束时
+    终止观测单独占一个槽(不作为经验起点), 不再保存next_obs列, 图像观测的内存约减半。
+    此模式要求按时间顺序逐条push同一个环境的经验, 回合内的state等于上一条的next_state。
+    frame_stack > 1 时stack_keys(默认全部观测键)按下标从同一个帧环取最近k帧, 回合开头
+    或已被覆盖的历史用最早的可用帧补齐, 不额外占用内存。
+    
+    compression给定时keys中的观测(默认全部uint8观测)存为CompressedColumn, 可配置codec、level、
+    chunk_size和解压线程数workers; prefetch为True时后台线程提前取出下一批, 与学习器的计算重叠。
+    预取的批可能读到采样之后才写入的槽。
+    """
+    def __init__(self, capacity: int, batch_size: int,
+                 obs_spec: Optional[Dict[str, Tuple[tuple, np.dtype]]] = None,
+                 action_spec: Optional[Tuple[tuple, np.dtype]] = None,
+                 pin_memory: bool = False, seed: Optional[int] = None,
+                 dedup_frames: bool = False, frame_stack: int = 1,
+                 stack_keys: Optional[Sequence[str]] = None, compression: Optional[Dict] = None):
+        if frame_stack > 1 and not dedup_frames:
+            raise ValueError("frame_stack > 1 requires dedup_frames=True")
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.position = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+        
+        # 帧去重: 槽是否为有效经验起点、在回合中的步数, 以及当前回合是否未结束
+        self.dedup_frames = dedup_frames
+        self.frame_stack = frame_stack
+        self.stack_keys = None if stack_keys is None else set(stack_keys)
+        if dedup_frames:
+            self.valid = np.zeros(capacity, dtype=bool)
+            self.steps = np.zeros(capacity, dtype=np.int64)
+            self._valid_count = 0
+            self._episode_open = False
+            
+        # 压缩列的解压线程池和预取线程
+        self.compression = compression
+        self._decoder = None
+        self._prefetcher = None
+        self._pending = None
+        self._pending_key = None
+        if compression is not None:
+            make_codec(compression.get('codec', 'zlib'), compression.get('level'))  # 尽早报告不可用的codec
+            workers = compression.get('workers', 2)
+            self._decoder = ThreadPoolExecutor(workers) if workers > 0 else None
+            if compression.get('prefetch', True):
+                self._prefetcher = ThreadPoolExecutor(1)
+        
+        # as_tensors采样时使用的暂存张量, 两组轮流使用, 避免覆盖仍在异步拷贝的上一批
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self._staging = {}
+        self._staging_index = 0
+        
+        # 各列在第一次写入时按数据分配, 给定obs_spec/action_spec时立即分配
+        self.obs = {}
+        self.next_obs = {}
+        self.actions = None
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        if obs_spec is not None:
+            self._allocate_obs(obs_spec)
+        if action_spec is not None:
+            self._allocate_actions(*action_spec)
+            
+    @classmethod
+    def from_spaces(cls, observation_space, action_space, capacity: int, batch_size: int,
+                    **kwargs) -> 'ArrayReplayBuffer':
+        """按环境的观测空间(gym.spaces.Dict)和动作空间(gym.spaces.Box)预分配"""
+        obs_spec = {key: (space.shape, space.dtype)
+                    for key, space in observation_space.spaces.items()}
+        action_spec = (action_space.shape, action_space.dtype)
+        return cls(capacity, batch_size, obs_spec, action_spec, **kwargs)
+        
+    def _allocate_obs(self, obs_spec: Dict[str, Tuple[tuple, np.dtype]]):
+        """按(shape, dtype)分配观测列; np.zeros的内存在写入时才实际占用"""
+        for key, (shape, dtype) in obs_spec.items():
+            self.obs[key] = self._make_column(key, shape, dtype)
+            if not self.dedup_frames:
+                self.next_obs[key] = self._make_column(key, shape, dtype)
+                
+    def _make_column(self, key: str, shape: tuple, dtype: np.dtype):
+        """观测列: 配置了压缩的键为CompressedColumn, 其余为数组"""
+        if self.compression is None:
+            return np.zeros((self.capacity,) + tuple(shape), dtype=dtype)
+        keys = self.compression.get('keys')
+        if np.dtype(dtype) == np.uint8 if keys is None else key in keys:
+            return CompressedColumn(self.capacity, shape, dtype,
+                                    self.compression.get('codec', 'zlib'),
+                                    self.compression.get('level'),
+                                    self.compression.get('chunk_size', 1), self._decoder)
+        return np.zeros((self.capacity,) + tuple(shape), dtype=dtype)
+            
+    def _allocate_actions(self, shape: tuple, dtype: np.dtype):
+        """分配动作列"""
+        self.actions = np.zeros((self.capacity,) + tuple(shape), dtype=dtype)
+        
+    def push(self, state: Dict, action: np.ndarray, reward: float,
+             next_state: Dict, done: bool, info: Optional[Dict] = None):
+        """添加一条经验"""
+        if not self.obs:
+            self._allocate_obs({key: (np.shape(value), np.asarray(value).dtype)
+                                for key, value in state.items()})
+        if self.actions is None:
+            self._allocate_actions(np.shape(action), np.asarray(action).dtype)
+        if self.dedup_frames:
+            self._push_frames(state, action, reward, next_state, done)
+            return
+            
+        index = self.position
+        for key, column in self.obs.items():
+            column[index] = state[key]
+            self.next_obs[key][index] = next_state[key]
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.dones[index] = done
+        
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        
+    @property
+    def next_start(self) -> int:
+        """下一条经验的起点槽"""
+        if self.dedup_frames and self._episode_open:
+            return (self.position - 1) % self.capacity
+        return self.position
+        
+    def _write_frame(self, observation: Dict, step: int) -> int:
+        """把一帧写入position槽, 该槽暂不作为经验起点"""
+        index = self.position
+        self._valid_count -= int(self.valid[index])
+        self.valid[index] = False
+        self.steps[index] = step
+        for key, column in self.obs.items():
+            column[index] = observation[key]
+        self.position = (index + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return index
+        
+    def _push_frames(self, state: Dict, action: np.ndarray, reward: float,
+                     next_state: Dict, done: bool):
+        """帧去重写入: 新回合先写state, 回合内的state已是上一帧; 再写next_state"""
+        if self._episode_open:
+            index = (self.position - 1) % self.capacity
+        else:
+            index = self._write_frame(state, 0)
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.dones[index] = done
+        self._write_frame(next_state, self.steps[index] + 1)
+        self.valid[index] = True
+        self._valid_count += 1
+        self._episode_open = not done
+        
+    def push_batch(self, states: Dict, actions: np.ndarray, rewards: np.ndarray,
+                   next_states: Dict, dones: np.ndarray):
+        """添加一批经验(如向量化环境的一步), 各字段第一维为批大小"""
+        if self.dedup_frames:
+            raise ValueError(
+                "push_batch is not supported with dedup_frames, push each environment in order")
+        count = len(rewards)
+        if not self.obs:
+            self._allocate_obs({key: (np.shape(value)[1:], np.asarray(value).dtype)
+                                for key, value in states.items()})
+        if self.actions is None:
+            self._allocate_actions(np.shape(actions)[1:], np.asarray(actions).dtype)
+            
+        indices = (self.position + np.arange(count)) % self.capacity
+        for key, column in self.obs.items():
+            column[indices] = states[key]
+            self.next_obs[key][indices] = next_states[key]
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.dones[indices] = dones
+        
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """均匀采样下标, 帧去重时重新抽取不是经验起点的槽"""
+        indices = self.rng.integers(0, self.size, batch_size)
+        if self.dedup_frames:
+            invalid = ~self.valid[indices]
+            while invalid.any():
+                indices[invalid] = self.rng.integers(0, self.size, int(invalid.sum()))
+                invalid = ~self.valid[indices]
+        return indices
+        
+    def sample(self, batch_size: Optional[int] = None, as_tensors: bool = False) -> Dict:
+        """采样一批经验, 观测为 {键: (B, ...)数组}
+        
+        as_tensors为True时返回torch张量, pin_memory时位于页锁定内存, 可non_blocking上传;
+        这些张量在之后第二次as_tensors采样时被覆盖。
+        """
+        if batch_size is None:
+            batch_size = self.batch_size
+        if self._prefetcher is None:
+            return self.gather(self.sample_indices(batch_size), as_tensors)
+            
+        # 预取: 取出上一次提交的批(参数不同时丢弃并重新取), 再提交下一批
+        batch = None
+        if self._pending is not None:
+            prefetched = self._pending.result()
+            if self._pending_key == (batch_size, as_tensors):
+                batch = prefetched
+        if batch is None:
+            batch = self.gather(self.sample_indices(batch_size), as_tensors)
+        indices = self.sample_indices(batch_size)
+        self._pending = self._prefetcher.submit(self.gather, indices, as_tensors)
+        self._pending_key = (batch_size, as_tensors)
+        return batch
+        
+    def gather(self, indices: np.ndarray, as_tensors: bool = False) -> Dict:
+        """按下标取出一批经验"""
+        slot = None
+        if as_tensors:
+            slot = self._staging_index
+            # 暂存张量轮流使用; 预取时下一批已提前占用一组, 所以用三组
+            self._staging_index = (slot + 1) % (2 if self._prefetcher is None else 3)
+        if self.dedup_frames:
+            next_indices = (indices + 1) % self.capacity
+            states = self._gather_frames(indices, slot, 'states')
+            next_states = self._gather_frames(next_indices, slot, 'next_states')
+        else:
+            states = {key: self._take(column, indices, slot, 'states', key)
+                      for key, column in self.obs.items()}
+            next_states = {key: self._take(column, indices, slot, 'next_states', key)
+                           for key, column in self.next_obs.items()}
+        return {
+            'states': states,
+            'actions': self._take(self.actions, indices, slot, 'actions'),
+            'rewards': self._take(self.rewards, indices, slot, 'rewards'),
+            'next_states': next_states,
+            'dones': self._take(self.dones, indices, slot, 'dones'),
+            'indices': indices
+        }
+        
+    def _gather_frames(self, indices: np.ndarray, slot: Optional[int], name: str) -> Dict:
+        """从帧环取观测, 堆叠的键为(B, k, ...), 从旧到新"""
+        stacked = self.stack_indices(indices) if self.frame_stack > 1 else indices
+        frames = {}
+        for key, column in self.obs.items():
+            is_stacked = self.stack_keys is None or key in self.stack_keys
+            frames[key] = self._take(column, stacked if is_stacked else indices, slot, name, key)
+        return frames
+        
+    def stack_indices(self, indices: np.ndarray) -> np.ndarray:
+        """每个槽最近frame_stack帧的槽下标(B, k), 不越过回合开头和环中最旧的帧"""
+        # 缓冲区写满后position是最旧的槽, 与它的距离为仍可用的历史长度
+        oldest = self.position if self.size == self.capacity else 0
+        history = np.minimum(self.steps[indices], (indices - oldest) % self.capacity)
+        offsets = np.arange(self.frame_stack - 1, -1, -1)
+        return (indices[:, None] - np.minimum(offsets, history[:, None])) % self.capacity
+        
+    def _take(self, column: np.ndarray, indices: np.ndarray, slot: Optional[int],
+              *name) -> Union[np.ndarray, torch.Tensor]:
+        """取出一列; slot为None时花式索引得到新数组, 否则直接gather到复用的(页锁定)暂存张量"""
+        if slot is None:
+            return column[indices]
+        key = (slot,) + name
+        shape = indices.shape + column.shape[1:]
+        staging = self._staging.get(key)
+        if staging is None or tuple(staging.shape) != shape:
+            staging = torch.empty(shape, dtype=torch.from_numpy(np.empty(0, column.dtype)).dtype,
+                                  pin_memory=self.pin_memory)
+            self._staging[key] = staging
+        if isinstance(column, CompressedColumn):
+            column.take(indices, out=staging.numpy())
+        else:
+            np.take(column, indices, axis=0, out=staging.numpy(), mode='clip')
+        return staging
+        
+    @property
+    def obs_nbytes(self) -> int:
+        """观测列占用的字节数(压缩列按压缩后大小)"""
+        return sum(column.nbytes for column in (*self.obs.values(), *self.next_obs.values()))
+        
+    def close(self):
+        """停止解压和预取线程"""
+        for executor in (self._prefetcher, self._decoder):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._prefetcher = self._decoder = self._pending = None
+        for column in (*self.obs.values(), *self.next_obs.values()):
+            if isinstance(column, CompressedColumn):
+                column.executor = None
+        
+    def __len__(self) -> int:
+        """可采样的经验条数"""
+        return self._valid_count if self.dedup_frames else self.size
+
+
+class PrioritizedReplayBuffer(ArrayReplayBuffer):
+    """优先经验回放(Schaul et al., 2016), 优先级存放在求和树和最小值树中
+    
+    新经验以当前最大优先级写入; 采样把总优先级分成batch_size段, 每段按前缀和查找一条,
+    复杂度O(batch * log n), 与容量无关。重要性采样权重 (N * P(i))^-beta 按最大值归一化。
+    """
+    def __init__(self, capacity: int, batch_size: int, alpha: float = 0.6, beta: float = 0.4,
+                 beta_steps: int = 0, epsilon: float = 1e-6, **kwargs):
+        super().__init__(capacity, batch_size, **kwargs)
+        self.alpha = alpha
+        self.beta = beta
+        # beta_steps > 0 时beta在这么多次采样内线性增加到1
+        self._beta_increment = (1.0 - beta) / beta_steps if beta_steps else 0.0
+        self.epsilon = epsilon
+        self.max_priority = 1.0
+        self.sum_tree = SumTree(capacity)
+        self.min_tree = MinTree(capacity)
+        
+    def push(self, state: Dict, action: np.ndarray, reward: float,
+             next_state: Dict, done: bool, info: Optional[Dict] = None):
+        """添加一条经验, 优先级为当前最大值"""
+        index = self.next_start
+        super().push(state, action, reward, next_state, done, info)
+        self._set_priorities([index], self.max_priority)
+        if self.dedup_frames:
+            # next_state所在的槽不是经验起点, 不参与采样
+            self._clear_priorities([(index + 1) % self.capacity])
+        
+    def push_batch(self, states: Dict, actions: np.ndarray, rewards: np.ndarray,
+                   next_states: Dict, dones: np.ndarray):
+        """添加一批经验, 优先级为当前最大值"""
+        indices = (self.position + np.arange(len(rewards))) % self.capacity
+        super().push_batch(states, actions, rewards, next_states, dones)
+        self._set_priorities(indices, self.max_priority)
+        
+    def _set_priorities(self, indices, priorities):
+        """写入priority^alpha"""
+        values = np.power(priorities, self.alpha)
+        self.sum_tree.update(indices, values)
+        self.min_tree.update(indices, values)
+        
+    def _clear_priorities(self, indices):
+        """槽不再参与采样"""
+        self.sum_tree.update(indices, 0.0)
+        self.min_tree.update(indices, np.inf)
+        
+    def sample_indices(self, batch_size: int) -> np.ndarray:
+        """分层采样: 每段总优先级中按前缀和取一条"""
+        segment = self.sum_tree.total() / batch_size
+        prefixes = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        return np.minimum(self.sum_tree.find_prefixsum(prefixes), self.size - 1)
+        
+    def sample(self, batch_size: Optional[int] = None, as_tensors: bool = False) -> Dict:
+        """采样一批经验, 附带重要性采样权重weights"""
+        batch = super().sample(batch_size, as_tensors)
+        
+        # w_i / max w = (P(i) / min P)^-beta, 按取出时的优先级计算
+        ratio = self.sum_tree[batch['indices']] / self.min_tree.min()
+        weights = np.power(ratio, -self.beta).astype(np.float32)
+        batch['weights'] = torch.from_numpy(weights) if as_tensors else weights
+        self.beta = min(1.0, self.beta + self._beta_increment)
+        return batch
+        
+    def update_priorities(self, indices: np.ndarray, priorities: np.ndarray):
+        """按TD误差等更新优先级"""
+        priorities = np.abs(np.asarray(priorities, dtype=np.float64)) + self.epsilon
+        if self.dedup_frames:
+            # 采样之后被覆盖为不是经验起点的槽保持不可采样
+            valid = self.valid[indices]
+            indices, priorities = np.asarray(indices)[valid], priorities[valid]
+            if len(indices) == 0:
+                return
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self._set_priorities(indices, priorities)
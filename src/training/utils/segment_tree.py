@@ -0,0 +1,94 @@
+"""基于NumPy数组的线段树, 用于优先经验回放"""
+import operator
+
+import numpy as np
+
+
+class SegmentTree:
+    """完全二叉树存放在一维数组中: 节点i的子节点为2i和2i+1, 叶子从下标leaves开始
+
+    update和查询都按批向量化, 每层一次NumPy操作, 复杂度O(batch * log n)。
+    """
+    def __init__(self, capacity: int, operation, neutral: float, scalar_operation=None):
+        if capacity < 1:
+            raise ValueError(f"SegmentTree needs capacity >= 1, got {capacity}")
+        self.capacity = capacity
+        self.leaves = 1 << int(np.ceil(np.log2(capacity))) if capacity > 1 else 1
+        self.depth = int(np.log2(self.leaves))
+        self.operation = operation
+        # 单个叶子更新时逐层用Python标量计算, 比每层一次NumPy调用快一个数量级
+        self.scalar_operation = scalar_operation or operation
+        self.neutral = neutral
+        self.tree = np.full(2 * self.leaves, neutral, dtype=np.float64)
+
+    def update(self, indices, values):
+        """设置叶子的值并逐层更新父节点, 重复的下标以最后一次为准"""
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaves
+        if nodes.size == 1:
+            self._update_one(int(nodes.reshape(-1)[0]), float(np.reshape(values, -1)[-1]))
+            return
+        self.tree[nodes] = values
+        for _ in range(self.depth):
+            # 重复的父节点写入相同的值, 不必去重
+            nodes = nodes >> 1
+            self.tree[nodes] = self.operation(self.tree[2 * nodes], self.tree[2 * nodes + 1])
+
+    def _update_one(self, node: int, value: float):
+        tree = self.tree
+        operation = self.scalar_operation
+        tree[node] = value
+        while node > 1:
+            node >>= 1
+            tree[node] = operation(tree.item(2 * node), tree.item(2 * node + 1))
+
+    def assign(self, values: np.ndarray):
+        """一次设置全部叶子并逐层重建, O(n)"""
+        self.tree[self.leaves:self.leaves + self.capacity] = values
+        self.tree[self.leaves + self.capacity:] = self.neutral
+        level = self.leaves
+        while level > 1:
+            level >>= 1
+            self.tree[level:2 * level] = self.operation(self.tree[2 * level:4 * level:2],
+                                                        self.tree[2 * level + 1:4 * level:2])
+
+    def values(self) -> np.ndarray:
+        """全部叶子的值"""
+        return self.tree[self.leaves:self.leaves + self.capacity].copy()
+
+    def __getitem__(self, indices) -> np.ndarray:
+        return self.tree[np.asarray(indices, dtype=np.int64) + self.leaves]
+
+    def reduce(self) -> float:
+        """所有叶子的归约结果"""
+        return float(self.tree[1])
+
+
+class SumTree(SegmentTree):
+    """求和树: 按前缀和查找叶子, 实现与优先级成正比的采样"""
+    def __init__(self, capacity: int):
+        super().__init__(capacity, np.add, 0.0, operator.add)
+
+    def total(self) -> float:
+        return self.reduce()
+
+    def find_prefixsum(self, prefixes) -> np.ndarray:
+        """对每个前缀和返回最小的下标i, 使叶子0..i之和大于该值"""
+        prefixes = np.array(prefixes, dtype=np.float64)
+        nodes = np.ones(len(prefixes), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = prefixes >= left_sum
+            prefixes -= np.where(go_right, left_sum, 0.0)
+            nodes = left + go_right
+        # 浮点误差可能越过最后一个非零叶子
+        return np.minimum(nodes - self.leaves, self.capacity - 1)
+
+
+class MinTree(SegmentTree):
+    """最小值树: 用于计算重要性采样权重的最大值"""
+    def __init__(self, capacity: int):
+        super().__init__(capacity, np.minimum, np.inf, min)
+
+    def min(self) -> float:
+        return self.reduce()
@@ -8,6 +8,14 @@ import threading
 import queue
 import time
 
+def restore_next_observations(observations: np.ndarray, final_observations: np.ndarray,
+                              final_indices: np.ndarray) -> np.ndarray:
+    """由保存的转换数据还原next_observations: 默认取下一条的观测, final_indices处取另存的观测"""
+    next_observations = np.concatenate([observations[1:], observations[-1:]])
+    next_observations[final_indices] = final_observations
+    return next_observations
+
+
 class DataCollector:
     """数据收集器"""
     def __init__(self, config: Dict):
@@ -16,15 +24,22 @@ class DataCollector:
         self.buffer_size = config.get('buffer_size', 1000)
         self.save_interval = config.get('save_interval', 100)
         
-        # 数据缓冲区
+        # 数据缓冲区; dedup_next_obs为True时不保存next_observations(next_observations[i]
+        # 就是observations[i+1]), 只在回合结束和缓冲区末尾另存final_observations, 对应的
+        # 转换下标为final_indices, 用restore_next_observations还原
+        self.dedup_next_obs = config.get('dedup_next_obs', False)
         self.buffer = {
             'observations': [],
             'actions': [],
             'rewards': [],
-            'next_observations': [],
             'dones': [],
             'infos': []
         }
+        if self.dedup_next_obs:
+            self.buffer.update(final_observations=[], final_indices=[])
+        else:
+            self.buffer['next_observations'] = []
+        self.last_next_obs = None
         
         # 传感器数据缓冲区
         self.sensor_buffer = {
@@ -49,9 +64,14 @@ class DataCollector:
         self.buffer['observations'].append(obs)
         self.buffer['actions'].append(action)
         self.buffer['rewards'].append(reward)
-        self.buffer['next_observations'].append(next_obs)
         self.buffer['dones'].append(done)
         self.buffer['infos'].append(info)
+        if not self.dedup_next_obs:
+            self.buffer['next_observations'].append(next_obs)
+        elif done:
+            self.buffer['final_observations'].append(next_obs)
+            self.buffer['final_indices'].append(len(self.buffer['observations']) - 1)
+        self.last_next_obs = next_obs
         
         # 处理传感器数据
         for sensor_name in self.sensor_buffer.keys():
@@ -65,14 +85,23 @@ class DataCollector:
             
     def _get_save_data(self) -> Dict:
         """获取要保存的数据"""
+        transitions = {
+            'observations': np.array(self.buffer['observations']),
+            'actions': np.array(self.buffer['actions']),
+            'rewards': np.array(self.buffer['rewards']),
+            'dones': np.array(self.buffer['dones'])
+        }
+        if self.dedup_next_obs:
+            # 最后一条转换的next_obs属于下一个缓冲区, 在这里另存
+            if not self.buffer['dones'][-1]:
+                self.buffer['final_observations'].append(self.last_next_obs)
+                self.buffer['final_indices'].append(len(self.buffer['observations']) - 1)
+            transitions['final_observations'] = np.array(self.buffer['final_observations'])
+            transitions['final_indices'] = np.array(self.buffer['final_indices'], dtype=np.int64)
+        else:
+            transitions['next_observations'] = np.array(self.buffer['next_observations'])
         save_data = {
-            'transitions': {
-                'observations': np.array(self.buffer['observations']),
-                'actions': np.array(self.buffer['actions']),
-                'rewards': np.array(self.buffer['rewards']),
-                'next_observations': np.array(self.buffer['next_observations']),
-                'dones': np.array(self.buffer['dones'])
-            },
+            'transitions': transitions,
             'sensor_data': {
                 name: np.array(data) 
                 for name, data in self.sensor_buffer.items()
@@ -0,0 +1,23 @@
+"""包级别的延迟导入, 访问导出名称时才导入所在模块"""
+import importlib
+from typing import Callable, Dict, Tuple
+
+
+def lazy_module(namespace: Dict, imports: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """返回模块级的 (__getattr__, __dir__)
+
+    namespace为包的globals(), imports为导出名称 -> 所在模块; 首次访问时导入,
+    之后缓存在namespace中, 不再经过__getattr__。
+    """
+    def __getattr__(name: str):
+        module = imports.get(name)
+        if module is None:
+            raise AttributeError(f"module {namespace['__name__']!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module), name)
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(namespace) | set(imports))
+
+    return __getattr__, __dir__
@@ -1,6 +1,11 @@
 import numpy as np
 from typing import Dict
 import cv2
+from gym import spaces
+
+from src.environments.sensors.lidar_encoders import (AngleHistogramEncoder, LidarEncoding,
+                                                     PolarTransform)
+from src.utils.timing import stage_timer
 
 
 class ObservationProcessor:
@@ -17,24 +22,58 @@ class ObservationProcessor:
         self.max_points = config.get('max_points', 1000)
         self.max_range = config.get('max_range', 50.0)
         
+        # 可选的激光雷达编码器, 输出名 -> {'type': 'voxel'|'range_image'|'fps'|..., ...}
+        # 配置后取代默认的采样/补零, 各编码器共享同一帧的极坐标变换
+        encoders = config.get('lidar_encoders')
+        self.lidar_encoding = LidarEncoding(encoders) if encoders else None
+        
         # 状态处理参数
         self.state_dims = config.get('state_dims', 10)
         
+    def observation_space(self) -> spaces.Dict:
+        """process输出的观测空间"""
+        width, height = self.image_size
+        camera_shape = (1 if self.grayscale else 3, height, width)
+        if self.normalize:
+            camera = spaces.Box(0.0, 1.0, camera_shape, dtype=np.float32)
+        else:
+            camera = spaces.Box(0, 255, camera_shape, dtype=np.uint8)
+        obs_spaces = {'camera': camera}
+        
+        if self.lidar_encoding is not None:
+            for name, encoder in self.lidar_encoding.encoders.items():
+                obs_spaces[name] = spaces.Box(-np.inf, np.inf, encoder.output_shape,
+                                              dtype=np.float32)
+        else:
+            obs_spaces['lidar'] = spaces.Box(-np.inf, np.inf, (self.max_points, 4),
+                                             dtype=np.float32)
+            
+        obs_spaces['state'] = spaces.Box(-np.inf, np.inf, (self.state_dims,), dtype=np.float32)
+        return spaces.Dict(obs_spaces)
+        
     def process(self, raw_obs: Dict) -> Dict[str, np.ndarray]:
         """处理原始观测"""
         processed_obs = {}
         
         # 处理相机图像
         if 'camera_rgb' in raw_obs:
-            processed_obs['camera'] = self._process_image(raw_obs['camera_rgb'])
+            with stage_timer.span('obs.image'):
+                processed_obs['camera'] = self._process_image(raw_obs['camera_rgb'])
             
         # 处理激光雷达数据
         if 'lidar' in raw_obs:
-            processed_obs['lidar'] = self._process_lidar(raw_obs['lidar'])
+            with stage_timer.span('obs.lidar'):
+                if self.lidar_encoding is not None:
+                    # 编码器输出缓冲会被下一帧覆盖, 交给智能体前复制
+                    for name, value in self.lidar_encoding.encode(raw_obs['lidar']).items():
+                        processed_obs[name] = value.copy()
+                else:
+                    processed_obs['lidar'] = self._process_lidar(raw_obs['lidar'])
             
         # 处理状态信息
         if 'vehicle_state' in raw_obs:
-            processed_obs['state'] = self._process_state(raw_obs['vehicle_state'])
+            with stage_timer.span('obs.state'):
+                processed_obs['state'] = self._process_state(raw_obs['vehicle_state'])
             
         return processed_obs
         
@@ -71,12 +110,12 @@ class ObservationProcessor:
             padding = np.zeros((self.max_points - len(points), points.shape[1]))
             points = np.concatenate([points, padding], axis=0)
             
-        return points
+        return points.astype(np.float32, copy=False)
         
     def _process_state(self, state: Dict) -> np.ndarray:
         """处理状态信息"""
         # 提取关键状态信息
-        processed_state = np.zeros(self.state_dims)
+        processed_state = np.zeros(self.state_dims, dtype=np.float32)
         
         # 位置和方向
         processed_state[0:3] = state['position']
@@ -101,6 +140,9 @@ class NavigationObservationProcessor(ObservationProcessor):
         # 激光雷达处理参数
         self.lidar_range = config.get('lidar_range', 50.0)
         self.num_lidar_bins = config.get('num_lidar_bins', 64)
+        self._polar = PolarTransform()
+        self._angle_histogram = AngleHistogramEncoder({'bins': self.num_lidar_bins,
+                                                       'max_range': self.lidar_range})
         
     def process(self, obs: Dict) -> Dict:
         """处理观测"""
@@ -142,27 +184,8 @@ class NavigationObservationProcessor(ObservationProcessor):
         return image
         
     def _process_lidar(self, points: np.ndarray) -> np.ndarray:
-        """处理激光雷达数据"""
-        # 过滤超出范围的点
-        mask = np.linalg.norm(points[:, :2], axis=1) < self.lidar_range
-        points = points[mask]
-        
-        # 转换为极坐标
-        angles = np.arctan2(points[:, 1], points[:, 0])
-        distances = np.linalg.norm(points[:, :2], axis=1)
-        
-        # 创建距离直方图
-        hist, _ = np.histogram(
-            angles,
-            bins=self.num_lidar_bins,
-            range=(-np.pi, np.pi),
-            weights=distances
-        )
-        
-        # 归一化
-        hist = hist / self.lidar_range
-        
-        return hist
+        """处理激光雷达数据: 按方位角统计范围内点的距离和, 并归一化"""
+        return self._angle_histogram.encode(self._polar.update(points)).copy()
         
     def _process_vehicle_state(self, state: Dict) -> np.ndarray:
         """处理车辆状态"""
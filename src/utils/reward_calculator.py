@@ -2,6 +2,8 @@ import numpy as np
 from typing import Dict
 import yaml
 
+from src.utils.timing import stage_timer
+
 
 class RewardCalculator:
     """奖励计算器"""
@@ -24,11 +26,12 @@ class RewardCalculator:
         reward_info = {}
         
         # 计算各个组件的奖励
-        for name, reward_func in self.reward_components.items():
-            if self.config[f'{name}_rewards']['enabled']:
-                reward = reward_func(obs, action, info)
-                total_reward += reward
-                reward_info[f'{name}_reward'] = reward
+        with stage_timer.span('reward.calculate'):
+            for name, reward_func in self.reward_components.items():
+                if self.config[f'{name}_rewards'].get('enabled', True):
+                    reward = reward_func(obs, action, info)
+                    total_reward += reward
+                    reward_info[f'{name}_reward'] = reward
                 
         return total_reward, reward_info
         
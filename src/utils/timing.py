@@ -0,0 +1,140 @@
+"""分阶段耗时统计
+
+在热路径上用 ``with stage_timer.span('env.tick'):`` 包裹各阶段, 开启后以
+time.perf_counter_ns 计时并写入每个阶段的环形缓冲, 可随时取 p50/p95/p99。
+关闭时span返回共享的空上下文, 每个阶段只多一次属性判断。
+
+开启方式: 环境配置 stage_timing: true, 环境变量 CARLA_STAGE_TIMING=1,
+或直接调用 stage_timer.enable()。
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class LatencyRing:
+    """单个阶段的耗时环形缓冲(纳秒), 只保留最近capacity个样本"""
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.samples = np.zeros(capacity, dtype=np.int64)
+        self.count = 0  # 累计样本数
+        self.total_ns = 0
+
+    def add(self, elapsed_ns: int):
+        self.samples[self.count % self.capacity] = elapsed_ns
+        self.count += 1
+        self.total_ns += elapsed_ns
+
+    def values(self) -> np.ndarray:
+        """当前保留的样本"""
+        return self.samples[:min(self.count, self.capacity)]
+
+    def summary(self) -> Dict[str, float]:
+        """最近样本的分位数(毫秒)"""
+        values = self.values()
+        if len(values) == 0:
+            return {'count': 0}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99]) / 1e6
+        return {
+            'count': self.count,
+            'mean_ms': float(values.mean() / 1e6),
+            'p50_ms': float(p50),
+            'p95_ms': float(p95),
+            'p99_ms': float(p99),
+            'max_ms': float(values.max() / 1e6),
+            'total_s': self.total_ns / 1e9
+        }
+
+
+class _Span:
+    """计时上下文"""
+    __slots__ = ('timer', 'stage', 'start')
+
+    def __init__(self, timer: 'StageTimer', stage: str):
+        self.timer = timer
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer.record(self.stage, time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullSpan:
+    """关闭计时时使用的空上下文"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class StageTimer:
+    """按阶段名汇总耗时
+
+    多个线程(例如流水线观测处理线程)可同时记录; 并发写同一阶段时
+    偶尔丢失一个样本不影响分位数统计, 因此写入不加锁。
+    """
+    def __init__(self, capacity: int = 4096, enabled: bool = False):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._rings = {}
+        self._lock = threading.Lock()
+
+    def enable(self, enabled: bool = True):
+        """开启或关闭计时"""
+        self.enabled = enabled
+
+    def span(self, stage: str):
+        """返回包裹一个阶段的上下文"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage: str, elapsed_ns: int):
+        """记录一次阶段耗时"""
+        ring = self._rings.get(stage)
+        if ring is None:
+            with self._lock:
+                ring = self._rings.setdefault(stage, LatencyRing(self.capacity))
+        ring.add(elapsed_ns)
+
+    def reset(self):
+        """清空所有阶段"""
+        with self._lock:
+            self._rings = {}
+
+    def stages(self) -> list:
+        return sorted(self._rings)
+
+    def summary(self, stage: Optional[str] = None) -> Dict:
+        """单个阶段或所有阶段的分位数统计"""
+        if stage is not None:
+            ring = self._rings.get(stage)
+            return ring.summary() if ring is not None else {'count': 0}
+        return {name: self._rings[name].summary() for name in self.stages()}
+
+    def report(self) -> str:
+        """文本表格"""
+        lines = [f"{'stage':<24}{'count':>9}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)"]
+        for name, stats in self.summary().items():
+            if stats['count'] == 0:
+                continue
+            lines.append(f"{name:<24}{stats['count']:>9}{stats['mean_ms']:>9.3f}"
+                         f"{stats['p50_ms']:>9.3f}{stats['p95_ms']:>9.3f}{stats['p99_ms']:>9.3f}")
+        return "\n".join(lines)
+
+
+# 进程内共享的计时器
+stage_timer = StageTimer(enabled=os.environ.get('CARLA_STAGE_TIMING', '0') == '1')
@@ -1,10 +1,13 @@
 """可视化模块"""
-from src.visualization.dashboard.dashboard import Dashboard
-from .recorder import VideoRecorder
-from src.utils.logger import Logger
+from src.utils.lazy import lazy_module
 
-__all__ = [
-    'Dashboard',
-    'VideoRecorder',
-    'Logger'
-] 
\ No newline at end of file
+# 导出名称 -> 所在模块, 访问时才导入, 避免加载包时引入重依赖
+_LAZY_IMPORTS = {
+    'Dashboard': 'src.visualization.dashboard.dashboard',
+    'VideoRecorder': 'src.visualization.recorder',
+    'Logger': 'src.utils.logger'
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+__getattr__, __dir__ = lazy_module(globals(), _LAZY_IMPORTS)
@@ -0,0 +1,10 @@
+"""测试使用scripts/fake_carla中的CARLA替身, 不需要CARLA服务器"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# FakeCarla必须在导入src之前放到sys.path最前面, 使 import carla 得到替身模块
+sys.path.insert(0, str(ROOT / 'scripts' / 'fake_carla'))
+if str(ROOT) not in sys.path:
+    sys.path.insert(1, str(ROOT))
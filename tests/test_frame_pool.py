@@ -0,0 +1,108 @@
+"""相机帧缓冲池: 解码不随帧数分配内存, 预留的槽位在传感器重建后保留"""
+import tracemalloc
+
+import carla
+import numpy as np
+import pytest
+from carla.sensors import CameraModel
+
+from src.environments.carla_env import CarlaEnv
+from src.environments.sensors.manager import SensorManager
+
+CAMERAS = {
+    'rgb_front': ('sensor.camera.rgb', 'rgb'),
+    'depth_front': ('sensor.camera.depth', 'depth'),
+    'semantic_front': ('sensor.camera.semantic_segmentation', 'semantic')
+}
+WIDTH, HEIGHT = 320, 240
+FRAMES = 40
+MAX_BYTES_PER_FRAME = 4096
+
+
+@pytest.fixture(scope='module')
+def images():
+    """FakeCarla相机沿道路行驶生成的各相机图像序列"""
+    attributes = {'image_size_x': str(WIDTH), 'image_size_y': str(HEIGHT)}
+    sequences = {}
+    for name, (type_id, _) in CAMERAS.items():
+        camera = CameraModel(type_id, attributes, mount_height=1.4, mount_pitch=0.0,
+                             rng=np.random.default_rng(0))
+        sequences[name] = [
+            carla.Image(frame, frame * 0.05, None, WIDTH, HEIGHT, 90.0,
+                        camera.measure(frame * 0.5).tobytes())
+            for frame in range(1, FRAMES + 1)
+        ]
+    return sequences
+
+
+def make_manager(**config) -> SensorManager:
+    manager = SensorManager(dict(config, device='cpu'))
+    for name, (_, kind) in CAMERAS.items():
+        manager.camera_kinds[name] = kind
+        manager._register_sensor(name, None)
+    return manager
+
+
+def test_pooled_decode_memory_is_bounded(images):
+    manager = make_manager()
+    for name, sequence in images.items():
+        manager._on_camera_data(name, sequence[0])  # 第一帧分配缓冲池
+
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        peak = 0
+        for frame in range(1, FRAMES):
+            for name, sequence in images.items():
+                tracemalloc.reset_peak()
+                base = tracemalloc.get_traced_memory()[0]
+                manager._on_camera_data(name, sequence[frame])
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+        growth = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+    assert peak <= MAX_BYTES_PER_FRAME
+    assert growth <= MAX_BYTES_PER_FRAME
+    assert manager.data_frames['rgb_front'] == FRAMES
+
+
+def test_pool_slots_are_reused_after_frame_pool_size_frames(images):
+    manager = make_manager(frame_pool_size=3)
+    decoded = []
+    for frame in range(4):
+        manager._on_camera_data('rgb_front', images['rgb_front'][frame])
+        decoded.append(manager.data_buffers['rgb_front'])
+
+    assert not any(np.shares_memory(decoded[0], array) for array in decoded[1:3])
+    assert np.shares_memory(decoded[0], decoded[3])
+
+
+def test_reserve_frames_grows_the_pool(images):
+    manager = make_manager(frame_pool_size=3)
+    manager.reserve_frames(5)
+    manager.reserve_frames(2)  # 只会增大
+    decoded = []
+    for frame in range(6):
+        manager._on_camera_data('rgb_front', images['rgb_front'][frame])
+        decoded.append(manager.data_buffers['rgb_front'])
+
+    assert manager.frame_pool_size == 5
+    assert not any(np.shares_memory(decoded[0], array) for array in decoded[1:5])
+    assert np.shares_memory(decoded[0], decoded[5])
+
+
+def test_reservation_survives_warm_reset_sensor_rebuild():
+    env = CarlaEnv({'sync_mode': True, 'warm_reset': True, 'sensors': {'device': 'cpu'}})
+    try:
+        env.reset()
+        env.reserve_frames(6)
+        old_manager = env.sensor_manager
+        env.config['sensors'] = {'device': 'cpu', 'frame_pool_size': 3}
+        env.reset()
+        env.step(np.zeros(3, dtype=np.float32))
+
+        assert env.sensor_manager is not old_manager
+        assert env.sensor_manager.frame_pool_size == 6
+    finally:
+        env._cleanup()
@@ -0,0 +1,34 @@
+"""传感器帧同步: 回调在后台线程送达时, step返回的数据属于本次tick的帧"""
+import carla
+import numpy as np
+
+from src.environments.carla_env import CarlaEnv
+
+
+def test_step_returns_sensor_data_of_the_ticked_frame(monkeypatch):
+    monkeypatch.setitem(carla.SETTINGS, 'async_sensors', True)
+    env = CarlaEnv({'port': 2101, 'sync_mode': True, 'sensors': {'device': 'cpu'}})
+    try:
+        env.reset()
+        action = np.zeros(3, dtype=np.float32)
+        for _ in range(5):
+            obs, _, _, _ = env.step(action, process_obs=False)
+            # 碰撞和车道入侵是事件传感器, 不参与同步
+            frames = {name: obs['sensor_frames'][name] for name in env.sensor_manager._sync_sensors}
+            assert frames and all(frame == env.frame for frame in frames.values())
+            assert obs['vehicle_state']['frame'] == env.frame
+    finally:
+        env._cleanup()
+
+
+def test_wait_for_frame_times_out_on_a_frame_that_never_arrives(monkeypatch):
+    monkeypatch.setitem(carla.SETTINGS, 'async_sensors', True)
+    env = CarlaEnv({'port': 2102, 'sync_mode': True, 'sensors': {'device': 'cpu'}})
+    try:
+        env.reset()
+        env.step(np.zeros(3, dtype=np.float32))
+
+        assert env.sensor_manager.wait_for_frame(env.frame, timeout=0.05)
+        assert not env.sensor_manager.wait_for_frame(env.frame + 1, timeout=0.05)
+    finally:
+        env._cleanup()
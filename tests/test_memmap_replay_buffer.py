@@ -0,0 +1,74 @@
+"""磁盘经验回放: flush中途退出后重新打开得到一致的索引, alpha以元数据为准"""
+import numpy as np
+import pytest
+
+from src.training.utils.memmap_replay_buffer import META_FILE, MemmapReplayBuffer
+
+OBS_SPEC = {'state': ((2,), np.float32)}
+ACTION_SPEC = ((1,), np.float32)
+
+
+def make_buffer(directory, **kwargs) -> MemmapReplayBuffer:
+    return MemmapReplayBuffer(directory, 16, 4, obs_spec=OBS_SPEC, action_spec=ACTION_SPEC,
+                              seed=0, **kwargs)
+
+
+def push(buffer: MemmapReplayBuffer, count: int):
+    for i in range(count):
+        state = {'state': np.full(2, i, dtype=np.float32)}
+        next_state = {'state': np.full(2, i + 1, dtype=np.float32)}
+        buffer.push(state, np.zeros(1, np.float32), float(i), next_state, i % 5 == 4)
+
+
+def test_reopen_restores_position_and_priorities(tmp_path):
+    buffer = make_buffer(tmp_path)
+    push(buffer, 10)
+    buffer.update_priorities(np.arange(10), np.linspace(0.1, 1.0, 10))
+    expected = (buffer.position, buffer.size, buffer.sum_tree.total())
+    buffer.close()
+
+    reopened = MemmapReplayBuffer(tmp_path, batch_size=4)
+    assert (reopened.position, reopened.size, reopened.sum_tree.total()) == pytest.approx(expected)
+    assert reopened.generation == 1
+    assert [path.name for path in tmp_path.glob('index.*.npz')] == ['index.1.npz']
+    reopened.close()
+
+
+def test_interrupted_flush_keeps_the_previous_index(tmp_path, monkeypatch):
+    buffer = make_buffer(tmp_path)
+    push(buffer, 5)
+    buffer.flush()
+    expected = (buffer.position, buffer.size, buffer.sum_tree.total())
+
+    # 新索引已写入, 替换元数据之前退出
+    push(buffer, 6)
+    write_atomic = buffer._write_atomic
+
+    def fail_on_meta(name, write, mode):
+        if name == META_FILE:
+            raise OSError("interrupted")
+        write_atomic(name, write, mode)
+
+    monkeypatch.setattr(buffer, '_write_atomic', fail_on_meta)
+    with pytest.raises(OSError):
+        buffer.flush()
+
+    reopened = MemmapReplayBuffer(tmp_path, batch_size=4)
+    assert (reopened.position, reopened.size, reopened.sum_tree.total()) == pytest.approx(expected)
+    assert reopened.generation == 1
+
+
+def test_reopen_checks_alpha(tmp_path):
+    make_buffer(tmp_path, alpha=0.5).close()
+
+    assert MemmapReplayBuffer(tmp_path, batch_size=4).alpha == 0.5
+    with pytest.raises(ValueError):
+        MemmapReplayBuffer(tmp_path, batch_size=4, alpha=0.7)
+
+
+def test_missing_index_is_reported(tmp_path):
+    make_buffer(tmp_path).close()
+    (tmp_path / 'index.1.npz').unlink()
+
+    with pytest.raises(ValueError):
+        MemmapReplayBuffer(tmp_path, batch_size=4)
@@ -0,0 +1,92 @@
+"""有界传感器队列: 溢出策略, 以及消费方变慢时内存不增长"""
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from src.environments.sensors.ring_queue import RingQueue
+
+FRAME_SHAPE = (300, 400, 3)
+FRAME_BYTES = int(np.prod(FRAME_SHAPE))
+
+
+def fill(queue: RingQueue, frames: int):
+    for frame in range(frames):
+        queue.put(frame, frame)
+
+
+def test_drop_oldest_keeps_the_newest_frames():
+    queue = RingQueue(capacity=3, policy='drop_oldest')
+    fill(queue, 5)
+
+    assert [queue.get()[0] for _ in range(3)] == [2, 3, 4]
+    assert queue.get() is None
+    assert queue.dropped == 2
+
+
+def test_drop_newest_keeps_the_oldest_frames():
+    queue = RingQueue(capacity=3, policy='drop_newest')
+    fill(queue, 5)
+
+    assert [queue.get()[0] for _ in range(3)] == [0, 1, 2]
+    assert queue.dropped == 2
+
+
+def test_block_drops_after_timeout():
+    queue = RingQueue(capacity=1, policy='block', block_timeout=0.01)
+
+    assert queue.put(0, 'a')
+    assert not queue.put(1, 'b')
+    assert queue.get() == (0, 'a')
+    assert queue.dropped == 1
+
+
+def test_get_latest_skips_older_frames_and_keeps_newer_ones():
+    queue = RingQueue(capacity=8)
+    fill(queue, 6)
+
+    assert queue.get_latest(3) == (3, 3)
+    assert queue.skipped == 3
+    assert len(queue) == 2
+    assert queue.stats()['lag'] == 2
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        RingQueue(policy='grow')
+
+
+def test_drop_oldest_memory_is_bounded_with_a_slow_consumer():
+    capacity = 4
+    queue = RingQueue(capacity=capacity, policy='drop_oldest')
+    stop = threading.Event()
+
+    def produce():
+        frame = 0
+        while not stop.is_set():
+            queue.put(frame, np.full(FRAME_SHAPE, frame % 256, dtype=np.uint8))
+            frame += 1
+            time.sleep(0.001)
+
+    tracemalloc.start()
+    try:
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        held = None
+        for _ in range(20):
+            time.sleep(0.02)  # 消费方比生产方慢一个数量级
+            held = queue.get_latest()
+        stop.set()
+        producer.join()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    stats = queue.stats()
+    assert held is not None
+    assert stats['dropped'] > 0 and stats['size'] <= capacity
+    # 队列中的帧, 加上消费方持有和生产方正在写入的帧
+    assert peak <= (capacity + 3) * FRAME_BYTES
+    assert stats['produced'] * FRAME_BYTES > 2 * peak
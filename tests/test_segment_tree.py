@@ -0,0 +1,95 @@
+"""求和树/最小值树: 前缀和查找、含重复下标的批量更新、整体赋值, 以及优先回放的重要性采样权重"""
+import numpy as np
+import pytest
+
+from src.training.utils.replay_buffer import PrioritizedReplayBuffer
+from src.training.utils.segment_tree import MinTree, SumTree
+
+# 容量不是2的幂, 末尾有空叶子
+CAPACITY = 13
+
+
+def leaf_values(rng) -> np.ndarray:
+    values = rng.integers(0, 5, CAPACITY).astype(np.float64)
+    values[[0, 6]] = 0.0
+    return values
+
+
+def test_find_prefixsum_matches_cumsum():
+    rng = np.random.default_rng(0)
+    values = leaf_values(rng)
+    tree = SumTree(CAPACITY)
+    tree.assign(values)
+    cumsum = np.cumsum(values)
+
+    # 随机前缀和, 以及恰好落在边界上的值: 返回使前缀和大于该值的最小下标, 跳过零优先级叶子
+    prefixes = np.concatenate([rng.uniform(0, tree.total(), 200), cumsum[:-1]])
+    expected = np.searchsorted(cumsum, prefixes, side='right')
+
+    assert tree.total() == values.sum()
+    np.testing.assert_array_equal(tree.find_prefixsum(prefixes), expected)
+    assert not np.any(values[tree.find_prefixsum(prefixes)] == 0)
+    # 浮点误差越过总和时不越界
+    assert tree.find_prefixsum([tree.total() * (1 + 1e-12)])[0] == CAPACITY - 1
+
+
+@pytest.mark.parametrize('tree_class, reduce', [(SumTree, np.sum), (MinTree, np.min)])
+def test_batched_update_with_duplicate_indices(tree_class, reduce):
+    rng = np.random.default_rng(1)
+    initial = rng.uniform(1, 2, CAPACITY)
+    tree = tree_class(CAPACITY)
+    tree.assign(initial)
+
+    indices = np.array([3, 7, 3, 12, 7, 0])
+    values = np.array([0.5, 4.0, 0.25, 3.0, 0.75, 9.0])
+    tree.update(indices, values)
+
+    # 重复的下标以最后一次为准, 父节点与逐个更新得到的树一致
+    expected = tree_class(CAPACITY)
+    expected.assign(initial)
+    for index, value in zip(indices, values):
+        expected.update([index], value)
+    np.testing.assert_array_equal(tree[[3, 7, 12, 0]], [0.25, 0.75, 3.0, 9.0])
+    np.testing.assert_allclose(tree.tree, expected.tree)
+    assert tree.reduce() == pytest.approx(reduce(tree.values()))
+
+
+@pytest.mark.parametrize('tree_class', [SumTree, MinTree])
+def test_assign_rebuilds_the_whole_tree(tree_class):
+    rng = np.random.default_rng(2)
+    values = rng.uniform(0.1, 3.0, CAPACITY)
+    assigned = tree_class(CAPACITY)
+    assigned.update(np.arange(CAPACITY), rng.uniform(5, 6, CAPACITY))
+    assigned.assign(values)
+
+    updated = tree_class(CAPACITY)
+    for index, value in enumerate(values):
+        updated.update([index], value)
+
+    np.testing.assert_allclose(assigned.tree, updated.tree)
+    np.testing.assert_array_equal(assigned.values(), values)
+    # 容量之外的叶子保持单位元
+    assert np.all(assigned.tree[assigned.leaves + CAPACITY:] == assigned.neutral)
+
+
+def test_importance_sampling_weights():
+    alpha, beta = 0.6, 0.4
+    buffer = PrioritizedReplayBuffer(CAPACITY, 8, alpha=alpha, beta=beta, beta_steps=3, seed=0)
+    state = {'state': np.zeros((CAPACITY, 2), np.float32)}
+    buffer.push_batch(state, np.zeros((CAPACITY, 3), np.float32), np.zeros(CAPACITY, np.float32),
+                      state, np.zeros(CAPACITY, bool))
+    priorities = np.linspace(0.1, 2.0, CAPACITY)
+    buffer.update_priorities(np.arange(CAPACITY), priorities)
+
+    # w_i = (N * P(i))^-beta / max_j w_j, P(i) = p_i^alpha / sum p^alpha
+    scaled = np.power(priorities + buffer.epsilon, alpha)
+    probabilities = scaled / scaled.sum()
+    batch = buffer.sample()
+    weights = np.power(CAPACITY * probabilities, -beta)
+    weights /= weights.max()
+
+    assert batch['weights'].dtype == np.float32
+    np.testing.assert_allclose(batch['weights'], weights[batch['indices']], rtol=1e-5)
+    assert batch['weights'].max() <= 1.0
+    # beta在beta_steps次采样内线性增加到1
+    assert buffer.beta == pytest.approx(beta + (1.0 - beta) / 3)
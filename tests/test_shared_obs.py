@@ -0,0 +1,101 @@
+"""共享内存观测传输: RLEnv形状的观测经VecCarlaEnv往返后不变, 形状或类型不符时报错"""
+from functools import partial
+
+import gym
+import numpy as np
+import pytest
+from gym import spaces
+
+from src.environments.shared_obs import SharedObservationBuffer
+from src.environments.vec_env import VecCarlaEnv
+from src.utils.observation_processor import ObservationProcessor
+
+
+def raw_obs(seed: int, step: int):
+    """确定性的原始观测; 点数少于max_points, 处理时只补零不随机采样"""
+    rng = np.random.default_rng([seed, step])
+    return {
+        'camera_rgb': rng.integers(0, 256, (120, 160, 3), dtype=np.uint8),
+        'lidar': rng.uniform(-20, 20, (600, 4)).astype(np.float32),
+        'vehicle_state': {'position': rng.normal(size=3), 'rotation': rng.normal(size=3),
+                          'velocity': rng.normal(size=3)}
+    }
+
+
+class ProcessedObsEnv(gym.Env):
+    """观测由RLEnv的ObservationProcessor处理得到, 观测空间与RLEnv相同"""
+    def __init__(self, seed: int, space_override=None):
+        super().__init__()
+        self.seed_value = seed
+        self.processor = ObservationProcessor({})
+        self.observation_space = space_override or self.processor.observation_space()
+        self.action_space = spaces.Box(-1.0, 1.0, (3,), dtype=np.float32)
+        self.current_step = 0
+
+    def reset(self):
+        self.current_step = 0
+        return self.processor.process(raw_obs(self.seed_value, 0))
+
+    def step(self, action):
+        self.current_step += 1
+        obs = self.processor.process(raw_obs(self.seed_value, self.current_step))
+        return obs, 0.0, False, {}
+
+
+def test_processor_output_matches_its_observation_space():
+    processor = ObservationProcessor({})
+    space = processor.observation_space()
+    obs = processor.process(raw_obs(0, 0))
+
+    assert set(obs) == set(space.spaces)
+    for key, value in obs.items():
+        assert value.shape == space[key].shape and value.dtype == space[key].dtype
+
+
+def test_shared_memory_round_trip_of_processed_observations():
+    processor = ObservationProcessor({})
+    env = VecCarlaEnv([partial(ProcessedObsEnv, i) for i in range(2)], 'fork',
+                      shared_memory=True)
+    try:
+        obs = env.reset()
+        for step in range(3):
+            for i in range(2):
+                expected = processor.process(raw_obs(i, step))
+                for key, value in expected.items():
+                    np.testing.assert_array_equal(obs[key][i], value)
+            assert obs['camera'].max() > 0
+            obs, _, _, _ = env.step(np.zeros((2, 3), dtype=np.float32))
+    finally:
+        env.close()
+
+
+def test_mismatched_observation_space_is_reported():
+    # 旧的RLEnv观测空间: uint8相机, (32, 1000, 4)激光雷达
+    legacy = spaces.Dict({
+        'camera': spaces.Box(0, 255, (3, 84, 84), dtype=np.uint8),
+        'lidar': spaces.Box(-np.inf, np.inf, (32, 1000, 4), dtype=np.float32),
+        'state': spaces.Box(-np.inf, np.inf, (10,), dtype=np.float32)
+    })
+    with pytest.raises(RuntimeError, match="Observation"):
+        env = VecCarlaEnv([partial(ProcessedObsEnv, 0, legacy)], 'fork', shared_memory=True)
+        try:
+            env.reset()
+        finally:
+            env.close()
+
+
+def test_write_rejects_broadcast_and_unsafe_casts():
+    buffer = SharedObservationBuffer({'camera': ((3, 4, 4), np.dtype(np.uint8)),
+                                      'lidar': ((2, 5, 4), np.dtype(np.float32))}, num_envs=1)
+    try:
+        with pytest.raises(ValueError, match="dtype"):
+            buffer.write(0, 0, {'camera': np.ones((3, 4, 4), np.float32),
+                                'lidar': np.zeros((2, 5, 4), np.float32)})
+        with pytest.raises(ValueError, match="shape"):
+            buffer.write(0, 0, {'camera': np.ones((3, 4, 4), np.uint8),
+                                'lidar': np.zeros((5, 4), np.float32)})
+        buffer.write(0, 0, {'camera': np.ones((3, 4, 4), np.uint8),
+                            'lidar': np.ones((2, 5, 4), np.float64)})
+        assert buffer.view(0)['lidar'].dtype == np.float32 and buffer.view(0)['lidar'].all()
+    finally:
+        buffer.close()